@@ -1,10 +1,13 @@
 from typing import Optional
-from datetime import datetime
-from fastapi import APIRouter, Depends, Request, Form, HTTPException, status
+from datetime import date, datetime
+from fastapi import APIRouter, Depends, Request, Form, HTTPException, Query, status
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 from models import TutorProfile, Resume, ParentReview
 import auth
+from conditional import bump_versions, resume_entities
+from config import settings
+from pagination import filter_student_records, paginate
 
 router = APIRouter()
 templates = Jinja2Templates(directory="templates")
@@ -49,11 +52,43 @@ async def get_current_admin_user(request: Request):
     
     return tutor
 
+# --- Listing helpers ---
+# Filter forms send empty strings for blank fields, so filters are parsed by hand
+def _parse_bool(value: Optional[str]) -> Optional[bool]:
+    if not value:
+        return None
+    return value.lower() in ("true", "1", "on")
+
+def _parse_date(value: Optional[str]) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid date: {value}")
+
+def _next_page_url(request: Request, next_cursor: Optional[str]) -> Optional[str]:
+    if not next_cursor:
+        return None
+    return str(request.url.include_query_params(cursor=next_cursor))
+
 # --- TutorProfile Admin Routes ---
 @router.get("/tutor_profiles", response_class=HTMLResponse, dependencies=[Depends(get_current_admin_user)])
-async def list_tutor_profiles(request: Request):
-    tutors = await TutorProfile.all()
-    return templates.TemplateResponse("tutor_profiles.html", {"request": request, "tutors": tutors})
+async def list_tutor_profiles(
+    request: Request,
+    branch: Optional[str] = None,
+    is_senior: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.page_size_default, ge=1, le=settings.page_size_max)
+):
+    filters = {"branch": branch or None, "is_senior": _parse_bool(is_senior)}
+    queryset = TutorProfile.all()
+    if filters["branch"]:
+        queryset = queryset.filter(branch=filters["branch"])
+    if filters["is_senior"] is not None:
+        queryset = queryset.filter(is_senior=filters["is_senior"])
+    tutors, next_cursor = await paginate(queryset, cursor, limit, keys=("id",))
+    return templates.TemplateResponse("tutor_profiles.html", {"request": request, "tutors": tutors, "filters": filters, "next_url": _next_page_url(request, next_cursor)})
 
 @router.post("/tutor_profiles", response_class=RedirectResponse, dependencies=[Depends(get_current_admin_user)])
 async def add_tutor_profile(
@@ -100,6 +135,7 @@ async def update_tutor_profile(
     tutor.branch = branch
     tutor.is_senior = is_senior
     await tutor.save()
+    await auth.invalidate_tutor_identity(tutor.id)
     return RedirectResponse(url="/admin/tutor_profiles", status_code=status.HTTP_303_SEE_OTHER)
 
 @router.post("/tutor_profiles/{tutor_id}/delete", response_class=RedirectResponse, dependencies=[Depends(get_current_admin_user)])
@@ -108,13 +144,23 @@ async def delete_tutor_profile(tutor_id: int):
     if not tutor:
         raise HTTPException(status_code=404, detail="Tutor not found")
     await tutor.delete()
+    await auth.invalidate_tutor_identity(tutor_id)
     return RedirectResponse(url="/admin/tutor_profiles", status_code=status.HTTP_303_SEE_OTHER)
 
 # --- Resume Admin Routes ---
 @router.get("/resumes", response_class=HTMLResponse, dependencies=[Depends(get_current_admin_user)])
-async def list_resumes(request: Request):
-    resumes = await Resume.all()
-    return templates.TemplateResponse("resumes.html", {"request": request, "resumes": resumes})
+async def list_resumes(
+    request: Request,
+    branch: Optional[str] = None,
+    verified: Optional[str] = None,
+    created_from: Optional[str] = None,
+    created_to: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.page_size_default, ge=1, le=settings.page_size_max)
+):
+    filters = {"branch": branch or None, "verified": _parse_bool(verified), "created_from": _parse_date(created_from), "created_to": _parse_date(created_to)}
+    resumes, next_cursor = await paginate(filter_student_records(Resume.all(), **filters), cursor, limit)
+    return templates.TemplateResponse("resumes.html", {"request": request, "resumes": resumes, "filters": filters, "next_url": _next_page_url(request, next_cursor)})
 
 @router.post("/resumes", response_class=RedirectResponse, dependencies=[Depends(get_current_admin_user)])
 async def add_resume(
@@ -127,6 +173,7 @@ async def add_resume(
         content=content,
         is_verified=is_verified
     )
+    await bump_versions(resume_entities([student_crm_id]))
     return RedirectResponse(url="/admin/resumes", status_code=status.HTTP_303_SEE_OTHER)
 
 @router.post("/resumes/{resume_id}/update", response_class=RedirectResponse, dependencies=[Depends(get_current_admin_user)])
@@ -140,11 +187,13 @@ async def update_resume(
     if not resume:
         raise HTTPException(status_code=404, detail="Resume not found")
     
+    previous_student_crm_id = resume.student_crm_id
     resume.student_crm_id = student_crm_id
     resume.content = content
     resume.is_verified = is_verified
     resume.updated_at = datetime.utcnow()
     await resume.save()
+    await bump_versions(resume_entities([previous_student_crm_id, student_crm_id]))
     return RedirectResponse(url="/admin/resumes", status_code=status.HTTP_303_SEE_OTHER)
 
 @router.post("/resumes/{resume_id}/delete", response_class=RedirectResponse, dependencies=[Depends(get_current_admin_user)])
@@ -153,13 +202,22 @@ async def delete_resume(resume_id: int):
     if not resume:
         raise HTTPException(status_code=404, detail="Resume not found")
     await resume.delete()
+    await bump_versions(resume_entities([resume.student_crm_id]))
     return RedirectResponse(url="/admin/resumes", status_code=status.HTTP_303_SEE_OTHER)
 
 # --- ParentReview Admin Routes ---
 @router.get("/parent_reviews", response_class=HTMLResponse, dependencies=[Depends(get_current_admin_user)])
-async def list_parent_reviews(request: Request):
-    reviews = await ParentReview.all()
-    return templates.TemplateResponse("parent_reviews.html", {"request": request, "reviews": reviews})
+async def list_parent_reviews(
+    request: Request,
+    branch: Optional[str] = None,
+    created_from: Optional[str] = None,
+    created_to: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.page_size_default, ge=1, le=settings.page_size_max)
+):
+    filters = {"branch": branch or None, "created_from": _parse_date(created_from), "created_to": _parse_date(created_to)}
+    reviews, next_cursor = await paginate(filter_student_records(ParentReview.all(), **filters), cursor, limit)
+    return templates.TemplateResponse("parent_reviews.html", {"request": request, "reviews": reviews, "filters": filters, "next_url": _next_page_url(request, next_cursor)})
 
 @router.post("/parent_reviews", response_class=RedirectResponse, dependencies=[Depends(get_current_admin_user)])
 async def add_parent_review(
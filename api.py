@@ -1,9 +1,22 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import date, datetime
+from typing import List, Literal, Optional
+from tortoise import timezone
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, status
+from fastapi.responses import Response, StreamingResponse
 import models
 import schemas
 import auth
-from crm_integration import get_all_groups, get_tutor_data_from_crm, get_client_data_from_crm, get_tutor_groups_from_crm, get_group_clients_from_crm
+from cache import client_cache
+from conditional import GROUPS, RESUMES, STUDENTS, bump_versions, conditional_get, resume_entities, student_resumes
+from dossiers import load_group_roster, load_student_dossiers
+from exports import EXPORT_FIELDS, EXPORT_MEDIA_TYPES, gzip_stream, iter_export
+from search import SEARCH_TABLES, search_records
+from config import settings
+from pagination import filter_student_records, paginate
+from serialization import DefaultJSONResponse, json_rows_response
+from jobs import JOB_HANDLERS, enqueue_job
+from sync import GROUP_FIELDS
+from crm_integration import crm_client, refresh_tutor_profile_from_crm, tutor_profile_is_stale, get_tutor_data_from_crm, get_client_data_from_crm, get_tutor_groups_from_crm
 
 router = APIRouter()
 
@@ -11,7 +24,10 @@ router = APIRouter()
 # Тестовый endpoint для проверки
 @router.get("/health/")
 async def health_check():
-    return {"status": "ok", "message": "Backend is working"}
+    # CRM outages degrade the CRM-backed endpoints only, so the API itself stays "ok"
+    circuits = crm_client.breaker_states()
+    crm_status = "degraded" if any(circuit["state"] != "closed" for circuit in circuits.values()) else "ok"
+    return {"status": "ok", "message": "Backend is working", "crm": {"status": crm_status, "circuits": circuits}}
 
 
 # Ваши основные endpoints здесь
@@ -73,6 +89,7 @@ async def register_tutor(register_data: schemas.TutorRegisterRequest):
             web=web,
             addr=addr,
             teacher_to_skill=teacher_to_skill,
+            crm_synced_at=timezone.now(),
         )
 
         return db_tutor
@@ -85,7 +102,7 @@ async def register_tutor(register_data: schemas.TutorRegisterRequest):
 
 
 @router.post("/tutors/login/", response_model=schemas.Token)
-async def login_tutor(tutor_login: schemas.TutorLogin):
+async def login_tutor(tutor_login: schemas.TutorLogin, background_tasks: BackgroundTasks):
     tutor = await auth.authenticate_tutor(tutor_login.phone_number)
     if not tutor:
         raise HTTPException(
@@ -94,97 +111,64 @@ async def login_tutor(tutor_login: schemas.TutorLogin):
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # Get updated tutor data from CRM and update DB record
-    if tutor.branch:
-        tutor_data = await get_tutor_data_from_crm(tutor.phone_number, tutor.branch)
-        if tutor_data:
-            # Update tutor profile with latest CRM data
-            update_data = {}
-            update_data["tutor_crm_id"] = tutor_data.get("id")
-            update_data["tutor_name"] = tutor_data.get("name")
-            update_data["branch_ids"] = tutor_data.get("branch_ids")
-            update_data["dob"] = tutor_data.get("dob")
-            update_data["gender"] = tutor_data.get("gender")
-            update_data["streaming_id"] = tutor_data.get("streaming_id")
-            update_data["note"] = tutor_data.get("note")
-            update_data["e_date"] = tutor_data.get("e_date")
-            update_data["avatar_url"] = tutor_data.get("avatar_url")
-            update_data["phone"] = tutor_data.get("phone")
-            update_data["email"] = tutor_data.get("email")
-            update_data["web"] = tutor_data.get("web")
-            update_data["addr"] = tutor_data.get("addr")
-            update_data["teacher_to_skill"] = tutor_data.get("teacher-to-skill")
-
-            # Update the tutor record with new CRM data
-            for field, value in update_data.items():
-                setattr(tutor, field, value)
-
-            await tutor.save()
-
-    # Since we don't have username, we'll use phone number as the subject
-    access_token = auth.create_access_token(data={"sub": tutor.phone_number})
+    # Refresh the profile from CRM after the response is sent, and only when it is stale,
+    # so login latency doesn't depend on the CRM
+    if tutor.branch and tutor_profile_is_stale(tutor):
+        background_tasks.add_task(refresh_tutor_profile_from_crm, tutor.id)
+
+    # Phone number is the subject; the other claims let endpoints skip the DB lookup
+    access_token = auth.create_access_token(data=auth.tutor_token_claims(tutor))
     return {"access_token": access_token, "token_type": "bearer"}
 
 
 @router.get("/tutors/groups/")
-async def get_tutor_groups(current_tutor: models.TutorProfile = Depends(auth.get_current_active_tutor)):
+async def get_tutor_groups(request: Request, current_tutor: schemas.TutorIdentity = Depends(auth.get_current_active_identity)):
     # Get tutor's groups from the database
     if current_tutor.is_senior:
         # Senior tutors can see all groups
-        groups = await models.Group.all()
-    else:
+        queryset = models.Group.all()
+    elif current_tutor.tutor_crm_id:
         # Regular tutors see only their groups (based on tutor_crm_id)
-        # Find groups where the tutor is listed as a teacher by checking tutor_crm_id in the teacher_ids JSON field
-        groups = await models.Group.filter(teacher_ids__contains=current_tutor.tutor_crm_id).all()
-
-    # Convert to the same format as the CRM response for consistency
-    groups_data = []
-    for group in groups:
-        # Create a format similar to what the CRM API returns
-        group_data = {
-            "id": group.crm_group_id,
-            "branch_ids": group.branch_ids,
-            "teacher_ids": group.teacher_ids,
-            "name": group.name,
-            "level_id": group.level_id,
-            "status_id": group.status_id,
-            "company_id": group.company_id,
-            "streaming_id": group.streaming_id,
-            "limit": group.limit,
-            "note": group.note,
-            "b_date": group.b_date,
-            "e_date": group.e_date,
-            "created_at": group.created_at,
-            "updated_at": group.updated_at,
-            "custom_aerodromnaya": group.custom_aerodromnaya,
-        }
-        groups_data.append(group_data)
-
-    return groups_data if groups_data else {"groups": []}
+        # GroupTeacher mirrors the teacher_ids JSON field, so this is one indexed join
+        queryset = models.Group.filter(teachers__tutor_crm_id=current_tutor.tutor_crm_id)
+    else:
+        return {"groups": []}
+
+    # Groups only change with a sync; which of them are listed depends on the caller
+    not_modified, validators = await conditional_get(request, [GROUPS], scope=(current_tutor.is_senior, current_tutor.tutor_crm_id))
+    if not_modified:
+        return not_modified
+
+    # Same format as the CRM response for consistency: the CRM group id is returned as "id"
+    groups = await queryset.order_by("id").values(*GROUP_FIELDS, id="crm_group_id")
+    if not groups:
+        return DefaultJSONResponse({"groups": []}, headers=validators)
+    return json_rows_response(schemas.GROUP_ROWS, groups, headers=validators)
 
 
 @router.get("/groups/clients/")
-async def get_group_clients(group_id: str, current_tutor: models.TutorProfile = Depends(auth.get_current_active_tutor)):
+async def get_group_clients(group_id: str, request: Request, current_tutor: schemas.TutorIdentity = Depends(auth.get_current_active_identity)):
     # Get students for the group from the database
     try:
         # Convert group_id to integer for database query
         group_id_int = int(group_id)
 
+        not_modified, validators = await conditional_get(request, [GROUPS, STUDENTS])
+        if not_modified:
+            return not_modified
+
         # Get the group from database
         group = await models.Group.get_or_none(id=group_id_int)
         if not group:
-            return {"clients": []}
-
-        # Get all students associated with this group
-        students = await models.Student.filter(group=group).all()
+            return DefaultJSONResponse({"clients": []}, headers=validators)
 
-        # Format the response to match the expected structure
-        clients_data = []
-        for student in students:
-            client_data = {"customer_id": student.student_crm_id, "client_name": student.student_name}
-            clients_data.append(client_data)
+        # Get all students associated with this group, in the structure the CRM uses
+        clients_data = await models.Student.filter(group=group).order_by("id").values(
+            customer_id="student_crm_id", client_name="student_name")
 
-        return clients_data if clients_data else {"clients": []}
+        if not clients_data:
+            return DefaultJSONResponse({"clients": []}, headers=validators)
+        return json_rows_response(schemas.GROUP_CLIENT_ROWS, clients_data, headers=validators)
     except ValueError:
         # Handle case where group_id is not a valid integer
         return {"clients": []}
@@ -193,16 +177,41 @@ async def get_group_clients(group_id: str, current_tutor: models.TutorProfile =
         return {"clients": []}
 
 
+@router.get("/groups/roster/", response_model=schemas.GroupRoster)
+async def get_group_roster(group_id: int, request: Request, response: Response,
+                           current_tutor: schemas.TutorIdentity = Depends(auth.get_current_active_identity)):
+    """Students of a group with their resume status and the group's done/total counts."""
+    not_modified, validators = await conditional_get(request, [GROUPS, STUDENTS, RESUMES])
+    if not_modified:
+        return not_modified
+    response.headers.update(validators)
+    roster = await load_group_roster(group_id)
+    if roster is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Group not found")
+    return roster
+
+
 # Resume endpoints
 @router.get("/resumes/client/", response_model=List[schemas.ResumeResponse])
-async def get_client_resumes(student_crm_id: str, current_tutor: models.TutorProfile = Depends(auth.get_current_active_tutor)):
-    """Get resumes for a specific client."""
-    resumes = await models.Resume.filter(student_crm_id=student_crm_id)
-    return resumes
+async def get_client_resumes(
+    student_crm_id: str,
+    request: Request,
+    verified: Optional[bool] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.page_size_default, ge=1, le=settings.page_size_max),
+    current_tutor: schemas.TutorIdentity = Depends(auth.get_current_active_identity),
+):
+    """Get resumes for a specific client, newest first. The next page cursor is returned in the X-Next-Cursor header."""
+    not_modified, validators = await conditional_get(request, [student_resumes(student_crm_id)])
+    if not_modified:
+        return not_modified
+    queryset = filter_student_records(models.Resume.filter(student_crm_id=student_crm_id), verified=verified)
+    resumes, next_cursor = await paginate(queryset, cursor, limit, fields=schemas.RESUME_ROW_FIELDS)
+    return json_rows_response(schemas.RESUME_ROWS, resumes, next_cursor, headers=validators)
 
 
 @router.post("/resumes/{resume_id}/", response_model=schemas.ResumeResponse)
-async def update_resume(resume_id: int, resume_update: schemas.ResumeUpdate, current_tutor: models.TutorProfile = Depends(auth.get_current_active_tutor)):
+async def update_resume(resume_id: int, resume_update: schemas.ResumeUpdate, current_tutor: schemas.TutorIdentity = Depends(auth.get_current_active_identity)):
     """Update a specific resume."""
     resume = await models.Resume.get_or_none(id=resume_id)
 
@@ -215,11 +224,12 @@ async def update_resume(resume_id: int, resume_update: schemas.ResumeUpdate, cur
         setattr(resume, field, value)
 
     await resume.save()
+    await bump_versions(resume_entities([resume.student_crm_id]))
     return resume
 
 
 @router.post("/resumes/{resume_id}/verify/", response_model=schemas.ResumeResponse)
-async def verify_resume(resume_id: int, current_tutor: models.TutorProfile = Depends(auth.get_current_senior_tutor)):
+async def verify_resume(resume_id: int, current_tutor: schemas.TutorIdentity = Depends(auth.get_current_senior_identity)):
     """Verify a specific resume (requires senior tutor)."""
     resume = await models.Resume.get_or_none(id=resume_id)
 
@@ -229,26 +239,37 @@ async def verify_resume(resume_id: int, current_tutor: models.TutorProfile = Dep
     # Update the resume verification status
     resume.is_verified = True
     await resume.save()
+    await bump_versions(resume_entities([resume.student_crm_id]))
     return resume
 
 
 @router.get("/resumes/unverified/", response_model=List[schemas.ResumeResponse])
-async def get_unverified_resumes(current_tutor: models.TutorProfile = Depends(auth.get_current_active_tutor)):
-    """Get all unverified resumes."""
-    resumes = await models.Resume.filter(is_verified=False)
-    return resumes
+async def get_unverified_resumes(
+    branch: Optional[str] = None,
+    created_from: Optional[date] = None,
+    created_to: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.page_size_default, ge=1, le=settings.page_size_max),
+    current_tutor: schemas.TutorIdentity = Depends(auth.get_current_active_identity),
+):
+    """Get unverified resumes, newest first. The next page cursor is returned in the X-Next-Cursor header."""
+    queryset = filter_student_records(models.Resume.filter(is_verified=False), branch=branch,
+                                      created_from=created_from, created_to=created_to)
+    resumes, next_cursor = await paginate(queryset, cursor, limit, fields=schemas.RESUME_ROW_FIELDS)
+    return json_rows_response(schemas.RESUME_ROWS, resumes, next_cursor)
 
 
 @router.post("/resumes/", response_model=schemas.ResumeResponse)
-async def create_resume(resume: schemas.ResumeCreate, current_tutor: models.TutorProfile = Depends(auth.get_current_active_tutor)):
+async def create_resume(resume: schemas.ResumeCreate, current_tutor: schemas.TutorIdentity = Depends(auth.get_current_active_identity)):
     """Create a new resume."""
     db_resume = await models.Resume.create(student_crm_id=resume.student_crm_id, content=resume.content, is_verified=resume.is_verified)
+    await bump_versions(resume_entities([db_resume.student_crm_id]))
 
     return db_resume
 
 
 @router.delete("/resumes/{resume_id}/")
-async def delete_resume(resume_id: int, current_tutor: models.TutorProfile = Depends(auth.get_current_active_tutor)):
+async def delete_resume(resume_id: int, current_tutor: schemas.TutorIdentity = Depends(auth.get_current_active_identity)):
     """Delete a specific resume."""
     resume = await models.Resume.get_or_none(id=resume_id)
 
@@ -256,15 +277,85 @@ async def delete_resume(resume_id: int, current_tutor: models.TutorProfile = Dep
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Resume not found")
 
     await resume.delete()
+    await bump_versions(resume_entities([resume.student_crm_id]))
     return {"message": "Resume deleted successfully"}
 
 
 # Review endpoints
 @router.get("/reviews/{student_crm_id}/", response_model=List[schemas.ParentReviewResponse])
-async def get_parent_reviews(student_crm_id: str, current_tutor: models.TutorProfile = Depends(auth.get_current_active_tutor)):
-    """Get parent reviews for a specific student."""
-    reviews = await models.ParentReview.filter(student_crm_id=student_crm_id)
-    return reviews
+async def get_parent_reviews(
+    student_crm_id: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.page_size_default, ge=1, le=settings.page_size_max),
+    current_tutor: schemas.TutorIdentity = Depends(auth.get_current_active_identity),
+):
+    """Get parent reviews for a specific student, newest first. The next page cursor is returned in the X-Next-Cursor header."""
+    reviews, next_cursor = await paginate(models.ParentReview.filter(student_crm_id=student_crm_id), cursor, limit,
+                                          fields=schemas.PARENT_REVIEW_ROW_FIELDS)
+    return json_rows_response(schemas.PARENT_REVIEW_ROWS, reviews, next_cursor)
+
+
+@router.post("/students/dossiers/", response_model=List[schemas.StudentDossier])
+async def get_student_dossiers(request: schemas.StudentDossierRequest,
+                               current_tutor: schemas.TutorIdentity = Depends(auth.get_current_active_identity)):
+    """Resumes and parent reviews of several students at once, e.g. a whole group roster."""
+    if request.group_id is not None:
+        if not await models.Group.exists(id=request.group_id):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Group not found")
+        student_ids = await models.Student.filter(group_id=request.group_id).order_by("student_name").values_list(
+            "student_crm_id", flat=True)
+        student_crm_ids = [str(student_id) for student_id in student_ids]
+    elif request.student_crm_ids:
+        student_crm_ids = list(dict.fromkeys(request.student_crm_ids))
+    else:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Pass student_crm_ids or group_id")
+
+    if len(student_crm_ids) > settings.dossier_max_students:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"At most {settings.dossier_max_students} students per request")
+    return await load_student_dossiers(student_crm_ids, request.fields)
+
+
+# Search endpoints
+@router.get("/search/", response_model=List[schemas.SearchResult])
+async def search_content(
+    q: str = Query(..., min_length=2, max_length=200),
+    kind: Literal["all", "resumes", "reviews"] = "all",
+    limit: int = Query(settings.page_size_default, ge=1, le=settings.page_size_max),
+    current_tutor: schemas.TutorIdentity = Depends(auth.get_current_senior_identity),
+):
+    """Full-text search over resume and parent review content, best matches first (requires senior tutor)."""
+    kinds = list(SEARCH_TABLES) if kind == "all" else [kind]
+    return await search_records(q, kinds, limit)
+
+
+# Export endpoints
+@router.get("/exports/{kind}/")
+async def export_records(
+    kind: Literal["resumes", "reviews"],
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    branch: Optional[str] = None,
+    verified: Optional[bool] = None,
+    updated_since: Optional[datetime] = None,
+    gzip: bool = False,
+    current_tutor: schemas.TutorIdentity = Depends(auth.get_current_senior_identity),
+):
+    """
+    Stream every resume or parent review matching the filters as NDJSON or CSV (requires senior tutor).
+    Rows are read in chunks, so the export size doesn't affect memory use; gzip=true compresses the stream.
+    """
+    model = models.Resume if kind == "resumes" else models.ParentReview
+    if verified is not None and kind != "resumes":
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Only resumes can be filtered by verified")
+    queryset = filter_student_records(model.all(), branch=branch, verified=verified, updated_since=updated_since)
+
+    body = iter_export(queryset, EXPORT_FIELDS[kind], export_format)
+    filename = f"{kind}-{timezone.now():%Y%m%d-%H%M%S}.{export_format}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if gzip:
+        body = gzip_stream(body)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type=EXPORT_MEDIA_TYPES[export_format], headers=headers)
 
 
 # Tutor endpoints (additional)
@@ -293,7 +384,7 @@ async def get_tutor_detail(current_tutor: models.TutorProfile = Depends(auth.get
 
 # Tutor Management Endpoints (for senior tutors)
 @router.post("/tutors/{tutor_id}/promote-to-senior/", response_model=schemas.TutorProfileResponse)
-async def promote_to_senior(tutor_id: int, current_senior_tutor: models.TutorProfile = Depends(auth.get_current_senior_tutor)):
+async def promote_to_senior(tutor_id: int, current_senior_tutor: schemas.TutorIdentity = Depends(auth.get_current_senior_identity)):
     """Promote a tutor to senior status (requires an existing senior tutor)."""
     tutor = await models.TutorProfile.get_or_none(id=tutor_id)
     if not tutor:
@@ -301,15 +392,19 @@ async def promote_to_senior(tutor_id: int, current_senior_tutor: models.TutorPro
 
     tutor.is_senior = True
     await tutor.save()
+    await auth.invalidate_tutor_identity(tutor.id)
     return tutor
 
 
 # Client endpoints
 @router.get("/clients/detail/")
-async def get_client_detail(student_crm_id: str, current_tutor: models.TutorProfile = Depends(auth.get_current_active_tutor)):
-    # Integrate with CRM to get client details
+async def get_client_detail(student_crm_id: str, current_tutor: schemas.TutorIdentity = Depends(auth.get_current_active_identity)):
+    # Integrate with CRM to get client details (cached per branch and client)
     if current_tutor.branch:
-        client_data = await get_client_data_from_crm(student_crm_id, current_tutor.branch)
+        client_data = await client_cache.get_or_load(
+            f"{current_tutor.branch}:{student_crm_id}",
+            lambda: get_client_data_from_crm(student_crm_id, current_tutor.branch),
+        )
         if client_data:
             return client_data
 
@@ -317,120 +412,57 @@ async def get_client_detail(student_crm_id: str, current_tutor: models.TutorProf
     return {"client_detail": {}}
 
 
+def _sync_job_params(job_type: str, mode: str, tutor: schemas.TutorIdentity) -> dict:
+    """Job params of a sync requested by a tutor, the same whichever endpoint queued it."""
+    params = {"mode": mode}
+    if job_type == "students_sync":
+        # Fallback branch for groups without branch_ids
+        params["branch"] = tutor.branch
+    return params
+
+
 # Group endpoints
 @router.get("/groups/sync/", response_model=dict)
-async def sync_all_groups(current_tutor: models.TutorProfile = Depends(auth.get_current_senior_tutor)):
+async def sync_all_groups(mode: Literal["auto", "delta", "full"] = "auto", current_tutor: schemas.TutorIdentity = Depends(auth.get_current_senior_identity)):
     """
-    Fetch all groups from CRM and synchronize them with the database
-    Available only to senior tutors
+    Queue a background sync of all groups from CRM and return its job id right away
+    mode: "delta" fetches only groups changed since the last sync, "full" also deletes groups removed from CRM,
+    "auto" picks "full" when the last full sync is older than settings.sync_full_reconcile_hours
+    Poll /jobs/{job_id}/ for progress. Available only to senior tutors
     """
-    try:
-        groups_data = await get_all_groups()
-        if not groups_data:
-            return {"message": "No groups found in CRM", "synced_count": 0}
-
-        synced_count = 0
-        for group_data in groups_data:
-            # Extract fields from CRM data
-            crm_group_id = group_data.get("id")
-            branch_ids = group_data.get("branch_ids")
-            teacher_ids = group_data.get("teacher_ids")
-            name = group_data.get("name")
-            level_id = group_data.get("level_id")
-            status_id = group_data.get("status_id")
-            company_id = group_data.get("company_id")
-            streaming_id = group_data.get("streaming_id")
-            limit = group_data.get("limit")
-            note = group_data.get("note")
-            b_date = group_data.get("b_date")
-            e_date = group_data.get("e_date")
-            created_at = group_data.get("created_at")
-            updated_at = group_data.get("updated_at")
-            custom_aerodromnaya = group_data.get("custom_aerodromnaya")
-
-            # Try to get existing group or create new one
-            group, created = await models.Group.get_or_create(
-                crm_group_id=crm_group_id,
-                defaults={
-                    "branch_ids": branch_ids,
-                    "teacher_ids": teacher_ids,
-                    "name": name,
-                    "level_id": level_id,
-                    "status_id": status_id,
-                    "company_id": company_id,
-                    "streaming_id": streaming_id,
-                    "limit": limit,
-                    "note": note,
-                    "b_date": b_date,
-                    "e_date": e_date,
-                    "created_at": created_at,
-                    "updated_at": updated_at,
-                    "custom_aerodromnaya": custom_aerodromnaya,
-                },
-            )
-
-            # If the group already existed, update its fields
-            if not created:
-                group.branch_ids = branch_ids
-                group.teacher_ids = teacher_ids
-                group.name = name
-                group.level_id = level_id
-                group.status_id = status_id
-                group.company_id = company_id
-                group.streaming_id = streaming_id
-                group.limit = limit
-                group.note = note
-                group.b_date = b_date
-                group.e_date = e_date
-                group.created_at = created_at
-                group.updated_at = updated_at
-                group.custom_aerodromnaya = custom_aerodromnaya
-                await group.save()
-
-            synced_count += 1
-
-        return {"message": f"Successfully synchronized {synced_count} groups", "synced_count": synced_count}
-
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"An error occurred while synchronizing groups: {str(e)}")
+    job, created = await enqueue_job("groups_sync", _sync_job_params("groups_sync", mode, current_tutor), requested_by=current_tutor.id)
+    message = "Groups synchronization queued" if created else "Groups synchronization is already in progress"
+    return {"message": message, "job_id": job.id, "status": job.status}
 
 
 @router.get("/students/sync/", response_model=dict)
-async def sync_students_with_groups(current_tutor: models.TutorProfile = Depends(auth.get_current_senior_tutor)):
+async def sync_students_with_groups(mode: Literal["auto", "delta", "full"] = "auto", current_tutor: schemas.TutorIdentity = Depends(auth.get_current_senior_identity)):
     """
-    Fetch all students from CRM for each group and synchronize them with the database
-    Available only to senior tutors
+    Queue a background sync of the students of every group from CRM and return its job id right away
+    Each group is read from its own CRM branches; the tutor branch is used only for groups without branches
+    mode: "delta" refreshes only groups changed since the last students sync, "full" refreshes all groups
+    Poll /jobs/{job_id}/ for progress. Available only to senior tutors
     """
-    try:
-        # Get all groups from the database
-        groups = await models.Group.all()
-
-        if not groups:
-            return {"message": "No groups found in database", "synced_count": 0}
-
-        total_synced = 0
+    job, created = await enqueue_job("students_sync", _sync_job_params("students_sync", mode, current_tutor), requested_by=current_tutor.id)
+    message = "Students synchronization queued" if created else "Students synchronization is already in progress"
+    return {"message": message, "job_id": job.id, "status": job.status}
 
-        for group in groups:
-            # Get students for this group from CRM
-            group_clients = await get_group_clients_from_crm(str(group.crm_group_id), current_tutor.branch)
 
-            if group_clients:
-                for client in group_clients:
-                    customer_id = client.get("customer_id")
-                    client_name = client.get("client_name")
+# Background job endpoints
+@router.post("/jobs/{job_type}/", response_model=schemas.SyncJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def enqueue_sync_job(job_type: str, mode: Literal["auto", "delta", "full"] = "auto", current_tutor: schemas.TutorIdentity = Depends(auth.get_current_senior_identity)):
+    """Queue a background job (requires senior tutor). Returns the already active job of the same type if there is one."""
+    if job_type not in JOB_HANDLERS:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown job type")
 
-                    if customer_id and client_name:
-                        # Create or update student record with group relationship
-                        student, created = await models.Student.get_or_create(student_crm_id=customer_id, defaults={"student_name": client_name, "group_id": group.id})
+    job, _ = await enqueue_job(job_type, _sync_job_params(job_type, mode, current_tutor), requested_by=current_tutor.id)
+    return job
 
-                        # If student already exists, update the group relationship
-                        if not created and student.group_id != group.id:
-                            student.group_id = group.id
-                            await student.save()
 
-                        total_synced += 1
-
-        return {"message": f"Successfully synchronized {total_synced} students", "synced_count": total_synced}
-
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"An error occurred while synchronizing students: {str(e)}")
+@router.get("/jobs/{job_id}/", response_model=schemas.SyncJobResponse)
+async def get_sync_job(job_id: int, current_tutor: schemas.TutorIdentity = Depends(auth.get_current_senior_identity)):
+    """Get the status and progress of a background job (requires senior tutor)."""
+    job = await models.SyncJob.get_or_none(id=job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
@@ -1,5 +1,6 @@
 from tortoise import Tortoise
 from config import settings
+from search import ensure_search_index
 
 TORTOISE_CONFIG = {
     "connections": {"default": settings.database_url},
@@ -15,6 +16,7 @@ TORTOISE_CONFIG = {
 async def init_db():
     await Tortoise.init(config=TORTOISE_CONFIG)
     await Tortoise.generate_schemas()
+    await ensure_search_index()
 
 
 async def close_db():
@@ -1,9 +1,11 @@
+import time
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from tortoise.expressions import F
 import models
 import schemas
 from config import settings
@@ -45,14 +47,27 @@ async def authenticate_tutor(phone_number: str) -> Optional[models.TutorProfile]
     return tutor
 
 
+def tutor_token_claims(tutor: models.TutorProfile) -> dict:
+    """Claims that let endpoints identify and authorize the tutor without a DB lookup."""
+    return {
+        "sub": tutor.phone_number,
+        "tid": tutor.id,
+        "crm": tutor.tutor_crm_id,
+        "branch": tutor.branch,
+        "senior": tutor.is_senior,
+        "ver": tutor.token_version,
+    }
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create an access token with expiration."""
     to_encode = data.copy()
+    now = datetime.utcnow()
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
-    to_encode.update({"exp": expire})
+        expire = now + timedelta(minutes=settings.access_token_expire_minutes)
+    to_encode.update({"exp": expire, "iat": now})
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
@@ -80,6 +95,91 @@ async def get_current_tutor(
     return tutor
 
 
+# Tutors reloaded from the DB: tutor id -> (identity, token_version, expires at), or None when the tutor is gone
+_identity_cache: Dict[int, Tuple[Optional[schemas.TutorIdentity], int, float]] = {}
+
+
+def _identity_from_tutor(tutor: models.TutorProfile) -> schemas.TutorIdentity:
+    return schemas.TutorIdentity(id=tutor.id, phone_number=tutor.phone_number, tutor_crm_id=tutor.tutor_crm_id,
+                                 branch=tutor.branch, is_senior=tutor.is_senior)
+
+
+async def invalidate_tutor_identity(tutor_id: int):
+    """
+    Call after a tutor's permissions or identity fields change (promotion, admin edits, deletion).
+    Bumps the tutor's token_version, so tokens issued before are no longer trusted: right away in
+    this process, and in other processes once their cached entry expires (identity_cache_ttl_seconds).
+    """
+    await models.TutorProfile.filter(id=tutor_id).update(token_version=F("token_version") + 1)
+    _identity_cache.pop(tutor_id, None)
+
+
+async def _load_identity(tutor_id: int) -> Tuple[Optional[schemas.TutorIdentity], int]:
+    cached = _identity_cache.get(tutor_id)
+    if cached and cached[2] > time.time():
+        return cached[0], cached[1]
+    tutor = await models.TutorProfile.get_or_none(id=tutor_id)
+    identity, token_version = (_identity_from_tutor(tutor), tutor.token_version) if tutor else (None, -1)
+    _identity_cache[tutor_id] = (identity, token_version, time.time() + settings.identity_cache_ttl_seconds)
+    return identity, token_version
+
+
+async def get_current_identity(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> schemas.TutorIdentity:
+    """
+    Get the current tutor's identity from the token claims. The tutor row is read at most once per
+    identity_cache_ttl_seconds per process; tokens issued before the tutor's last change (an older
+    token_version) get the identity stored in the DB instead of their claims. So a demotion or
+    deletion reaches every process within identity_cache_ttl_seconds.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        payload = jwt.decode(credentials.credentials, settings.secret_key, algorithms=[settings.algorithm])
+    except JWTError:
+        raise credentials_exception
+    phone_number: str = payload.get("sub")
+    tutor_id = payload.get("tid")
+    if phone_number is None:
+        raise credentials_exception
+
+    if tutor_id is None:
+        # Token issued before claims were added
+        tutor = await get_tutor_by_phone_number(phone_number=phone_number)
+        if tutor is None:
+            raise credentials_exception
+        return _identity_from_tutor(tutor)
+
+    identity, token_version = await _load_identity(tutor_id)
+    if identity is None or identity.phone_number != phone_number:
+        raise credentials_exception
+    if payload.get("ver", 0) == token_version:
+        return schemas.TutorIdentity(id=tutor_id, phone_number=phone_number, tutor_crm_id=payload.get("crm"),
+                                     branch=payload.get("branch"), is_senior=payload.get("senior", False))
+    return identity
+
+
+async def get_current_active_identity(current_tutor: schemas.TutorIdentity = Depends(get_current_identity)) -> schemas.TutorIdentity:
+    """Get the current active tutor's identity."""
+    return current_tutor
+
+
+async def get_current_senior_identity(
+    current_tutor: schemas.TutorIdentity = Depends(get_current_identity)
+) -> schemas.TutorIdentity:
+    """Get the current senior tutor's identity (for operations requiring senior tutor privileges)."""
+    if not current_tutor.is_senior:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Operation requires senior tutor privileges"
+        )
+    return current_tutor
+
+
 async def get_current_active_tutor(current_tutor: models.TutorProfile = Depends(get_current_tutor)) -> models.TutorProfile:
     """Get the current active tutor."""
     # In a real application, you might want to check if the tutor is active
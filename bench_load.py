@@ -0,0 +1,405 @@
+"""
+Load and latency benchmark of the API against a local AlfaCRM stand-in (fake_crm.py).
+
+    python bench_load.py                                      # defaults: concurrency 1,10,50, 200 requests each
+    python bench_load.py --concurrency 1,20 --requests 500 --crm-latency-ms 150 --crm-error-rate 0.02
+    python bench_load.py --compare bench_results/load-<old>.json
+
+Starts the fake CRM and the API (uvicorn, fresh SQLite database unless --database-url is
+given) as subprocesses, registers tutors from the fake CRM, runs full and delta syncs, then
+drives each endpoint scenario at each concurrency level. For every run it records throughput,
+latency percentiles, errors, DB queries per request and CRM calls, and writes everything to a
+JSON file (bench_results/ by default) that --compare can diff against a later run.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import httpx
+import db_monitor
+import fake_crm
+
+API_PREFIX = "/api/v1"
+BENCH_STATS_PATH = "/_bench/stats"
+REGISTER_ATTEMPTS = 10
+
+# Builds request number n of a scenario: (method, path, spec). spec may hold "params", "json" and a
+# "token" (the senior tutor's token is used otherwise)
+Scenario = Callable[[Dict[str, Any], int], Tuple[str, str, Dict[str, Any]]]
+
+
+def _tutor(state: Dict[str, Any], n: int) -> Dict[str, Any]:
+    return state["tutors"][n % len(state["tutors"])]
+
+
+def _student(state: Dict[str, Any], n: int) -> int:
+    return state["student_ids"][(n * 7919) % len(state["student_ids"])]
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "login": lambda state, n: ("POST", "/tutors/login/", {"json": {"phone_number": _tutor(state, n)["phone"]}}),
+    "tutor_groups": lambda state, n: ("GET", "/tutors/groups/", {"token": _tutor(state, n)["token"]}),
+    "group_clients": lambda state, n: ("GET", "/groups/clients/", {
+        "params": {"group_id": state["group_ids"][n % len(state["group_ids"])]}}),
+    "group_roster": lambda state, n: ("GET", "/groups/roster/", {
+        "params": {"group_id": state["group_ids"][n % len(state["group_ids"])]}}),
+    "resume_create": lambda state, n: ("POST", "/resumes/", {
+        "json": {"student_crm_id": str(_student(state, n)), "content": f"Резюме {n}: Scratch, робототехника, Python. " * 5}}),
+    "resume_list": lambda state, n: ("GET", "/resumes/client/", {"params": {"student_crm_id": str(_student(state, n))}}),
+    "resume_update": lambda state, n: ("POST", f"/resumes/{state['resume_ids'][n % len(state['resume_ids'])]}/", {
+        "json": {"content": f"Обновлено {n}"}}),
+    "resume_unverified": lambda state, n: ("GET", "/resumes/unverified/", {}),
+    "client_detail": lambda state, n: ("GET", "/clients/detail/", {"params": {"student_crm_id": str(_student(state, n))}}),
+}
+
+
+def percentile(sorted_values: List[float], p: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(p / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize_latencies(latencies: List[float]) -> Dict[str, Optional[float]]:
+    values = sorted(latency * 1000 for latency in latencies)
+    return {
+        "mean_ms": round(sum(values) / len(values), 3) if values else None,
+        "p50_ms": percentile(values, 50),
+        "p95_ms": percentile(values, 95),
+        "p99_ms": percentile(values, 99),
+        "max_ms": values[-1] if values else None,
+    }
+
+
+def _diff_counts(before: Dict[str, int], after: Dict[str, int]) -> Dict[str, int]:
+    return {key: after.get(key, 0) - before.get(key, 0) for key in after if after.get(key, 0) - before.get(key, 0)}
+
+
+class Bench:
+    def __init__(self, api_url: str, crm_url: str):
+        self.api_url = api_url
+        self.crm_url = crm_url
+        self.state: Dict[str, Any] = {}
+
+    async def counters(self, client: httpx.AsyncClient) -> Dict[str, Any]:
+        db = (await client.get(f"{self.api_url}{BENCH_STATS_PATH}")).json()
+        crm = (await client.get(f"{self.crm_url}/_stats")).json()
+        return {"db_queries": db["db_queries"], "crm_calls": crm["calls"], "crm_errors": crm["errors"]}
+
+    def counters_delta(self, before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+        crm_calls = _diff_counts(before["crm_calls"], after["crm_calls"])
+        return {
+            "db_queries": after["db_queries"] - before["db_queries"],
+            "crm_calls": crm_calls,
+            "crm_calls_total": sum(crm_calls.values()),
+            "crm_errors": after["crm_errors"] - before["crm_errors"],
+        }
+
+    async def request(self, client: httpx.AsyncClient, method: str, path: str, token: Optional[str] = None,
+                      **kwargs) -> httpx.Response:
+        headers = {"Authorization": f"Bearer {token or self.state['senior_token']}"} if token is not False else {}
+        return await client.request(method, f"{self.api_url}{API_PREFIX}{path}", headers=headers, **kwargs)
+
+    async def setup(self, client: httpx.AsyncClient, options: fake_crm.FakeCRMOptions, tutors: int, database_url: str):
+        """Register and log in tutors from the fake CRM; the first one is made senior directly in the database."""
+        phones = [(branch, fake_crm.teacher_phone(branch, index))
+                  for index in range(options.teachers_per_branch) for branch in range(1, options.branches + 1)][:tutors]
+        for branch, phone in phones:
+            # Retried because the fake CRM may be configured to fail some calls
+            for _ in range(REGISTER_ATTEMPTS):
+                response = await self.request(client, "POST", "/tutors/register/", token=False,
+                                              json={"phone_number": phone, "tutor_branch_id": str(branch)})
+                if response.status_code in (200, 400):
+                    break
+            else:
+                raise RuntimeError(f"Registering {phone} failed: {response.status_code} {response.text}")
+        await run_in_database(database_url, lambda models: models.TutorProfile.filter(phone_number=phones[0][1]).update(is_senior=True))
+
+        self.state["tutors"] = []
+        for _, phone in phones:
+            response = await self.request(client, "POST", "/tutors/login/", token=False, json={"phone_number": phone})
+            response.raise_for_status()
+            self.state["tutors"].append({"phone": phone, "token": response.json()["access_token"]})
+        self.state["senior_token"] = self.state["tutors"][0]["token"]
+
+    async def run_sync(self, client: httpx.AsyncClient, entity: str, mode: str) -> Dict[str, Any]:
+        """Queue a sync job through the API and wait for it to finish."""
+        before = await self.counters(client)
+        started = time.perf_counter()
+        response = await self.request(client, "GET", f"/{entity}/sync/", params={"mode": mode})
+        response.raise_for_status()
+        job_id = response.json()["job_id"]
+        polls = 0
+        while True:
+            polls += 1
+            job = (await self.request(client, "GET", f"/jobs/{job_id}/")).json()
+            if job["status"] in ("succeeded", "failed"):
+                break
+            await asyncio.sleep(0.05)
+        elapsed = time.perf_counter() - started
+        # db_queries includes the job polls (one query each)
+        return {"name": f"sync_{entity}_{mode}", "status": job["status"], "seconds": round(elapsed, 3), "polls": polls,
+                "result": job.get("result"), "error": job.get("error"),
+                **self.counters_delta(before, await self.counters(client))}
+
+    async def load_state(self, database_url: str):
+        async def read(models):
+            self.state["group_ids"] = await models.Group.all().order_by("id").values_list("id", flat=True)
+            self.state["student_ids"] = await models.Student.all().order_by("id").values_list("student_crm_id", flat=True)
+        await run_in_database(database_url, read)
+        if not self.state["group_ids"] or not self.state["student_ids"]:
+            raise RuntimeError("The syncs did not load any groups or students")
+
+    async def run_scenario(self, client: httpx.AsyncClient, name: str, concurrency: int, requests: int) -> Dict[str, Any]:
+        build = SCENARIOS[name]
+        latencies: List[float] = []
+        statuses: Dict[str, int] = {}
+        next_request = iter(range(requests))
+        created_ids = []
+
+        async def worker():
+            for n in next_request:
+                method, path, spec = build(self.state, n)
+                started = time.perf_counter()
+                try:
+                    response = await self.request(client, method, path, token=spec.get("token"),
+                                                  params=spec.get("params"), json=spec.get("json"))
+                    status = str(response.status_code)
+                    if name == "resume_create" and response.status_code == 200:
+                        created_ids.append(response.json()["id"])
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                latencies.append(time.perf_counter() - started)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        before = await self.counters(client)
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        counters = self.counters_delta(before, await self.counters(client))
+        if created_ids:
+            self.state.setdefault("resume_ids", []).extend(created_ids)
+
+        ok = sum(count for status, count in statuses.items() if status.startswith("2"))
+        return {
+            "name": name,
+            "concurrency": concurrency,
+            "requests": requests,
+            "ok": ok,
+            "errors": requests - ok,
+            "statuses": statuses,
+            "seconds": round(elapsed, 3),
+            "throughput_rps": round(requests / elapsed, 2) if elapsed else None,
+            **summarize_latencies(latencies),
+            "db_queries_per_request": round(counters["db_queries"] / requests, 2),
+            **counters,
+        }
+
+
+async def run_in_database(database_url: str, action: Callable[[Any], Awaitable[Any]]):
+    """Run action(models) with a Tortoise connection of the bench process to the API's database."""
+    from tortoise import Tortoise
+    import models
+
+    await Tortoise.init(db_url=database_url, modules={"models": ["models"]})
+    try:
+        return await action(models)
+    finally:
+        await Tortoise.close_connections()
+
+
+def count_db_queries(stats: Dict[str, int]):
+    """Count the queries sent by every Tortoise client class (transactions included) in stats["db_queries"]."""
+
+    def count(query, values, seconds):
+        stats["db_queries"] += 1
+
+    db_monitor.add_query_observer(count)
+
+
+def serve_api(port: int):
+    """Run the API with query counting and the stats endpoint the benchmark reads."""
+    import uvicorn
+
+    stats = {"db_queries": 0}
+    count_db_queries(stats)
+    from main import app
+
+    @app.get(BENCH_STATS_PATH, include_in_schema=False)
+    async def bench_stats():
+        return stats
+
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def start_process(args: List[str], env: Optional[Dict[str, str]] = None) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, *args], env={**os.environ, **(env or {})}, cwd=os.path.dirname(os.path.abspath(__file__)))
+
+
+async def wait_until_up(url: str, process: subprocess.Popen, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"{url} exited with code {process.returncode}")
+            try:
+                if (await client.get(url)).status_code < 500:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up in {timeout:.0f}s")
+
+
+def git_revision() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout.strip())
+        return {"commit": commit, "dirty": dirty}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+def print_report(results: Dict[str, Any]):
+    for sync in results["sync"]:
+        print(f"{sync['name']:<24} {sync['status']:<10} {sync['seconds']:8.2f}s  db={sync['db_queries']:<6} crm={sync['crm_calls_total']}")
+    print(f"\n{'scenario':<18} {'conc':>4} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'err':>5} {'db/req':>7} {'crm':>6}")
+    for run in results["load"]:
+        print(f"{run['name']:<18} {run['concurrency']:>4} {run['throughput_rps']:>8.1f} {run['p50_ms']:>8.1f} "
+              f"{run['p95_ms']:>8.1f} {run['p99_ms']:>8.1f} {run['errors']:>5} {run['db_queries_per_request']:>7.2f} "
+              f"{run['crm_calls_total']:>6}")
+
+
+def print_comparison(results: Dict[str, Any], baseline: Dict[str, Any]):
+    """Relative change of throughput and p95 latency against an earlier result file."""
+    previous = {(run["name"], run["concurrency"]): run for run in baseline["load"]}
+    print(f"\nCompared with {baseline['meta']['git'].get('commit') or '?'} ({baseline['meta']['started_at']})")
+    print(f"{'scenario':<18} {'conc':>4} {'rps':>9} {'p95':>9} {'db/req':>9}")
+    for run in results["load"]:
+        old = previous.get((run["name"], run["concurrency"]))
+        if old is None:
+            continue
+
+        def change(key):
+            return f"{(run[key] - old[key]) / old[key] * 100:+8.1f}%" if old.get(key) else "        -"
+
+        print(f"{run['name']:<18} {run['concurrency']:>4} {change('throughput_rps')} {change('p95_ms')} {change('db_queries_per_request')}")
+
+
+async def benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    options = fake_crm.options_from_arguments(args, prefix="crm-")
+    crm_url = f"http://127.0.0.1:{args.crm_port}"
+    api_url = f"http://127.0.0.1:{args.api_port}"
+    database_url = args.database_url or f"sqlite://{tempfile.mkdtemp(prefix='bench_load_')}/bench.sqlite3"
+
+    crm_args = ["fake_crm.py", "--port", str(args.crm_port)]
+    for field in fake_crm.FakeCRMOptions.__dataclass_fields__:
+        crm_args += [f"--{field.replace('_', '-')}", str(getattr(options, field))]
+    api_env = {
+        "DATABASE_URL": database_url,
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "bench-secret"),
+        "CRM_API_URL": crm_url,
+        "CRM_EMAIL": "bench@example.com",
+        "CRM_API_KEY": "bench",
+        "CRM_BRANCH_IDS": json.dumps(list(range(1, options.branches + 1))),
+        "JOBS_ENABLED": "true",
+        "SYNC_GROUPS_CRON": "",
+        "SYNC_STUDENTS_CRON": "",
+    }
+    processes = [start_process(crm_args)]
+    try:
+        await wait_until_up(f"{crm_url}/_stats", processes[0])
+        processes.append(start_process(["bench_load.py", "--serve-api", str(args.api_port)], api_env))
+        await wait_until_up(f"{api_url}{API_PREFIX}/health/", processes[1])
+
+        started_at = datetime.now(timezone.utc).isoformat()
+        bench = Bench(api_url, crm_url)
+        limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+        async with httpx.AsyncClient(limits=limits, timeout=args.timeout) as client:
+            await bench.setup(client, options, args.tutors, database_url)
+            sync = []
+            for mode in ("full", "delta"):
+                sync.append(await bench.run_sync(client, "groups", mode))
+                sync.append(await bench.run_sync(client, "students", mode))
+            await bench.load_state(database_url)
+
+            load = []
+            for concurrency in args.concurrency:
+                for name in args.scenarios:
+                    if name == "resume_update" and not bench.state.get("resume_ids"):
+                        continue
+                    result = await bench.run_scenario(client, name, concurrency, args.requests)
+                    load.append(result)
+                    print(f"{name} x{concurrency}: {result['throughput_rps']} rps, p95 {result['p95_ms']:.1f} ms", file=sys.stderr)
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+
+    return {
+        "meta": {
+            "started_at": started_at,
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": database_url.split(":", 1)[0],
+            "requests_per_run": args.requests,
+            "concurrency": args.concurrency,
+            "tutors": args.tutors,
+            "crm": vars(options),
+        },
+        "sync": sync,
+        "load": load,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=lambda value: [int(item) for item in value.split(",")], default=[1, 10, 50])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario and concurrency level")
+    parser.add_argument("--scenarios", type=lambda value: value.split(","), default=list(SCENARIOS))
+    parser.add_argument("--tutors", type=int, default=20, help="Tutors registered from the fake CRM")
+    parser.add_argument("--database-url", help="Database of the API under test (a fresh SQLite file by default)")
+    parser.add_argument("--api-port", type=int, default=8102)
+    parser.add_argument("--crm-port", type=int, default=8101)
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds")
+    parser.add_argument("--output", help="Result file (default: bench_results/load-<time>-<commit>.json)")
+    parser.add_argument("--compare", help="Earlier result file to compare with")
+    parser.add_argument("--serve-api", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    fake_crm.add_options_arguments(parser, prefix="crm-")
+    args = parser.parse_args()
+
+    if args.serve_api:
+        serve_api(args.serve_api)
+        return
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    results = asyncio.run(benchmark(args))
+    output = args.output
+    if not output:
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join("bench_results", f"load-{stamp}-{(results['meta']['git']['commit'] or 'nogit')[:8]}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+    print_report(results)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print_comparison(results, json.load(f))
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
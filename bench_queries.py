@@ -0,0 +1,253 @@
+"""
+Time the ORM queries behind the API and admin endpoints against the configured database.
+
+    python generate_dataset.py --scale 10 && python bench_queries.py
+    DATABASE_URL=postgres://... python bench_queries.py --repeat 50
+    python bench_queries.py --compare bench_results/queries-<old>.json
+
+Meant for a database filled by generate_dataset.py: the samples (largest group, heaviest
+student, largest branch, tutor with the most groups) are picked from the data, so the numbers
+show the worst realistic case of each query rather than an empty-table best case. Every query
+runs a few times to warm up, then --repeat times; the result is printed and written as JSON
+(bench_results/ by default) that --compare can diff against a later run.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+from tortoise import Tortoise
+from tortoise.functions import Count
+import auth
+import models
+import schemas
+from app import TORTOISE_CONFIG
+from bench_load import git_revision, percentile
+from conditional import GROUPS, STUDENTS, get_versions, resume_entities
+from dossiers import load_group_roster, load_student_dossiers
+from exports import EXPORT_FIELDS, iter_record_chunks
+from pagination import filter_student_records, paginate
+from search import SEARCH_TABLES, search_records
+from sync import GROUP_FIELDS
+
+PAGE_SIZE = 20
+EXPORT_CHUNKS = 10
+
+
+async def pick_samples() -> Dict[str, Any]:
+    """The heaviest realistic arguments for every query, taken from the data."""
+    tutor = await models.TutorProfile.all().order_by("id").first()
+    group_sizes = Counter(await models.Student.all().values_list("group_id", flat=True))
+    tutor_groups = Counter(await models.GroupTeacher.all().values_list("tutor_crm_id", flat=True))
+    branch_groups = Counter(await models.GroupBranch.all().values_list("branch", flat=True))
+    heaviest = await (models.Resume.annotate(count=Count("id")).group_by("student_crm_id").order_by("-count")
+                      .limit(1).values("student_crm_id", "count"))
+    if tutor is None or not group_sizes or not heaviest:
+        raise SystemExit("The database has no tutors, students or resumes; fill it with generate_dataset.py first")
+
+    group_id, group_size = group_sizes.most_common(1)[0]
+    tutor_crm_id, group_count = tutor_groups.most_common(1)[0] if tutor_groups else (None, 0)
+    branch, branch_size = branch_groups.most_common(1)[0] if branch_groups else (None, 0)
+    samples = {
+        "phone_number": tutor.phone_number,
+        "tutor_crm_id": tutor_crm_id, "tutor_group_count": group_count,
+        "group_id": group_id, "group_size": group_size,
+        "branch": branch, "branch_group_count": branch_size,
+        "student_crm_id": heaviest[0]["student_crm_id"], "student_resume_count": heaviest[0]["count"],
+        "search_word": "робот",
+    }
+    # Cursors of the first pages, to time the second ones
+    _, samples["resumes_cursor"] = await paginate(models.Resume.filter(student_crm_id=samples["student_crm_id"]),
+                                                  None, PAGE_SIZE, fields=schemas.RESUME_ROW_FIELDS)
+    _, samples["unverified_cursor"] = await paginate(models.Resume.filter(is_verified=False), None, PAGE_SIZE,
+                                                     fields=schemas.RESUME_ROW_FIELDS)
+    return samples
+
+
+async def _export_chunks(model, fields) -> int:
+    rows = 0
+    chunks = 0
+    async for chunk in iter_record_chunks(model.all(), fields):
+        rows += len(chunk)
+        chunks += 1
+        if chunks == EXPORT_CHUNKS:
+            break
+    return rows
+
+
+async def _client_resumes(s, cursor=None, branch=None):
+    queryset = filter_student_records(models.Resume.filter(student_crm_id=s["student_crm_id"]))
+    return (await paginate(queryset, cursor, PAGE_SIZE, fields=schemas.RESUME_ROW_FIELDS))[0]
+
+
+async def _unverified_resumes(s, cursor=None, branch=None):
+    queryset = filter_student_records(models.Resume.filter(is_verified=False), branch=branch)
+    return (await paginate(queryset, cursor, PAGE_SIZE, fields=schemas.RESUME_ROW_FIELDS))[0]
+
+
+async def _group_dossiers(s):
+    student_ids = await models.Student.filter(group_id=s["group_id"]).order_by("student_name").values_list(
+        "student_crm_id", flat=True)
+    return await load_student_dossiers([str(student_id) for student_id in student_ids])
+
+
+async def _admin_listing(model, s, **filters):
+    return (await paginate(filter_student_records(model.all(), **filters), None, PAGE_SIZE))[0]
+
+
+# (name, where it runs, query); every query takes the samples
+QUERIES: List[Tuple[str, str, Callable[[Dict[str, Any]], Awaitable[Any]]]] = [
+    ("tutor_by_phone", "POST /tutors/login/",
+     lambda s: auth.get_tutor_by_phone_number(s["phone_number"])),
+    ("groups_senior", "GET /tutors/groups/",
+     lambda s: models.Group.all().order_by("id").values(*GROUP_FIELDS, id="crm_group_id")),
+    ("groups_tutor", "GET /tutors/groups/",
+     lambda s: models.Group.filter(teachers__tutor_crm_id=s["tutor_crm_id"]).order_by("id").values(
+         *GROUP_FIELDS, id="crm_group_id")),
+    ("group_clients", "GET /groups/clients/",
+     lambda s: models.Student.filter(group_id=s["group_id"]).order_by("id").values(
+         customer_id="student_crm_id", client_name="student_name")),
+    ("group_roster", "GET /groups/roster/", lambda s: load_group_roster(s["group_id"])),
+    ("client_resumes", "GET /resumes/client/", _client_resumes),
+    ("client_resumes_page_2", "GET /resumes/client/", lambda s: _client_resumes(s, s["resumes_cursor"])),
+    ("unverified", "GET /resumes/unverified/", _unverified_resumes),
+    ("unverified_page_2", "GET /resumes/unverified/", lambda s: _unverified_resumes(s, s["unverified_cursor"])),
+    ("unverified_branch", "GET /resumes/unverified/", lambda s: _unverified_resumes(s, branch=s["branch"])),
+    ("parent_reviews", "GET /reviews/{id}/",
+     lambda s: paginate(models.ParentReview.filter(student_crm_id=s["student_crm_id"]), None, PAGE_SIZE,
+                        fields=schemas.PARENT_REVIEW_ROW_FIELDS)),
+    ("group_dossiers", "POST /students/dossiers/", _group_dossiers),
+    ("search", "GET /search/", lambda s: search_records(s["search_word"], list(SEARCH_TABLES), PAGE_SIZE)),
+    ("export_resumes", "GET /exports/resumes/", lambda s: _export_chunks(models.Resume, EXPORT_FIELDS["resumes"])),
+    ("versions", "conditional GET", lambda s: get_versions([GROUPS, STUDENTS, *resume_entities([s["student_crm_id"]])])),
+    ("admin_tutors", "GET /admin/tutor_profiles",
+     lambda s: paginate(models.TutorProfile.all(), None, PAGE_SIZE, keys=("id",))),
+    ("admin_resumes", "GET /admin/resumes", lambda s: _admin_listing(models.Resume, s)),
+    ("admin_resumes_branch", "GET /admin/resumes", lambda s: _admin_listing(models.Resume, s, branch=s["branch"])),
+    ("admin_reviews", "GET /admin/parent_reviews", lambda s: _admin_listing(models.ParentReview, s)),
+    ("sync_load_groups", "groups sync", lambda s: models.Group.all()),
+    ("sync_load_students", "students sync", lambda s: models.Student.all()),
+]
+
+
+def _row_count(result: Any) -> int:
+    if isinstance(result, tuple):
+        result = result[0]
+    if isinstance(result, int):
+        return result
+    if isinstance(result, dict):
+        return len(result["students"]) if "group_name" in result else len(result)
+    return len(result) if hasattr(result, "__len__") else int(result is not None)
+
+
+async def time_query(query: Callable[[], Awaitable[Any]], repeat: int, warmup: int) -> Dict[str, Any]:
+    for _ in range(warmup):
+        await query()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = await query()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        "rows": _row_count(result),
+        "min_ms": round(timings[0], 3),
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "mean_ms": round(sum(timings) / len(timings), 3),
+    }
+
+
+async def benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    config = TORTOISE_CONFIG
+    if args.database_url:
+        config = {**config, "connections": {"default": args.database_url}}
+    await Tortoise.init(config=config)
+    try:
+        connection = models.Resume._meta.db
+        counts = {model.__name__: await model.all().count()
+                  for model in (models.TutorProfile, models.Group, models.GroupTeacher, models.GroupBranch, models.Student,
+                                models.Resume, models.ParentReview)}
+        samples = await pick_samples()
+        results = {
+            "meta": {
+                "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "git": git_revision(),
+                "dialect": connection.capabilities.dialect,
+                "counts": counts,
+                "samples": {key: value for key, value in samples.items() if not key.endswith("_cursor")},
+                "repeat": args.repeat,
+            },
+            "queries": [],
+        }
+        for name, source, query in QUERIES:
+            if args.queries and name not in args.queries:
+                continue
+            timing = await time_query(lambda: query(samples), args.repeat, args.warmup)
+            results["queries"].append({"name": name, "source": source, **timing})
+    finally:
+        await Tortoise.close_connections()
+    return results
+
+
+def print_report(results: Dict[str, Any]):
+    meta = results["meta"]
+    print(f"{meta['dialect']}: " + ", ".join(f"{count} {name}" for name, count in meta["counts"].items()))
+    print(f"\n{'query':<24} {'source':<26} {'rows':>7} {'min':>9} {'p50':>9} {'p95':>9}")
+    for query in results["queries"]:
+        print(f"{query['name']:<24} {query['source']:<26} {query['rows']:>7} {query['min_ms']:>9.2f} "
+              f"{query['p50_ms']:>9.2f} {query['p95_ms']:>9.2f}")
+
+
+def print_comparison(results: Dict[str, Any], baseline: Dict[str, Any]):
+    """Relative change of the median and p95 time against an earlier result file."""
+    previous = {query["name"]: query for query in baseline["queries"]}
+    print(f"\nCompared with {baseline['meta']['git'].get('commit') or '?'} ({baseline['meta']['started_at']})")
+    if baseline["meta"]["counts"] != results["meta"]["counts"]:
+        print("Note: the datasets differ")
+    print(f"{'query':<24} {'p50':>9} {'p95':>9}")
+    for query in results["queries"]:
+        old = previous.get(query["name"])
+        if old is None:
+            continue
+
+        def change(key):
+            return f"{(query[key] - old[key]) / old[key] * 100:+8.1f}%" if old.get(key) else "        -"
+
+        print(f"{query['name']:<24} {change('p50_ms')} {change('p95_ms')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs of every query")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--queries", type=lambda value: value.split(","), help="Only these queries (comma-separated)")
+    parser.add_argument("--database-url", help="Instead of the configured DATABASE_URL")
+    parser.add_argument("--output", help="Result file (default: bench_results/queries-<time>-<commit>.json)")
+    parser.add_argument("--compare", help="Earlier result file to compare with")
+    args = parser.parse_args()
+    unknown = set(args.queries or ()) - {name for name, _, _ in QUERIES}
+    if unknown:
+        parser.error(f"Unknown queries: {', '.join(sorted(unknown))}")
+
+    results = asyncio.run(benchmark(args))
+    output = args.output
+    if not output:
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join("bench_results", f"queries-{stamp}-{(results['meta']['git']['commit'] or 'nogit')[:8]}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+    print_report(results)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print_comparison(results, json.load(f))
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
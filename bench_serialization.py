@@ -0,0 +1,97 @@
+"""
+Microbenchmark of the JSON paths of a 1k-row list response (/resumes/client/ shape).
+
+    python bench_serialization.py [--rows 1000] [--repeat 200]
+
+"response_model" reproduces what FastAPI does for `response_model=List[ResumeResponse]` with
+model instances: validate from attributes, dump to JSON-able Python, json.dumps. The other
+variants swap in orjson and finally the .values() rows + prebuilt TypeAdapter path the list
+endpoints use now. The "+ query" variants also time loading the rows from an in-memory SQLite.
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Awaitable, Callable, List
+from pydantic import TypeAdapter
+from tortoise import Tortoise
+import models
+import schemas
+from serialization import orjson
+
+RESPONSE_MODEL_ADAPTER = TypeAdapter(List[schemas.ResumeResponse])
+
+
+def response_model_json(resumes: List[models.Resume]) -> bytes:
+    validated = RESPONSE_MODEL_ADAPTER.validate_python(resumes, from_attributes=True)
+    return json.dumps(RESPONSE_MODEL_ADAPTER.dump_python(validated, mode="json"), ensure_ascii=False).encode()
+
+
+def response_model_orjson(resumes: List[models.Resume]) -> bytes:
+    validated = RESPONSE_MODEL_ADAPTER.validate_python(resumes, from_attributes=True)
+    return orjson.dumps(RESPONSE_MODEL_ADAPTER.dump_python(validated, mode="json"))
+
+
+def rows_type_adapter(rows: List[dict]) -> bytes:
+    return schemas.RESUME_ROWS.dump_json(rows)
+
+
+async def measure(run: Callable[[], Awaitable[bytes]], repeat: int) -> float:
+    """Best-of-3 average milliseconds per call."""
+    best = None
+    for _ in range(3):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            await run()
+        elapsed = (time.perf_counter() - started) / repeat * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+async def main(rows: int, repeat: int):
+    await Tortoise.init(db_url="sqlite://:memory:", modules={"models": ["models"]})
+    await Tortoise.generate_schemas()
+    try:
+        await models.Resume.bulk_create([
+            models.Resume(student_crm_id="1", content=f"Резюме ученика {i}. " * 20, is_verified=i % 2 == 0)
+            for i in range(rows)
+        ])
+        queryset = models.Resume.filter(student_crm_id="1").order_by("-created_at", "-id").limit(rows)
+        instances = await queryset
+        values = await queryset.values(*schemas.RESUME_ROW_FIELDS)
+        assert json.loads(response_model_json(instances)) == json.loads(rows_type_adapter(values))
+
+        async def serialize(function, data):
+            return function(data)
+
+        async def query_and_serialize(function, as_values):
+            data = await (queryset.values(*schemas.RESUME_ROW_FIELDS) if as_values else queryset)
+            return function(data)
+
+        variants = [
+            ("response_model + json", lambda: serialize(response_model_json, instances)),
+            ("response_model + orjson", lambda: serialize(response_model_orjson, instances)),
+            ("values() rows + TypeAdapter", lambda: serialize(rows_type_adapter, values)),
+            ("response_model + json + query", lambda: query_and_serialize(response_model_json, False)),
+            ("values() rows + TypeAdapter + query", lambda: query_and_serialize(rows_type_adapter, True)),
+        ]
+        results = {}
+        for name, run in variants:
+            if name.endswith("orjson") and orjson is None:
+                continue
+            results[name] = await measure(run, repeat if "query" not in name else max(repeat // 10, 5))
+    finally:
+        await Tortoise.close_connections()
+
+    print(f"{rows} rows")
+    for name, elapsed in results.items():
+        baseline = results["response_model + json + query" if "query" in name else "response_model + json"]
+        print(f"  {name:<38} {elapsed:8.2f} ms  x{baseline / elapsed:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
@@ -0,0 +1,158 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from config import settings
+
+try:
+    # redis-py ships the maintained asyncio client; aioredis 2.x exposes the same API
+    from redis import asyncio as aioredis
+except ImportError:
+    try:
+        import aioredis
+    except Exception:  # aioredis 2.0.1 fails to import on Python 3.11+
+        aioredis = None
+
+logger = logging.getLogger(__name__)
+
+Loader = Callable[[], Awaitable[Optional[Any]]]
+
+
+class MemoryBackend:
+    """
+    In-process LRU storage bounded by the approximate JSON size of the stored values.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[Any, float, float, int]]" = OrderedDict()
+        self._size = 0
+
+    async def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, fresh_until, expires_at, _ = entry
+        if time.time() >= expires_at:
+            await self.delete(key)
+            return None
+        self._entries.move_to_end(key)
+        return value, fresh_until
+
+    async def set(self, key: str, value: Any, fresh_until: float, expires_at: float):
+        size = len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            return
+        await self.delete(key)
+        self._entries[key] = (value, fresh_until, expires_at, size)
+        self._size += size
+        while self._size > self.max_bytes:
+            _, (_, _, _, evicted_size) = self._entries.popitem(last=False)
+            self._size -= evicted_size
+
+    async def delete(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry[3]
+
+
+class RedisBackend:
+    """
+    Redis storage, so the cache is shared between processes.
+    """
+
+    def __init__(self, url: str, prefix: str):
+        self.prefix = prefix
+        self._redis = aioredis.from_url(url)
+
+    async def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        raw = await self._redis.get(self.prefix + key)
+        if raw is None:
+            return None
+        envelope = json.loads(raw)
+        return envelope["value"], envelope["fresh_until"]
+
+    async def set(self, key: str, value: Any, fresh_until: float, expires_at: float):
+        envelope = json.dumps({"value": value, "fresh_until": fresh_until}, default=str)
+        await self._redis.set(self.prefix + key, envelope, ex=max(int(expires_at - time.time()), 1))
+
+    async def delete(self, key: str):
+        await self._redis.delete(self.prefix + key)
+
+
+class ReadThroughCache:
+    """
+    Read-through cache with a TTL and stale-while-revalidate.
+
+    Fresh values are returned as is. Values past their TTL but within the stale window are
+    returned immediately while a background refresh runs. Concurrent misses for the same key
+    share one loader call. None results (not found or CRM failure) are not cached.
+    """
+
+    def __init__(self, backend, ttl_seconds: float, stale_seconds: float):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def get_or_load(self, key: str, loader: Loader) -> Optional[Any]:
+        try:
+            cached = await self.backend.get(key)
+        except Exception:
+            logger.exception("Cache read failed for %s", key)
+            cached = None
+
+        if cached is not None:
+            value, fresh_until = cached
+            if time.time() >= fresh_until:
+                task = self._load(key, loader)
+                task.add_done_callback(_ignore_task_result)
+            return value
+
+        return await asyncio.shield(self._load(key, loader))
+
+    def _load(self, key: str, loader: Loader) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fill(key, loader))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return task
+
+    async def _fill(self, key: str, loader: Loader) -> Optional[Any]:
+        value = await loader()
+        if value is not None:
+            now = time.time()
+            try:
+                await self.backend.set(key, value, now + self.ttl_seconds, now + self.ttl_seconds + self.stale_seconds)
+            except Exception:
+                logger.exception("Cache write failed for %s", key)
+        return value
+
+    async def invalidate(self, key: str):
+        await self.backend.delete(key)
+
+
+def _ignore_task_result(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Background cache refresh failed: %s", task.exception())
+
+
+def create_cache(name: str, ttl_seconds: float, stale_seconds: float, max_bytes: int) -> ReadThroughCache:
+    """Create a cache backed by Redis when settings.redis_url is set, in-process memory otherwise."""
+    if settings.redis_url:
+        if aioredis is not None:
+            return ReadThroughCache(RedisBackend(settings.redis_url, f"kiberone:{name}:"), ttl_seconds, stale_seconds)
+        logger.warning("redis_url is set but no Redis client is installed, using an in-process cache")
+    return ReadThroughCache(MemoryBackend(max_bytes), ttl_seconds, stale_seconds)
+
+
+# CRM client cards keyed by "branch:student_crm_id"
+client_cache = create_cache(
+    "client",
+    ttl_seconds=settings.client_cache_ttl_seconds,
+    stale_seconds=settings.client_cache_stale_seconds,
+    max_bytes=settings.client_cache_max_bytes,
+)
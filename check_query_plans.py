@@ -0,0 +1,131 @@
+"""
+Check that the queries behind the listing endpoints use the indexes from migrations/models/.
+
+Runs EXPLAIN QUERY PLAN (SQLite) or EXPLAIN (Postgres) for each query and fails when the plan
+does not mention one of the expected indexes.
+
+    python check_query_plans.py                                # in-memory SQLite built from the models
+    DATABASE_URL=postgres://... python check_query_plans.py    # a database migrated with "aerich upgrade"
+"""
+import asyncio
+import sys
+from datetime import datetime, timezone
+from typing import Callable, List, Sequence, Tuple, Union
+from tortoise import Tortoise, connections
+from tortoise.backends.base.client import BaseDBAsyncClient
+from pypika_tortoise.queries import QueryBuilder
+from tortoise.queryset import QuerySet
+from tortoise.transactions import in_transaction
+import models
+from config import settings
+from dossiers import group_roster_query
+from pagination import encode_cursor, keyset_queryset, student_crm_ids_in_branch
+
+PAGE = 51  # limit + 1, as paginate() asks for it
+SAMPLE_CURSOR = encode_cursor([datetime(2025, 1, 1, tzinfo=timezone.utc), 100])
+
+# (what is checked, query, indexes any of which the plan should use)
+QUERY_CHECKS: List[Tuple[str, Callable[[], Union[QuerySet, QueryBuilder]], Sequence[str]]] = [
+    ("GET /resumes/client/",
+     lambda: keyset_queryset(models.Resume.filter(student_crm_id="1"), None).limit(PAGE),
+     ["idx_resume_student_created"]),
+    ("GET /resumes/client/?verified=true, next page",
+     lambda: keyset_queryset(models.Resume.filter(student_crm_id="1", is_verified=True), SAMPLE_CURSOR).limit(PAGE),
+     ["idx_resume_student_created"]),
+    ("GET /resumes/unverified/",
+     lambda: keyset_queryset(models.Resume.filter(is_verified=False), None).limit(PAGE),
+     ["idx_resume_unverified"]),
+    ("GET /resumes/unverified/, next page",
+     lambda: keyset_queryset(models.Resume.filter(is_verified=False), SAMPLE_CURSOR).limit(PAGE),
+     ["idx_resume_unverified"]),
+    ("GET /resumes/unverified/?branch=1",
+     lambda: keyset_queryset(models.Resume.filter(is_verified=False, student_crm_id__in=student_crm_ids_in_branch("1")),
+                             None).limit(PAGE),
+     ["idx_resume_unverified", "idx_resume_student_created"]),
+    ("GET /reviews/{student_crm_id}/",
+     lambda: keyset_queryset(models.ParentReview.filter(student_crm_id="1"), None).limit(PAGE),
+     ["idx_parentrevi_student_created"]),
+    ("POST /students/dossiers/",
+     lambda: models.Resume.filter(student_crm_id__in=["1", "2"]).order_by("-created_at", "-id"),
+     ["idx_resume_student_created"]),
+    ("GET /admin/resumes",
+     lambda: keyset_queryset(models.Resume.all(), SAMPLE_CURSOR).limit(PAGE),
+     ["idx_resume_created"]),
+    ("GET /admin/parent-reviews",
+     lambda: keyset_queryset(models.ParentReview.all(), SAMPLE_CURSOR).limit(PAGE),
+     ["idx_parentrevi_created"]),
+    ("GET /groups/clients/",
+     lambda: models.Student.filter(group_id=1),
+     ["idx_student_group_i_3b9352"]),
+    ("branch filter: students of the branch groups",
+     lambda: models.Resume.filter(student_crm_id__in=student_crm_ids_in_branch("1")),
+     ["uid_groupbranch_branch_16019a", "sqlite_autoindex_groupbranch_1"]),
+    ("GET /groups/roster/",
+     lambda: group_roster_query(1),
+     ["idx_resume_student_created"]),
+    ("GET /tutors/groups/",
+     lambda: models.Group.filter(teachers__tutor_crm_id="7").order_by("id"),
+     # SQLite names the index of a UNIQUE constraint itself
+     ["uid_groupteache_tutor_c_7da47f", "sqlite_autoindex_groupteacher_1"]),
+    ("jobs: active job of a type",
+     lambda: models.SyncJob.filter(job_type="groups_sync", status__in=["queued", "running"]),
+     ["idx_syncjob_type_status"]),
+]
+
+
+async def explain(connection: BaseDBAsyncClient, sql: str, params: Sequence = ()) -> List[str]:
+    """Return the plan lines of a query."""
+    if connection.capabilities.dialect == "postgres":
+        _, rows = await connection.execute_query(f"EXPLAIN {sql}", list(params))
+        return [row["QUERY PLAN"] for row in rows]
+    _, rows = await connection.execute_query(f"EXPLAIN QUERY PLAN {sql}", list(params))
+    return [row["detail"] for row in rows]
+
+
+async def check_plans(verbose: bool = False) -> List[str]:
+    """Explain every query of QUERY_CHECKS and return the failures (empty when all use an index)."""
+    failures = []
+    async with in_transaction() as connection:
+        if connection.capabilities.dialect == "postgres":
+            # Test tables are tiny and Postgres would rather scan them; only ask whether an index is usable
+            await connection.execute_script("SET LOCAL enable_seqscan = off")
+
+        for name, query, expected_indexes in QUERY_CHECKS:
+            built = query()
+            if isinstance(built, QueryBuilder):
+                sql, params = built.get_sql(), []
+            else:
+                # Subqueries only render placeholders, so pass the parameters instead of inlining them
+                built._choose_db_if_not_chosen()
+                built._make_query()
+                sql, params = built.query.get_parameterized_sql()
+            plan = await explain(connection, sql, params)
+            plan_text = "\n".join(plan)
+            used = any(index in plan_text for index in expected_indexes)
+            if verbose:
+                print(f"{'OK  ' if used else 'FAIL'} {name}")
+                for line in plan:
+                    print(f"       {line}")
+            if not used:
+                failures.append(f"{name}: expected one of {', '.join(expected_indexes)}, got:\n{plan_text}")
+    return failures
+
+
+async def main() -> int:
+    await Tortoise.init(db_url=settings.database_url, modules={"models": ["models"]})
+    try:
+        if settings.database_url.startswith("sqlite://:memory:"):
+            await Tortoise.generate_schemas()
+        failures = await check_plans(verbose=True)
+    finally:
+        await connections.close_all()
+
+    if failures:
+        print(f"\n{len(failures)} of {len(QUERY_CHECKS)} queries do not use the expected index")
+        return 1
+    print(f"\nAll {len(QUERY_CHECKS)} queries use their indexes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,106 @@
+import hashlib
+from datetime import datetime, timezone as dt_timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+from fastapi import Request
+from fastapi.responses import Response
+from tortoise import BaseDBAsyncClient, timezone
+from tortoise.exceptions import IntegrityError
+from tortoise.expressions import F
+import models
+
+# Entities with a version counter. Every write to their rows must bump the counter afterwards,
+# otherwise clients keep getting 304 for data that changed.
+GROUPS = "groups"
+STUDENTS = "students"
+RESUMES = "resumes"  # Any resume
+
+
+def student_resumes(student_crm_id: str) -> str:
+    """Entity of the resumes of one student."""
+    return f"{RESUMES}:{student_crm_id}"
+
+
+def resume_entities(student_crm_ids: Iterable[str]) -> list:
+    """Entities to bump after writing resumes of these students."""
+    return [RESUMES] + [student_resumes(student_crm_id) for student_crm_id in set(student_crm_ids)]
+
+
+async def bump_versions(entities: Iterable[str], connection: Optional[BaseDBAsyncClient] = None):
+    """Increment the version counters of `entities`, creating the missing ones."""
+    entities = sorted(set(entities))
+    if not entities:
+        return
+    now = timezone.now()
+    updated = await models.EntityVersion.filter(entity__in=entities).using_db(connection).update(
+        version=F("version") + 1, updated_at=now)
+    if updated < len(entities):
+        existing = set(await models.EntityVersion.filter(entity__in=entities).using_db(connection)
+                       .values_list("entity", flat=True))
+        for entity in entities:
+            if entity in existing:
+                continue
+            try:
+                await models.EntityVersion.create(entity=entity, version=1, updated_at=now, using_db=connection)
+            except IntegrityError:
+                # Created concurrently by another writer, which bumped it for us
+                pass
+
+
+async def get_versions(entities: Sequence[str]) -> Tuple[Dict[str, int], Optional[datetime]]:
+    """Current counters of `entities` (0 when never bumped) and the time of the latest bump."""
+    rows = await models.EntityVersion.filter(entity__in=list(entities)).values("entity", "version", "updated_at")
+    versions = {entity: 0 for entity in entities}
+    last_modified = None
+    for row in rows:
+        versions[row["entity"]] = row["version"]
+        if row["updated_at"] is not None and (last_modified is None or row["updated_at"] > last_modified):
+            last_modified = row["updated_at"]
+    return versions, last_modified
+
+
+def make_etag(versions: Dict[str, int], scope: Sequence = ()) -> str:
+    """Strong ETag of the entity versions plus whatever else the body depends on (e.g. the caller)."""
+    key = repr((sorted(versions.items()), tuple(scope)))
+    return '"' + hashlib.blake2b(key.encode(), digest_size=12).hexdigest() + '"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses the weak comparison: W/ prefixes are ignored
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (candidate.strip() for candidate in if_none_match.split(","))
+    return etag in (candidate[2:] if candidate.startswith("W/") else candidate for candidate in candidates)
+
+
+def _not_modified_since(if_modified_since: str, last_modified: Optional[datetime]) -> bool:
+    if last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        return False
+    # HTTP dates have a one-second resolution
+    return last_modified.replace(microsecond=0) <= since
+
+
+async def conditional_get(request: Request, entities: Sequence[str],
+                          scope: Sequence = ()) -> Tuple[Optional[Response], Dict[str, str]]:
+    """
+    Validators of a read that depends on `entities`. Returns a 304 response when the request's
+    If-None-Match (or, without it, If-Modified-Since) still matches, so the caller can return it
+    before loading any rows, and the headers to send with the full response otherwise.
+    """
+    versions, last_modified = await get_versions(entities)
+    headers = {"ETag": make_etag(versions, scope), "Cache-Control": "private, no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified.astimezone(dt_timezone.utc), usegmt=True)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        not_modified = _etag_matches(if_none_match, headers["ETag"])
+    else:
+        not_modified = _not_modified_since(request.headers.get("if-modified-since", ""), last_modified)
+    return (Response(status_code=304, headers=headers) if not_modified else None), headers
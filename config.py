@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
@@ -7,9 +7,50 @@ class Settings(BaseSettings):
     secret_key: str
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    identity_cache_ttl_seconds: int = 60  # How long a tutor row read by auth is reused; bounds how long revocation takes in other processes
     crm_api_url: Optional[str] = None
     crm_email: Optional[str] = None
     crm_api_key: Optional[str] = None
+    crm_token_ttl_seconds: int = 3300  # AlfaCRM tokens live for an hour, refresh a bit earlier
+    crm_max_connections: int = 20
+    crm_max_keepalive_connections: int = 10
+    crm_keepalive_expiry_seconds: float = 30.0
+    crm_max_concurrency: int = 10  # Max in-flight CRM requests per process
+    crm_rate_limit_per_second: float = 10.0  # Per-branch request rate, 0 disables the limiter
+    crm_rate_limit_burst: int = 10
+    crm_page_size: int = 50
+    crm_connect_timeout_seconds: float = 3.0
+    crm_login_timeout_seconds: float = 10.0  # Read timeouts per call type, see crm_integration.CALL_TYPES
+    crm_lookup_timeout_seconds: float = 5.0  # teacher / customer lookups behind interactive requests
+    crm_listing_timeout_seconds: float = 20.0  # branch / group / group member listings crawled by the syncs
+    crm_write_timeout_seconds: float = 15.0
+    crm_retry_attempts: int = 3  # Attempts of idempotent calls on connection errors, timeouts, 429 and 5xx
+    crm_retry_base_delay_seconds: float = 0.2  # Backoff doubles per retry, with full jitter
+    crm_retry_max_delay_seconds: float = 2.0
+    crm_breaker_failure_threshold: int = 5  # Consecutive failures that open a branch's circuit, 0 disables the breaker
+    crm_breaker_reset_seconds: float = 30.0  # How long an open circuit rejects calls before a trial call
+    crm_branch_ids: List[int] = []  # Branches to sync, empty means discover them from the CRM
+    sync_batch_size: int = 500  # Rows per bulk_create / bulk_update statement during CRM sync
+    sync_full_reconcile_hours: int = 24  # "auto" sync mode runs a full sync (with deletions) this often
+    crm_updated_since_filter: str = "updated_at_from"  # CRM index filter used by delta syncs
+    jobs_enabled: bool = True  # Run the background job worker and scheduler in this process
+    jobs_poll_interval_seconds: float = 2.0  # How often an idle worker looks for queued jobs in the DB
+    jobs_heartbeat_seconds: float = 15.0  # How often a running job's heartbeat_at is refreshed
+    jobs_stale_after_seconds: float = 120.0  # Running jobs without a heartbeat this long are failed
+    sync_groups_cron: Optional[str] = "0 3 * * *"  # Cron schedule (server local time) of the groups sync, empty disables it
+    sync_students_cron: Optional[str] = "30 3 * * *"
+    tutor_profile_freshness_minutes: int = 60  # Login refreshes the tutor profile from CRM when it is older than this
+    page_size_default: int = 50  # Listing endpoints return this many rows per page unless asked otherwise
+    page_size_max: int = 200
+    dossier_max_students: int = 200  # Students per /students/dossiers/ request
+    export_chunk_size: int = 1000  # Rows read per query while streaming an export
+    redis_url: Optional[str] = None  # Share caches through Redis instead of keeping them in-process
+    client_cache_ttl_seconds: int = 300  # /clients/detail/ CRM lookups are served from cache this long
+    client_cache_stale_seconds: int = 600  # then served stale while refreshing in the background
+    client_cache_max_bytes: int = 16 * 1024 * 1024
+    slow_query_ms: float = 200.0  # Queries slower than this are logged with their parameters, 0 disables
+    repeated_query_threshold: int = 10  # A query shape repeated this often in one request is logged as a likely N+1, 0 disables
+    metrics_token: Optional[str] = None  # When set, /metrics requires "Authorization: Bearer <token>"
     gemini_api_key: Optional[str] = None
     google_cloud_project: Optional[str] = None
 
@@ -0,0 +1,20 @@
+import asyncio
+import pytest
+from tortoise import Tortoise
+
+
+@pytest.fixture
+def run_with_db():
+    """Return a runner that awaits coro_factory() against a fresh in-memory SQLite database."""
+    def run(coro_factory):
+        async def run_in_db():
+            await Tortoise.init(db_url="sqlite://:memory:", modules={"models": ["models"]})
+            await Tortoise.generate_schemas()
+            try:
+                return await coro_factory()
+            finally:
+                await Tortoise.close_connections()
+
+        return asyncio.run(run_in_db())
+
+    return run
@@ -1,5 +1,15 @@
+import asyncio
+import contextlib
+import importlib.util
+import math
+import random
+import time
 import httpx
-from typing import Optional, Dict, Any
+from datetime import timedelta
+from tortoise import timezone
+from typing import Optional, Dict, Any, List, AsyncIterator
+import auth
+import metrics
 from config import settings
 from models import TutorProfile
 
@@ -11,8 +21,309 @@ BASE_HEADERS = {
     "Accept": "application/json, text/plain, */*",
 }
 
+# HTTP/2 is used only when the optional "h2" package is installed (pip install httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
 
-async def login_to_alfa_crm() -> Optional[str]:
+
+class CRMError(Exception):
+    """Raised when a CRM request cannot be made (e.g. CRM is not configured or login failed)."""
+
+
+class CRMUnavailable(CRMError):
+    """Raised without calling the CRM while the circuit breaker of the branch is open."""
+
+
+# Responses after which an idempotent call is retried
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# AlfaCRM endpoint -> call type, which picks the read timeout (settings.crm_<type>_timeout_seconds).
+# Other index endpoints are "lookup" calls, anything else a "write".
+CALL_TYPES = {
+    "auth/login": "login",
+    "branch/index": "listing",
+    "group/index": "listing",
+    "cgi/index": "listing",
+}
+
+
+def _call_type(path: str) -> str:
+    return CALL_TYPES.get(path) or ("lookup" if path.endswith("/index") else "write")
+
+
+def _is_idempotent(path: str) -> bool:
+    # AlfaCRM reads everything with POST .../index; login only issues a token
+    return _call_type(path) != "write"
+
+
+def crm_timeout(path: str) -> httpx.Timeout:
+    read_timeout = getattr(settings, f"crm_{_call_type(path)}_timeout_seconds")
+    return httpx.Timeout(read_timeout, connect=settings.crm_connect_timeout_seconds)
+
+
+def retry_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter before retry number `attempt` (1-based)."""
+    ceiling = min(settings.crm_retry_max_delay_seconds, settings.crm_retry_base_delay_seconds * 2 ** (attempt - 1))
+    return random.uniform(0, ceiling)
+
+
+def _crm_url(path: str, branch: Optional[Any] = None) -> str:
+    base_url = settings.crm_api_url.rstrip('/')
+    if branch is None:
+        return f"{base_url}/v2api/{path}"
+    return f"{base_url}/v2api/{branch}/{path}"
+
+
+class RateLimiter:
+    """
+    Token bucket limiter: allows `rate` acquisitions per second with bursts of up to `burst`.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+
+    async def acquire(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+        # Reserve a token right away so concurrent callers queue up behind each other
+        self._tokens -= 1
+        if self._tokens < 0:
+            await asyncio.sleep(-self._tokens / self.rate)
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures (connection errors, timeouts, 5xx) and
+    rejects calls for `reset_seconds`. Then one trial call is let through (half-open): success
+    closes the circuit, failure opens it for another `reset_seconds`.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed" or self.failure_threshold <= 0:
+            return True
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self._opened_at is not None or (self.failure_threshold > 0 and self.failures >= self.failure_threshold):
+            self._opened_at = time.monotonic()
+
+    def release(self):
+        """The call was cancelled before it had an outcome."""
+        self._trial_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        state = self.state
+        retry_in = self.reset_seconds - (time.monotonic() - self._opened_at) if state == "open" else 0.0
+        return {"state": state, "consecutive_failures": self.failures, "retry_in_seconds": round(max(retry_in, 0.0), 1)}
+
+
+class CRMClient:
+    """
+    App-lifetime AlfaCRM client: one pooled httpx.AsyncClient plus a cached auth token.
+
+    The token is refreshed before it expires and on a 401 response. Concurrent callers
+    share a single login instead of each performing their own. Requests are bounded by a
+    process-wide concurrency limit and a per-branch rate limiter, time out per call type,
+    are retried with jittered backoff when they only read, and fail fast with CRMUnavailable
+    while the branch's circuit breaker is open.
+    """
+
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._login_lock: Optional[asyncio.Lock] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._rate_limiters: Dict[Any, RateLimiter] = {}
+        self._token: Optional[str] = None
+        self._token_expires_at: float = 0.0
+        # Branch (as a string, "" for unbranched calls like login) -> breaker; kept across close()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                headers=BASE_HEADERS,
+                http2=HTTP2_AVAILABLE,
+                transport=self._transport,
+                timeout=crm_timeout("customer/index"),
+                limits=httpx.Limits(
+                    max_connections=settings.crm_max_connections,
+                    max_keepalive_connections=settings.crm_max_keepalive_connections,
+                    keepalive_expiry=settings.crm_keepalive_expiry_seconds,
+                ),
+            )
+            self._login_lock = asyncio.Lock()
+            self._semaphore = asyncio.Semaphore(settings.crm_max_concurrency)
+            self._rate_limiters = {}
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+        self._login_lock = None
+        self._semaphore = None
+        self._rate_limiters = {}
+        self._token = None
+        self._token_expires_at = 0.0
+
+    def breaker(self, branch: Optional[Any] = None) -> CircuitBreaker:
+        key = "" if branch is None else str(branch)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(settings.crm_breaker_failure_threshold, settings.crm_breaker_reset_seconds)
+            self._breakers[key] = breaker
+        return breaker
+
+    def breaker_states(self) -> Dict[str, Dict[str, Any]]:
+        """Circuit breaker state per branch ("" for unbranched calls such as login)."""
+        return {key: breaker.snapshot() for key, breaker in sorted(self._breakers.items())}
+
+    def _cached_token(self) -> Optional[str]:
+        if self._token and time.monotonic() < self._token_expires_at:
+            return self._token
+        return None
+
+    async def get_token(self, stale_token: Optional[str] = None) -> Optional[str]:
+        """
+        Return a valid token, logging in if needed.
+        Pass the token that was just rejected as stale_token to force a refresh.
+        """
+        token = self._cached_token()
+        if token and token != stale_token:
+            return token
+
+        client = self.client
+        async with self._login_lock:
+            # Another coroutine may have refreshed the token while we were waiting
+            token = self._cached_token()
+            if token and token != stale_token:
+                return token
+
+            token = await login_to_alfa_crm(self)
+            if token:
+                self._token = token
+                self._token_expires_at = time.monotonic() + settings.crm_token_ttl_seconds
+            else:
+                self._token = None
+                self._token_expires_at = 0.0
+            return token
+
+    async def _send(self, path: str, branch: Optional[Any], token: Optional[str], json: Optional[Dict[str, Any]],
+                    params: Optional[Dict[str, Any]]) -> httpx.Response:
+        client = self.client
+        url = _crm_url(path, branch)
+        call_metrics = metrics.crm_call_metrics(path, branch)
+        breaker = self.breaker(branch)
+        if not breaker.allow():
+            call_metrics.reject()
+            raise CRMUnavailable(f"CRM circuit for branch {branch} is open")
+
+        try:
+            if settings.crm_rate_limit_per_second > 0:
+                limiter = self._rate_limiters.get(str(branch))
+                if limiter is None:
+                    limiter = RateLimiter(settings.crm_rate_limit_per_second, settings.crm_rate_limit_burst)
+                    self._rate_limiters[str(branch)] = limiter
+                await limiter.acquire()
+            async with self._semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await client.post(url, headers={"X-ALFACRM-TOKEN": token} if token else None, json=json,
+                                                 params=params, timeout=crm_timeout(path))
+                except httpx.HTTPError as e:
+                    call_metrics.observe(metrics.crm_outcome(error=e), time.perf_counter() - started)
+                    breaker.record_failure()
+                    raise
+        except BaseException:
+            breaker.release()
+            raise
+
+        call_metrics.observe(metrics.crm_outcome(response), time.perf_counter() - started)
+        if response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
+
+    async def _send_with_retries(self, path: str, branch: Optional[Any], token: Optional[str],
+                                 json: Optional[Dict[str, Any]], params: Optional[Dict[str, Any]]) -> httpx.Response:
+        """
+        Send, retrying idempotent calls after connection errors, timeouts and 429/5xx responses
+        (up to settings.crm_retry_attempts attempts in total). CRMUnavailable is never retried.
+        """
+        attempts = max(settings.crm_retry_attempts, 1) if _is_idempotent(path) else 1
+        for attempt in range(1, attempts + 1):
+            try:
+                response = await self._send(path, branch, token, json, params)
+            except httpx.TransportError:
+                if attempt == attempts:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt == attempts:
+                    return response
+            await asyncio.sleep(retry_delay(attempt))
+
+    async def post(self, path: str, branch: Optional[Any] = None, json: Optional[Dict[str, Any]] = None,
+                   params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        POST to an authenticated AlfaCRM endpoint and return the decoded JSON body.
+        Raises CRMError if no token can be obtained (CRMUnavailable while the circuit is open)
+        and httpx errors on HTTP failures.
+        """
+        if not settings.crm_api_url:
+            raise CRMError("CRM is not configured")
+
+        token = await self.get_token()
+        if not token:
+            raise CRMError("Could not log in to CRM")
+
+        response = await self._send_with_retries(path, branch, token, json, params)
+        if response.status_code == 401:
+            # Token expired on the CRM side: refresh once and retry
+            token = await self.get_token(stale_token=token)
+            if not token:
+                raise CRMError("Could not log in to CRM")
+            response = await self._send_with_retries(path, branch, token, json, params)
+
+        response.raise_for_status()
+        return response.json()
+
+
+crm_client = CRMClient()
+
+
+async def login_to_alfa_crm(client: Optional[CRMClient] = None) -> Optional[str]:
     """
     Авторизация в CRM и получение токена.
     """
@@ -20,20 +331,16 @@ async def login_to_alfa_crm() -> Optional[str]:
         return None
 
     data = {"email": settings.crm_email, "api_key": settings.crm_api_key}
-    # Remove the "https://" prefix and any trailing slashes to construct the proper URL
-    base_url = settings.crm_api_url.rstrip('/')
-    url = f"{base_url}/v2api/auth/login"
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, headers=BASE_HEADERS, json=data)
+        response = await (client or crm_client)._send_with_retries("auth/login", None, None, data, None)
 
-            if response.status_code == 200:
-                token_data = response.json()
-                token = token_data.get("token")
-                return token
-            else:
-                return None
+        if response.status_code == 200:
+            token_data = response.json()
+            token = token_data.get("token")
+            return token
+        else:
+            return None
     except Exception as e:
         return None
 
@@ -45,33 +352,72 @@ async def get_tutor_data_from_crm(phone: str, branch: str = None) -> Optional[Di
     if not branch or not settings.crm_api_key:
         return None
 
-    # Get token for authentication
-    token = await login_to_alfa_crm()
-    if not token:
-        return None
-
     # Use the branch from tutor profile to construct the URL
-    url = f"{settings.crm_api_url}/v2api/{branch}/teacher/index"
     data = {"phone": phone}  # Using ID instead of phone as in the original example
 
-    headers = {**BASE_HEADERS, "X-ALFACRM-TOKEN": token}
+    try:
+        result = await crm_client.post("teacher/index", branch, json=data)
+    except (httpx.HTTPError, CRMError):
+        return None
+
+    items = result.get("items", [])
+    if items:
+        return items[0]
+    return None
+
+
+# TutorProfile field -> CRM "teacher/index" item field
+TUTOR_PROFILE_CRM_FIELDS = {
+    "tutor_crm_id": "id",
+    "tutor_name": "name",
+    "branch_ids": "branch_ids",
+    "dob": "dob",
+    "gender": "gender",
+    "streaming_id": "streaming_id",
+    "note": "note",
+    "e_date": "e_date",
+    "avatar_url": "avatar_url",
+    "phone": "phone",
+    "email": "email",
+    "web": "web",
+    "addr": "addr",
+    "teacher_to_skill": "teacher-to-skill",
+}
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(url, headers=headers, json=data)
-            response.raise_for_status()
-            result = response.json()
 
-            items = result.get("items", [])
-            if items:
-                return items[0]
-            return None
-        except httpx.HTTPStatusError:
-            # Handle HTTP errors
-            return None
-        except httpx.RequestError:
-            # Handle request errors
-            return None
+def tutor_profile_is_stale(tutor: TutorProfile) -> bool:
+    """Whether the tutor's CRM fields are older than settings.tutor_profile_freshness_minutes."""
+    if tutor.crm_synced_at is None:
+        return True
+    return timezone.now() - tutor.crm_synced_at > timedelta(minutes=settings.tutor_profile_freshness_minutes)
+
+
+async def refresh_tutor_profile_from_crm(tutor_id: int) -> Optional[TutorProfile]:
+    """
+    Reload a tutor's profile from CRM and write only the fields that changed
+    """
+    tutor = await TutorProfile.get_or_none(id=tutor_id)
+    if not tutor or not tutor.branch:
+        return None
+
+    tutor_data = await get_tutor_data_from_crm(tutor.phone_number, tutor.branch)
+    if not tutor_data:
+        return None
+
+    changed_fields = []
+    for field, crm_field in TUTOR_PROFILE_CRM_FIELDS.items():
+        value = tutor_data.get(crm_field)
+        if field == "tutor_crm_id" and value is not None:
+            value = str(value)  # Stored as a string
+        if getattr(tutor, field) != value:
+            setattr(tutor, field, value)
+            changed_fields.append(field)
+
+    tutor.crm_synced_at = timezone.now()
+    await tutor.save(update_fields=changed_fields + ["crm_synced_at"])
+    if "tutor_crm_id" in changed_fields:
+        await auth.invalidate_tutor_identity(tutor.id)
+    return tutor
 
 
 async def get_client_data_from_crm(student_crm_id: str, branch: str = None) -> Optional[Dict[str, Any]]:
@@ -80,42 +426,57 @@ async def get_client_data_from_crm(student_crm_id: str, branch: str = None) -> O
     """
     if not branch or not settings.crm_api_key:
         return None
-    
-    # Get token for authentication
-    token = await login_to_alfa_crm()
-    if not token:
-        return None
-    
-    # Use the branch from tutor profile to construct the URL
-    url = f"{settings.crm_api_url}/v2api/{branch}/customer/index"
+
     # Using the logic from find_client_by_id function
     data = {"id": student_crm_id, "is_study": 2, "page": 0}  # 1 - clients, 0 - leads, 2 - all
-    
-    headers = {**BASE_HEADERS, "X-ALFACRM-TOKEN": token}
-    
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(url, headers=headers, json=data)
-            response.raise_for_status()
-            result = response.json()
-            
-            # Check if response has items
-            clients = result.get("items", [])
-            
-            if not clients:
-                return None
-
-            if len(clients) > 1:
-                # Return the first client if multiple found
-                pass
-
-            return clients[0]
-        except httpx.HTTPStatusError:
-            # Handle HTTP errors
-            return None
-        except httpx.RequestError:
-            # Handle request errors
-            return None
+
+    try:
+        result = await crm_client.post("customer/index", branch, json=data)
+    except (httpx.HTTPError, CRMError):
+        return None
+
+    # Check if response has items
+    clients = result.get("items", [])
+
+    if not clients:
+        return None
+
+    if len(clients) > 1:
+        # Return the first client if multiple found
+        pass
+
+    return clients[0]
+
+
+async def get_clients_data_from_crm(student_crm_ids: List[str], branch: str = None) -> Optional[Dict[str, Dict[str, Any]]]:
+    """
+    Get many clients at once with customer/index calls filtered by an id list.
+    Returns clients keyed by their id as a string, or None if the CRM request failed.
+    """
+    if not branch or not settings.crm_api_key:
+        return None
+    if not student_crm_ids:
+        return {}
+
+    # One chunk per page, with the page limit set explicitly so every requested client fits into
+    # a single response whatever the CRM's default page size is
+    chunk_size = settings.crm_page_size
+    chunks = [student_crm_ids[i:i + chunk_size] for i in range(0, len(student_crm_ids), chunk_size)]
+
+    try:
+        results = await asyncio.gather(*(
+            crm_client.post("customer/index", branch,
+                            json={"id": chunk, "is_study": 2, "page": 0, "limit": len(chunk)})
+            for chunk in chunks
+        ))
+    except (httpx.HTTPError, CRMError):
+        return None
+
+    clients = {}
+    for result in results:
+        for item in result.get("items", []):
+            clients.setdefault(str(item.get("id")), item)
+    return clients
 
 
 async def get_tutor_groups_from_crm(tutor_crm_id: str, branch: str = None) -> Optional[Dict[str, Any]]:
@@ -124,139 +485,152 @@ async def get_tutor_groups_from_crm(tutor_crm_id: str, branch: str = None) -> Op
     """
     if not branch or not settings.crm_api_key:
         return None
-    
-    # Get token for authentication
-    token = await login_to_alfa_crm()
-    if not token:
-        return None
-    
-    url = f"{settings.crm_api_url}/v2api/{branch}/group/index"
+
     data = {"teacher_id": tutor_crm_id}
-    
-    headers = {**BASE_HEADERS, "X-ALFACRM-TOKEN": token}
-    
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(url, headers=headers, json=data)
-            response.raise_for_status()
-            result = response.json()
-            
-            all_groups = result.get("items", [])
-            if all_groups:
-                teacher_id_int = int(tutor_crm_id) if tutor_crm_id.isdigit() else tutor_crm_id
-                filtered_groups = []
-                for group in all_groups:
-                    # Check if the teacher is in this group by looking at the teachers list
-                    teachers = group.get("teachers", [])
-                    if any(teacher.get("id") == teacher_id_int for teacher in teachers):
-                        filtered_groups.append(group)
-                return filtered_groups
-            return None
-        except httpx.HTTPStatusError:
-            # Handle HTTP errors
-            return None
-        except httpx.RequestError:
-            # Handle request errors
-            return None
+
+    try:
+        result = await crm_client.post("group/index", branch, json=data)
+    except (httpx.HTTPError, CRMError):
+        return None
+
+    all_groups = result.get("items", [])
+    if all_groups:
+        teacher_id_int = int(tutor_crm_id) if tutor_crm_id.isdigit() else tutor_crm_id
+        filtered_groups = []
+        for group in all_groups:
+            # Check if the teacher is in this group by looking at the teachers list
+            teachers = group.get("teachers", [])
+            if any(teacher.get("id") == teacher_id_int for teacher in teachers):
+                filtered_groups.append(group)
+        return filtered_groups
+    return None
 
 
 async def get_group_clients_from_crm(group_id: str, branch: str = None) -> Optional[Dict[str, Any]]:
     """
-    Get clients in a group from external CRM system using the old get_clients_in_group logic
+    Get clients in a group from external CRM system using the old get_clients_in_group logic.
+    Clients whose details could not be read (lookup failed or customer missing) get a None
+    client_name, so callers can tell them from real names.
     """
     if not branch or not settings.crm_api_key:
         return None
 
-    # Get token for authentication
-    token = await login_to_alfa_crm()
-    if not token:
+    params = {"group_id": group_id}
+
+    try:
+        result = await crm_client.post("cgi/index", branch, params=params)
+    except (httpx.HTTPError, CRMError):
         return None
 
-    url = f"{settings.crm_api_url}/v2api/{branch}/cgi/index"
-    params = {"group_id": group_id}
+    customer_ids = [customer_id["customer_id"] for customer_id in result.get("items", [])]
+    client_names = []
 
-    headers = {**BASE_HEADERS, "X-ALFACRM-TOKEN": token}
+    clients_by_id = await get_clients_data_from_crm([str(customer_id) for customer_id in customer_ids], branch)
+    if clients_by_id is None:
+        # Batched lookup failed, resolve clients one by one (concurrency is bounded by the CRM client)
+        results = await asyncio.gather(*(get_client_data_from_crm(str(customer_id), branch) for customer_id in customer_ids))
+        clients_by_id = {str(customer_id): client_data
+                         for customer_id, client_data in zip(customer_ids, results) if client_data}
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(url, headers=headers, params=params)
-            response.raise_for_status()
-            result = response.json()
-
-            customer_ids = [customer_id["customer_id"] for customer_id in result.get("items", [])]
-            client_names = []
-
-            # For each customer_id, get client data
-            for customer_id in customer_ids:
-                # Note: This is recursive and might need to be optimized
-                client_data = await get_client_data_from_crm(str(customer_id), branch)
-                if client_data:
-                    client_name = client_data.get("name", "Неизвестный клиент")
-                    client_names.append(client_name)
-                else:
-                    client_names.append("Клиент не найден")
-
-            # Create the response format
-            clients_in_group = [{"customer_id": customer_id, "client_name": client_name}
-                               for customer_id, client_name in zip(customer_ids, client_names)]
-            return clients_in_group
-        except httpx.HTTPStatusError:
-            # Handle HTTP errors
-            return None
-        except httpx.RequestError:
-            # Handle request errors
-            return None
+    for customer_id in customer_ids:
+        client_data = clients_by_id.get(str(customer_id))
+        if client_data:
+            client_name = client_data.get("name", "Неизвестный клиент")
+            client_names.append(client_name)
+        else:
+            client_names.append(None)
 
+    # Create the response format
+    clients_in_group = [{"customer_id": customer_id, "client_name": client_name}
+                       for customer_id, client_name in zip(customer_ids, client_names)]
+    return clients_in_group
 
-async def get_all_groups() -> Optional[Dict[str, Any]]:
+
+async def get_crm_branch_ids() -> List[int]:
+    """
+    Branches to crawl: taken from settings.crm_branch_ids, or discovered via branch/index if not configured
+    """
+    if settings.crm_branch_ids:
+        return list(settings.crm_branch_ids)
+
+    try:
+        result = await crm_client.post("branch/index", json={"is_active": 1, "page": 0})
+    except (httpx.HTTPError, CRMError):
+        return []
+    return [item["id"] for item in result.get("items", []) if item.get("id") is not None]
+
+
+async def iter_all_groups(updated_since: Optional[Dict[str, str]] = None) -> AsyncIterator[List[Dict[str, Any]]]:
     """
-    Get all groups from external CRM system
+    Crawl groups of all branches and yield them page by page as the pages arrive.
+
+    Branches are crawled in parallel; once the first page of a branch reports "total",
+    the remaining pages of that branch are requested concurrently. Groups shared by
+    several branches are yielded once. Raises CRMError after the last page if any
+    branch could not be crawled completely.
+
+    updated_since maps a branch id to a CRM "updated_at" watermark: only groups changed
+    at or after it are requested and yielded for that branch.
     """
     if not settings.crm_api_key:
-        return None
+        return
+
+    branches = await get_crm_branch_ids()
+    if not branches:
+        raise CRMError("No CRM branches to crawl")
+
+    queue: asyncio.Queue = asyncio.Queue()
+    failed_branches = []
+
+    async def fetch_page(branch: int, page: int) -> Dict[str, Any]:
+        data = {"page": page, "limit": settings.crm_page_size}
+        since = (updated_since or {}).get(str(branch))
+        if since:
+            data[settings.crm_updated_since_filter] = since
+        result = await crm_client.post("group/index", branch, json=data)
+        items = result.get("items", [])
+        if since:
+            # Also filter locally in case the CRM ignores the filter
+            items = [group for group in items if (group.get("updated_at") or "") >= since]
+        if items:
+            await queue.put(items)
+        return result
+
+    async def crawl_branch(branch: int):
+        try:
+            first_page = await fetch_page(branch, 0)
+            page_size = len(first_page.get("items", [])) or settings.crm_page_size
+            page_count = math.ceil(first_page.get("total", 0) / page_size)
+            results = await asyncio.gather(*(fetch_page(branch, page) for page in range(1, page_count)),
+                                           return_exceptions=True)
+            if any(isinstance(result, Exception) for result in results):
+                failed_branches.append(branch)
+        except Exception:
+            failed_branches.append(branch)
+
+    async def crawl():
+        try:
+            await asyncio.gather(*(crawl_branch(branch) for branch in branches))
+        finally:
+            await queue.put(None)  # End of crawl marker
 
-    # Get token for authentication
-    token = await login_to_alfa_crm()
-    if not token:
-        return None
-    
-    all_items = []
-    branches = [1, 2, 3, 4]
-    
-    headers = {**BASE_HEADERS, "X-ALFACRM-TOKEN": token}
-    
-    for branch in branches:
-        page = 0
-        
+    crawl_task = asyncio.create_task(crawl())
+    seen_group_ids = set()
+    try:
         while True:
-            # Construct the URL for the current branch and page
-            url = f"{settings.crm_api_url}/v2api/{branch}/group/index"
-            data = {"page": page, "limit": 50}  # Assuming API supports pagination
-            
-            async with httpx.AsyncClient() as client:
-                try:
-                    response = await client.post(url, headers=headers, json=data)
-                    response.raise_for_status()
-                    result = response.json()
-                    
-                    items = result.get("items", [])
-                    current_page_count = len(items)
-                    total = result.get("total", 0)
-                    
-                    if current_page_count == 0:
-                        break  # No more data
-                    
-                    all_items.extend(items)
-                    page += 1
-                    
-                    # Additional protection: if we've collected all records
-                    if len(all_items) >= total > 0:
-                        break
-                except httpx.HTTPStatusError:
-                    # Handle HTTP errors
-                    break
-                except httpx.RequestError:
-                    # Handle request errors
-                    break
-    
-    return all_items
+            items = await queue.get()
+            if items is None:
+                break
+            page = [group for group in items if group.get("id") not in seen_group_ids]
+            seen_group_ids.update(group.get("id") for group in page)
+            if page:
+                yield page
+    finally:
+        if not crawl_task.done():
+            crawl_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await crawl_task
+
+    if failed_branches:
+        raise CRMError(f"Could not crawl groups for branches {sorted(failed_branches)}")
+
@@ -1,5 +1,6 @@
 from tortoise import Tortoise
 from config import settings
+from search import ensure_search_index
 
 async def init_db():
     await Tortoise.init(
@@ -7,6 +8,7 @@ async def init_db():
         modules={"models": ["models"]}
     )
     await Tortoise.generate_schemas()
+    await ensure_search_index()
 
 async def close_db():
     await Tortoise.close_connections()
@@ -0,0 +1,64 @@
+import time
+from typing import Any, Callable, List, Optional, Sequence
+
+# Every query Tortoise sends goes through one of these client methods
+DB_METHODS = ("execute_query", "execute_query_dict", "execute_insert", "execute_many", "execute_script")
+
+# Called after each query with the SQL, its parameters and the time it took in seconds
+QueryObserver = Callable[[str, Optional[Sequence[Any]], float], None]
+
+_observers: List[QueryObserver] = []
+_installed = False
+
+
+def _wrap(method):
+    async def observed(self, query, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await method(self, query, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            values = args[0] if args else kwargs.get("values")
+            for observer in _observers:
+                observer(query, values, elapsed)
+
+    observed.__wrapped__ = method
+    return observed
+
+
+def _install():
+    """
+    Wrap the query methods of every Tortoise client class, transactions included. The client
+    classes don't call each other's query methods, so every query is seen exactly once.
+    """
+    global _installed
+    if _installed:
+        return
+    from tortoise.backends.base.client import BaseDBAsyncClient
+    import tortoise.backends.sqlite  # noqa: F401 - register the client classes
+    try:
+        import tortoise.backends.asyncpg  # noqa: F401
+    except ImportError:
+        pass
+
+    classes = [BaseDBAsyncClient]
+    while classes:
+        cls = classes.pop()
+        classes.extend(cls.__subclasses__())
+        for name in DB_METHODS:
+            method = cls.__dict__.get(name)
+            if method is not None and not getattr(method, "__isabstractmethod__", False):
+                setattr(cls, name, _wrap(method))
+    _installed = True
+
+
+def add_query_observer(observer: QueryObserver):
+    """Call observer after every query from now on."""
+    _install()
+    if observer not in _observers:
+        _observers.append(observer)
+
+
+def remove_query_observer(observer: QueryObserver):
+    if observer in _observers:
+        _observers.remove(observer)
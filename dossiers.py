@@ -0,0 +1,104 @@
+import asyncio
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Type
+from pypika_tortoise import Case, Table, functions
+from pypika_tortoise.enums import SqlTypes
+from pypika_tortoise.queries import QueryBuilder
+from tortoise.models import Model
+import models
+
+# Record fields a dossier can return, see schemas.DossierField
+DOSSIER_FIELDS = ("id", "student_crm_id", "content", "is_verified", "created_at", "updated_at")
+
+
+def _project(record: Dict[str, Any], fields: Sequence[str]) -> Dict[str, Any]:
+    return {field: record[field] for field in fields if field in record}
+
+
+async def _records_by_student(model: Type[Model], student_crm_ids: List[str],
+                              fields: Sequence[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """Load the records of many students with one IN query, newest first, grouped by student_crm_id."""
+    # Grouping and the latest verified resume need these even when they are not returned
+    needed = set(fields) | {"id", "student_crm_id", "created_at", "is_verified"}
+    columns = [field for field in DOSSIER_FIELDS if field in needed and field in model._meta.fields_map]
+
+    records = defaultdict(list)
+    queryset = model.filter(student_crm_id__in=student_crm_ids).order_by("-created_at", "-id")
+    for record in await queryset.values(*columns):
+        records[record["student_crm_id"]].append(record)
+    return records
+
+
+async def load_student_dossiers(student_crm_ids: List[str], fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Resumes, latest verified resume and parent reviews of several students, in the order of
+    student_crm_ids. Runs one query per table; records carry only `fields` (all by default).
+    """
+    fields = list(fields or DOSSIER_FIELDS)
+    resumes, reviews = await asyncio.gather(
+        _records_by_student(models.Resume, student_crm_ids, fields),
+        _records_by_student(models.ParentReview, student_crm_ids, fields),
+    )
+
+    dossiers = []
+    for student_crm_id in student_crm_ids:
+        student_resumes = resumes.get(student_crm_id, [])
+        latest_verified = next((resume for resume in student_resumes if resume["is_verified"]), None)
+        dossiers.append({
+            "student_crm_id": student_crm_id,
+            "resumes": [_project(resume, fields) for resume in student_resumes],
+            "latest_verified_resume": _project(latest_verified, fields) if latest_verified else None,
+            "parent_reviews": [_project(review, fields) for review in reviews.get(student_crm_id, [])],
+        })
+    return dossiers
+
+
+def group_roster_query(group_id: int) -> QueryBuilder:
+    """One row per student of a group (or a single row without a student for an empty group) with resume stats."""
+    group, student, resume = (Table(model._meta.db_table) for model in (models.Group, models.Student, models.Resume))
+    # Resume.student_crm_id is a string: cast the student side so the join still uses the resume index
+    return (
+        models.Group._meta.db.query_class.from_(group)
+        .left_join(student).on(student.group_id == group.id)
+        .left_join(resume).on(resume.student_crm_id == functions.Cast(student.student_crm_id, SqlTypes.VARCHAR))
+        .where(group.id == group_id)
+        .groupby(group.id, group.name, student.id, student.student_crm_id, student.student_name)
+        .orderby(student.student_name)
+        .select(
+            group.name.as_("group_name"),
+            student.student_crm_id,
+            student.student_name,
+            functions.Count(resume.id).as_("resume_count"),
+            functions.Max(Case().when(resume.is_verified == True, 1).else_(0)).as_("verified"),  # noqa: E712
+            functions.Max(resume.updated_at).as_("last_updated_at"),
+        )
+    )
+
+
+async def load_group_roster(group_id: int) -> Optional[Dict[str, Any]]:
+    """
+    A group's students with their resume status, plus done/total counts for the group, from one
+    aggregate query joining Group, Student and Resume. Returns None when the group does not exist.
+    """
+    _, rows = await models.Group._meta.db.execute_query(group_roster_query(group_id).get_sql())
+    if not rows:
+        return None
+
+    students = [
+        {
+            "customer_id": row["student_crm_id"],
+            "client_name": row["student_name"],
+            "resume_count": row["resume_count"],
+            "is_verified": bool(row["verified"]),
+            "last_updated_at": row["last_updated_at"],
+        }
+        for row in rows if row["student_crm_id"] is not None
+    ]
+    return {
+        "group_id": group_id,
+        "group_name": rows[0]["group_name"],
+        "total": len(students),
+        "with_resume": sum(1 for student in students if student["resume_count"]),
+        "done": sum(1 for student in students if student["is_verified"]),  # students with a verified resume
+        "students": students,
+    }
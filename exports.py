@@ -0,0 +1,75 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+from tortoise.queryset import QuerySet
+from config import settings
+from query_accounting import expect_repeated_queries
+
+EXPORT_FIELDS = {
+    "resumes": ("id", "student_crm_id", "content", "is_verified", "created_at", "updated_at"),
+    "reviews": ("id", "student_crm_id", "content", "created_at", "updated_at"),
+}
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+async def iter_record_chunks(queryset: QuerySet, fields: Sequence[str],
+                             chunk_size: Optional[int] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Read a queryset in id order, chunk_size rows per query (keyset on id), so memory use does not
+    depend on the number of rows. Rows are plain dicts with `fields` (which must include "id").
+    """
+    # One query per chunk is the point, not an N+1
+    expect_repeated_queries()
+    chunk_size = chunk_size or settings.export_chunk_size
+    last_id = None
+    while True:
+        chunk_queryset = queryset if last_id is None else queryset.filter(id__gt=last_id)
+        rows = await chunk_queryset.order_by("id").limit(chunk_size).values(*fields)
+        if not rows:
+            return
+        yield rows
+        if len(rows) < chunk_size:
+            return
+        last_id = rows[-1]["id"]
+
+
+def _export_value(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+async def iter_export(queryset: QuerySet, fields: Sequence[str], export_format: str) -> AsyncIterator[bytes]:
+    """Stream a queryset as NDJSON lines or CSV (with a header row), one encoded block per chunk."""
+    if export_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        async for rows in iter_record_chunks(queryset, fields):
+            for row in rows:
+                writer.writerow([_export_value(row[field]) for field in fields])
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            # Only the header is left when there are no rows
+            yield buffer.getvalue().encode()
+    else:
+        async for rows in iter_record_chunks(queryset, fields):
+            lines = (json.dumps({field: _export_value(row[field]) for field in fields}, ensure_ascii=False) for row in rows)
+            yield ("\n".join(lines) + "\n").encode()
+
+
+async def gzip_stream(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Gzip a byte stream on the fly."""
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,218 @@
+"""
+Local stand-in for the AlfaCRM v2api, for benchmarks and manual testing without the real CRM.
+
+    python fake_crm.py --port 8101 --branches 3 --groups-per-branch 50 --latency-ms 80 --error-rate 0.01
+
+Point the API at it with CRM_API_URL=http://127.0.0.1:8101 (any CRM_EMAIL / CRM_API_KEY works).
+Implements auth/login, branch/index, teacher/index, group/index, customer/index and cgi/index
+over a generated dataset, with configurable latency and error rate. GET /_stats returns the
+number of calls per endpoint; POST /_stats/reset clears them.
+"""
+import argparse
+import asyncio
+import random
+import secrets
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+PAGE_LIMIT_MAX = 50  # AlfaCRM caps "limit" at 50
+UPDATED_AT = "2026-01-01 00:00:00"
+
+
+@dataclass
+class FakeCRMOptions:
+    branches: int = 3
+    teachers_per_branch: int = 10
+    groups_per_branch: int = 50
+    students_per_group: int = 12
+    latency_ms: float = 50.0  # Mean added latency of every call
+    jitter_ms: float = 20.0  # Latency varies uniformly by +/- this much
+    error_rate: float = 0.0  # Share of data calls answered with HTTP 500
+    seed: int = 1
+
+
+def teacher_phone(branch: int, index: int) -> str:
+    """Phone number of the index-th teacher of a branch, as registered in the dataset."""
+    return f"+3752{branch:02d}{index:05d}"
+
+
+class FakeCRM:
+    """Generated dataset and the behaviour of the fake endpoints."""
+
+    def __init__(self, options: FakeCRMOptions):
+        self.options = options
+        self.random = random.Random(options.seed)
+        self.tokens = set()
+        self.calls = Counter()
+        self.errors = 0
+
+        self.branches = [{"id": branch, "name": f"Филиал {branch}", "is_active": 1} for branch in range(1, options.branches + 1)]
+        self.teachers: List[Dict[str, Any]] = []
+        self.groups: List[Dict[str, Any]] = []
+        self.customers: Dict[int, Dict[str, Any]] = {}
+        self.group_customers: Dict[int, List[int]] = {}
+        for branch in range(1, options.branches + 1):
+            teacher_ids = []
+            for index in range(options.teachers_per_branch):
+                teacher_id = branch * 1000 + index
+                teacher_ids.append(teacher_id)
+                self.teachers.append({
+                    "id": teacher_id, "branch_ids": [branch], "name": f"Преподаватель {teacher_id}",
+                    "phone": [teacher_phone(branch, index)], "email": [], "web": [], "addr": [],
+                    "dob": None, "gender": None, "streaming_id": None, "note": None, "e_date": None,
+                    "avatar_url": None, "teacher-to-skill": {},
+                })
+            for index in range(options.groups_per_branch):
+                group_id = branch * 10000 + index
+                teacher_id = teacher_ids[index % len(teacher_ids)] if teacher_ids else None
+                self.groups.append({
+                    "id": group_id, "branch_ids": [branch], "teacher_ids": [teacher_id] if teacher_id else [],
+                    "teachers": [{"id": teacher_id}] if teacher_id else [],
+                    "name": f"Группа {group_id}", "level_id": 1, "status_id": 1, "company_id": 1,
+                    "streaming_id": None, "limit": options.students_per_group, "note": None,
+                    "b_date": "01.09.2025", "e_date": "31.05.2026", "created_at": UPDATED_AT,
+                    "updated_at": UPDATED_AT, "custom_aerodromnaya": None,
+                })
+                customer_ids = [group_id * 100 + number for number in range(options.students_per_group)]
+                self.group_customers[group_id] = customer_ids
+                for customer_id in customer_ids:
+                    self.customers[customer_id] = {
+                        "id": customer_id, "branch_ids": [branch], "name": f"Ученик {customer_id}",
+                        "is_study": 1, "phone": [], "email": [],
+                    }
+
+    async def delay(self):
+        options = self.options
+        latency = options.latency_ms + self.random.uniform(-options.jitter_ms, options.jitter_ms)
+        if latency > 0:
+            await asyncio.sleep(latency / 1000)
+
+    def fails(self) -> bool:
+        return self.options.error_rate > 0 and self.random.random() < self.options.error_rate
+
+
+def _page(items: List[Dict[str, Any]], data: Dict[str, Any]) -> Dict[str, Any]:
+    page = int(data.get("page") or 0)
+    limit = min(int(data.get("limit") or PAGE_LIMIT_MAX), PAGE_LIMIT_MAX)
+    chunk = items[page * limit:(page + 1) * limit]
+    return {"total": len(items), "count": len(chunk), "page": page, "items": chunk}
+
+
+def _ids(value: Any) -> Optional[set]:
+    if value is None:
+        return None
+    values = value if isinstance(value, list) else [value]
+    return {int(item) for item in values if str(item).isdigit()}
+
+
+def create_app(fake: FakeCRM) -> FastAPI:
+    app = FastAPI(title="Fake AlfaCRM")
+
+    async def body(request: Request) -> Dict[str, Any]:
+        try:
+            data = await request.json()
+        except ValueError:
+            data = None
+        return data if isinstance(data, dict) else {}
+
+    async def handle(request: Request, endpoint: str, branch: Optional[int]) -> JSONResponse:
+        fake.calls[endpoint] += 1
+        await fake.delay()
+        if endpoint == "auth/login":
+            data = await body(request)
+            if not data.get("email") or not data.get("api_key"):
+                return JSONResponse({"message": "Wrong credentials"}, status_code=403)
+            token = secrets.token_hex(16)
+            fake.tokens.add(token)
+            return JSONResponse({"token": token})
+
+        if request.headers.get("X-ALFACRM-TOKEN") not in fake.tokens:
+            return JSONResponse({"message": "Unauthorized"}, status_code=401)
+        if fake.fails():
+            fake.errors += 1
+            return JSONResponse({"message": "Internal error"}, status_code=500)
+
+        data = await body(request)
+        if endpoint == "branch/index":
+            return JSONResponse(_page(fake.branches, data))
+        if branch is None or branch > len(fake.branches):
+            return JSONResponse({"message": "Not found"}, status_code=404)
+
+        if endpoint == "teacher/index":
+            items = [teacher for teacher in fake.teachers if branch in teacher["branch_ids"]]
+            if data.get("phone"):
+                items = [teacher for teacher in items if data["phone"] in teacher["phone"]]
+            ids = _ids(data.get("id"))
+            if ids is not None:
+                items = [teacher for teacher in items if teacher["id"] in ids]
+            return JSONResponse(_page(items, data))
+        if endpoint == "group/index":
+            items = [group for group in fake.groups if branch in group["branch_ids"]]
+            if data.get("teacher_id"):
+                items = [group for group in items if int(data["teacher_id"]) in group["teacher_ids"]]
+            if data.get("updated_at_from"):
+                items = [group for group in items if group["updated_at"] >= data["updated_at_from"]]
+            return JSONResponse(_page(items, data))
+        if endpoint == "customer/index":
+            ids = _ids(data.get("id"))
+            items = [customer for customer in fake.customers.values() if branch in customer["branch_ids"]
+                     and (ids is None or customer["id"] in ids)]
+            return JSONResponse(_page(items, data))
+        if endpoint == "cgi/index":
+            group_id = request.query_params.get("group_id") or data.get("group_id")
+            customer_ids = fake.group_customers.get(int(group_id), []) if str(group_id).isdigit() else []
+            items = [{"customer_id": customer_id, "group_id": int(group_id)} for customer_id in customer_ids]
+            return JSONResponse(_page(items, data))
+        return JSONResponse({"message": "Not found"}, status_code=404)
+
+    @app.post("/v2api/{endpoint_group}/{action}")
+    async def unbranched(endpoint_group: str, action: str, request: Request):
+        return await handle(request, f"{endpoint_group}/{action}", None)
+
+    @app.post("/v2api/{branch}/{endpoint_group}/{action}")
+    async def branched(branch: int, endpoint_group: str, action: str, request: Request):
+        return await handle(request, f"{endpoint_group}/{action}", branch)
+
+    @app.get("/_stats")
+    async def stats():
+        return {"calls": dict(fake.calls), "errors": fake.errors}
+
+    @app.post("/_stats/reset")
+    async def reset_stats():
+        fake.calls.clear()
+        fake.errors = 0
+        return {"calls": {}, "errors": 0}
+
+    return app
+
+
+def add_options_arguments(parser: argparse.ArgumentParser, prefix: str = ""):
+    """CLI flags for FakeCRMOptions (shared with bench_load.py, which prefixes them with "crm-")."""
+    defaults = FakeCRMOptions()
+    parser.add_argument(f"--{prefix}branches", type=int, default=defaults.branches)
+    parser.add_argument(f"--{prefix}teachers-per-branch", type=int, default=defaults.teachers_per_branch)
+    parser.add_argument(f"--{prefix}groups-per-branch", type=int, default=defaults.groups_per_branch)
+    parser.add_argument(f"--{prefix}students-per-group", type=int, default=defaults.students_per_group)
+    parser.add_argument(f"--{prefix}latency-ms", type=float, default=defaults.latency_ms)
+    parser.add_argument(f"--{prefix}jitter-ms", type=float, default=defaults.jitter_ms)
+    parser.add_argument(f"--{prefix}error-rate", type=float, default=defaults.error_rate)
+    parser.add_argument(f"--{prefix}seed", type=int, default=defaults.seed)
+
+
+def options_from_arguments(args: argparse.Namespace, prefix: str = "") -> FakeCRMOptions:
+    prefix = prefix.replace("-", "_")
+    return FakeCRMOptions(**{field: getattr(args, prefix + field) for field in FakeCRMOptions.__dataclass_fields__})
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local AlfaCRM stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8101)
+    add_options_arguments(parser)
+    args = parser.parse_args()
+    uvicorn.run(create_app(FakeCRM(options_from_arguments(args))), host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,244 @@
+"""
+Fill the configured database with a synthetic dataset for performance testing.
+
+    python generate_dataset.py                      # base size: 5 branches, 200 groups, 2400 students
+    python generate_dataset.py --scale 10           # 10x every count
+    python generate_dataset.py --scale 100 --branch-skew 1.5 --resumes-per-student 5
+    DATABASE_URL=postgres://... python generate_dataset.py --scale 10
+
+Sizes are skewed like the real data: branches get groups with Zipf weights (a few huge
+branches, many small ones), groups get students the same way (long-tail groups), and the
+number of resumes / reviews per student is exponentially distributed. Rows are added next to
+whatever is already in the database (CRM ids continue after the current maximum) and written
+with bulk inserts in batches. Same seed, same data.
+"""
+import argparse
+import asyncio
+import bisect
+import itertools
+import random
+import time
+from dataclasses import dataclass, fields as dataclass_fields
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Sequence
+from tortoise import Tortoise, timezone
+from tortoise.expressions import F
+from tortoise.transactions import in_transaction
+import models
+from app import TORTOISE_CONFIG
+from conditional import GROUPS, RESUMES, STUDENTS, bump_versions
+from search import ensure_search_index
+
+FIRST_NAMES = ["Артём", "Мария", "Иван", "Анна", "Максим", "София", "Лев", "Ева", "Марк", "Алиса", "Тимур", "Вера",
+               "Даниил", "Полина", "Кирилл", "Ульяна", "Егор", "Ксения", "Матвей", "Дарья"]
+LAST_NAMES = ["Иванов", "Петров", "Сидоров", "Козлов", "Новиков", "Морозов", "Волков", "Соколов", "Лебедев", "Орлов"]
+TOPICS = ["Scratch", "Python", "робототехника", "Minecraft", "Roblox", "3D-моделирование", "веб-дизайн", "Tinkercad",
+          "анимация", "кибербезопасность", "логика", "алгоритмы", "LEGO WeDo", "Arduino", "видеомонтаж"]
+PHRASES = [
+    "уверенно работает с {topic}", "быстро освоил(а) {topic}", "нужна помощь с темой «{topic}»",
+    "защитил(а) проект по {topic}", "проявляет интерес к {topic}", "помогает одногруппникам с {topic}",
+    "пропустил(а) занятия по {topic}", "делает успехи в {topic}", "рекомендуем углублённый курс: {topic}",
+]
+REVIEW_PHRASES = [
+    "Ребёнок с удовольствием ходит на занятия.", "Спасибо тьютору за внимание!", "Хотелось бы больше практики по {topic}.",
+    "Дома рассказывает про {topic}.", "Довольны прогрессом.", "Просим обратную связь чаще.",
+]
+
+
+@dataclass
+class DatasetOptions:
+    branches: int = 5
+    tutors: int = 60
+    groups: int = 200
+    students: int = 2400
+    resumes_per_student: float = 3.0  # Mean; per student counts are exponentially distributed
+    reviews_per_student: float = 1.0
+    branch_skew: float = 1.2  # Zipf exponent of the branch sizes, 0 for equal branches
+    group_skew: float = 0.8  # Zipf exponent of the group sizes
+    verified_share: float = 0.6
+    days: int = 365  # Records are spread over this many past days
+    seed: int = 1
+    batch_size: int = 2000
+
+    def scaled(self, scale: float) -> "DatasetOptions":
+        counts = {name: max(1, int(round(getattr(self, name) * scale))) for name in ("tutors", "groups", "students")}
+        return DatasetOptions(**{**vars(self), **counts})
+
+
+class WeightedChoice:
+    """Draw indexes 0..n-1 with Zipf weights 1 / (rank + 1) ** skew, in O(log n) per draw."""
+
+    def __init__(self, rng: random.Random, n: int, skew: float):
+        self.rng = rng
+        weights = [1 / (rank + 1) ** skew for rank in range(n)]
+        rng.shuffle(weights)  # The big ones are not always the first ids
+        self.cumulative = list(itertools.accumulate(weights))
+
+    def __call__(self) -> int:
+        return bisect.bisect_left(self.cumulative, self.rng.random() * self.cumulative[-1])
+
+
+def person_name(rng: random.Random) -> str:
+    return f"{rng.choice(LAST_NAMES)} {rng.choice(FIRST_NAMES)}"
+
+
+def resume_text(rng: random.Random) -> str:
+    sentences = [rng.choice(PHRASES).format(topic=rng.choice(TOPICS)) for _ in range(rng.randint(3, 12))]
+    return (". ".join(sentences) + ".").capitalize()
+
+
+def review_text(rng: random.Random) -> str:
+    return " ".join(rng.choice(REVIEW_PHRASES).format(topic=rng.choice(TOPICS)) for _ in range(rng.randint(1, 4)))
+
+
+def record_count(rng: random.Random, mean: float) -> int:
+    return round(rng.expovariate(1 / mean)) if mean > 0 else 0
+
+
+def _batches(items: Iterator, size: int) -> Iterator[List]:
+    while True:
+        batch = list(itertools.islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+async def _next_int(model, field: str) -> int:
+    values = await model.all().values_list(field, flat=True)
+    numbers = [int(value) for value in values if str(value).isdigit()]
+    return max(numbers, default=0) + 1
+
+
+async def _bulk_insert(model, rows: Sequence, batch_size: int):
+    async with in_transaction() as connection:
+        await model.bulk_create(rows, batch_size=batch_size, using_db=connection)
+
+
+async def generate_dataset(options: DatasetOptions) -> Dict[str, int]:
+    rng = random.Random(options.seed)
+    now = timezone.now()
+    counts = {}
+    started = time.monotonic()
+
+    def created_at() -> datetime:
+        return now - timedelta(seconds=rng.randrange(options.days * 86400))
+
+    # Tutors, spread over branches like the groups
+    branch_choice = WeightedChoice(rng, options.branches, options.branch_skew)
+    tutor_base = await _next_int(models.TutorProfile, "tutor_crm_id")
+    tutors_by_branch: Dict[int, List[str]] = {branch: [] for branch in range(1, options.branches + 1)}
+    tutors = []
+    for number in range(options.tutors):
+        branch = branch_choice() + 1
+        tutor_crm_id = str(tutor_base + number)
+        tutors_by_branch[branch].append(tutor_crm_id)
+        tutors.append(models.TutorProfile(
+            tutor_crm_id=tutor_crm_id, tutor_name=person_name(rng), branch=str(branch), branch_ids=[branch],
+            is_senior=rng.random() < 0.05, phone_number=f"+999{tutor_base + number:09d}", crm_synced_at=now))
+    await _bulk_insert(models.TutorProfile, tutors, options.batch_size)
+    counts["tutors"] = len(tutors)
+
+    # Groups and their teacher links
+    group_base = await _next_int(models.Group, "crm_group_id")
+    groups = []
+    teacher_ids = {}
+    for number in range(options.groups):
+        branch = branch_choice() + 1
+        crm_group_id = group_base + number
+        candidates = tutors_by_branch[branch] or [tutor.tutor_crm_id for tutor in tutors]
+        teacher_ids[crm_group_id] = rng.sample(candidates, min(len(candidates), rng.choice((1, 1, 1, 2))))
+        group_created = created_at().strftime("%Y-%m-%d %H:%M:%S")
+        groups.append(models.Group(
+            crm_group_id=crm_group_id, branch_ids=[branch], teacher_ids=[int(t) for t in teacher_ids[crm_group_id]],
+            name=f"{rng.choice(TOPICS)} {rng.randint(1, 4)}-{number}", level_id=rng.randint(1, 6), status_id=1,
+            company_id=1, limit=12, b_date="01.09.2025", e_date="31.05.2026", created_at=group_created,
+            updated_at=group_created))
+    for batch in _batches(iter(groups), options.batch_size):
+        await _bulk_insert(models.Group, batch, options.batch_size)
+    group_ids = dict(await models.Group.filter(crm_group_id__gte=group_base).values_list("crm_group_id", "id"))
+    links = [models.GroupTeacher(group_id=group_ids[crm_group_id], tutor_crm_id=tutor_crm_id)
+             for crm_group_id, tutor_crm_ids in teacher_ids.items() for tutor_crm_id in tutor_crm_ids]
+    for batch in _batches(iter(links), options.batch_size):
+        await _bulk_insert(models.GroupTeacher, batch, options.batch_size)
+    branch_links = [models.GroupBranch(group_id=group_ids[group.crm_group_id], branch=str(branch))
+                    for group in groups for branch in group.branch_ids]
+    for batch in _batches(iter(branch_links), options.batch_size):
+        await _bulk_insert(models.GroupBranch, batch, options.batch_size)
+    counts["groups"] = len(groups)
+    counts["group_teachers"] = len(links)
+    counts["group_branches"] = len(branch_links)
+
+    # Students, with long-tail group sizes
+    group_choice = WeightedChoice(rng, options.groups, options.group_skew)
+    local_group_ids = [group_ids[group_base + number] for number in range(options.groups)]
+    student_base = await _next_int(models.Student, "student_crm_id")
+    students = (models.Student(student_crm_id=student_base + number, student_name=person_name(rng),
+                               group_id=local_group_ids[group_choice()])
+                for number in range(options.students))
+    for batch in _batches(students, options.batch_size):
+        await _bulk_insert(models.Student, batch, options.batch_size)
+    counts["students"] = options.students
+
+    # Resumes and parent reviews, streamed in batches
+    first_resume_id = await _next_int(models.Resume, "id")
+    first_review_id = await _next_int(models.ParentReview, "id")
+
+    def records() -> Iterator:
+        for number in range(options.students):
+            student_crm_id = str(student_base + number)
+            for _ in range(record_count(rng, options.resumes_per_student)):
+                timestamp = created_at()
+                yield models.Resume(student_crm_id=student_crm_id, content=resume_text(rng), created_at=timestamp,
+                                    is_verified=rng.random() < options.verified_share)
+            for _ in range(record_count(rng, options.reviews_per_student)):
+                yield models.ParentReview(student_crm_id=student_crm_id, content=review_text(rng), created_at=created_at())
+
+    counts["resumes"] = counts["parent_reviews"] = 0
+    for batch in _batches(records(), options.batch_size):
+        resumes = [record for record in batch if isinstance(record, models.Resume)]
+        reviews = [record for record in batch if isinstance(record, models.ParentReview)]
+        async with in_transaction() as connection:
+            if resumes:
+                await models.Resume.bulk_create(resumes, batch_size=options.batch_size, using_db=connection)
+            if reviews:
+                await models.ParentReview.bulk_create(reviews, batch_size=options.batch_size, using_db=connection)
+        counts["resumes"] += len(resumes)
+        counts["parent_reviews"] += len(reviews)
+        print(f"{counts['resumes']} resumes, {counts['parent_reviews']} reviews ({time.monotonic() - started:.0f}s)")
+
+    # updated_at is auto_now, so bulk_create stamped every row with the current time
+    await models.Resume.filter(id__gte=first_resume_id).update(updated_at=F("created_at"))
+    await models.ParentReview.filter(id__gte=first_review_id).update(updated_at=F("created_at"))
+    await bump_versions([GROUPS, STUDENTS, RESUMES])
+
+    counts["seconds"] = round(time.monotonic() - started, 1)
+    return counts
+
+
+async def main(options: DatasetOptions, database_url: str = None):
+    config = TORTOISE_CONFIG
+    if database_url:
+        config = {**config, "connections": {"default": database_url}}
+    await Tortoise.init(config=config)
+    await Tortoise.generate_schemas()
+    await ensure_search_index()
+    try:
+        counts = await generate_dataset(options)
+    finally:
+        await Tortoise.close_connections()
+    print("Generated " + ", ".join(f"{value} {name}" for name, value in counts.items() if name != "seconds")
+          + f" in {counts['seconds']}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply the tutor, group and student counts")
+    parser.add_argument("--database-url", help="Instead of the configured DATABASE_URL")
+    defaults = DatasetOptions()
+    for field in dataclass_fields(DatasetOptions):
+        parser.add_argument(f"--{field.name.replace('_', '-')}", type=type(getattr(defaults, field.name)), default=None)
+    args = parser.parse_args()
+
+    options = DatasetOptions(**{field.name: getattr(args, field.name) for field in dataclass_fields(DatasetOptions)
+                                if getattr(args, field.name) is not None})
+    asyncio.run(main(options.scaled(args.scale), args.database_url))
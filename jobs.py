@@ -0,0 +1,254 @@
+import asyncio
+import contextlib
+import logging
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from tortoise import timezone
+from tortoise.exceptions import IntegrityError
+from tortoise.expressions import Q
+import metrics
+import models
+from config import settings
+from query_accounting import track_queries
+from sync import ProgressCallback, SYNC_MODES, run_groups_sync, run_students_sync
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = list(models.ACTIVE_JOB_STATUSES)
+PROGRESS_UPDATE_INTERVAL_SECONDS = 1.0
+# Unique among live processes; a restarted process can only reuse it once the old one is gone
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+async def _groups_sync_job(job: models.SyncJob, progress: ProgressCallback) -> Dict[str, Any]:
+    return await run_groups_sync(job.params.get("mode", "auto"), progress=progress)
+
+
+async def _students_sync_job(job: models.SyncJob, progress: ProgressCallback) -> Dict[str, Any]:
+    return await run_students_sync(job.params.get("mode", "auto"), branch=job.params.get("branch"), progress=progress)
+
+
+JOB_HANDLERS: Dict[str, Callable[[models.SyncJob, ProgressCallback], Awaitable[Dict[str, Any]]]] = {
+    "groups_sync": _groups_sync_job,
+    "students_sync": _students_sync_job,
+}
+
+_tasks: List[asyncio.Task] = []
+
+
+async def enqueue_job(job_type: str, params: Optional[Dict[str, Any]] = None,
+                      requested_by: Optional[int] = None) -> Tuple[models.SyncJob, bool]:
+    """
+    Queue a job unless one of the same type is already queued or running (single flight).
+    Returns the job and whether it was newly created. Queued jobs are picked up from the DB by
+    the worker of any process running the job runner, so this works with jobs_enabled=False too.
+    Single flight holds across processes: the uidx_syncjob_active_type index rejects a second
+    active job of a type, so only one of several concurrent callers creates it.
+    """
+    if job_type not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job type: {job_type}")
+    params = params or {}
+    if params.get("mode", "auto") not in SYNC_MODES:
+        raise ValueError(f"Unknown sync mode: {params['mode']}")
+
+    while True:
+        active_job = await models.SyncJob.filter(job_type=job_type, status__in=ACTIVE_STATUSES).first()
+        if active_job:
+            return active_job, False
+        try:
+            return await models.SyncJob.create(job_type=job_type, params=params, requested_by=requested_by), True
+        except IntegrityError:
+            # Another caller queued one since the check; return it (or retry if it already finished)
+            continue
+
+
+def _progress_reporter(job_id: int) -> ProgressCallback:
+    last_update = 0.0
+
+    async def report(done: int, total: Optional[int]):
+        nonlocal last_update
+        now = time.monotonic()
+        # Throttle progress writes, but always store the final step
+        if now - last_update < PROGRESS_UPDATE_INTERVAL_SECONDS and (total is None or done < total):
+            return
+        last_update = now
+        await models.SyncJob.filter(id=job_id).update(progress=done, total=total)
+
+    return report
+
+
+async def claim_job(job_id: int) -> bool:
+    """Mark a queued job as running in this process. Only one process can claim a job."""
+    now = timezone.now()
+    claimed = await models.SyncJob.filter(id=job_id, status="queued").update(
+        status="running", worker_id=WORKER_ID, started_at=now, heartbeat_at=now)
+    return claimed == 1
+
+
+async def _heartbeat(job_id: int):
+    while True:
+        await asyncio.sleep(settings.jobs_heartbeat_seconds)
+        try:
+            await models.SyncJob.filter(id=job_id, status="running", worker_id=WORKER_ID).update(heartbeat_at=timezone.now())
+        except Exception:
+            logger.exception("Could not refresh the heartbeat of job %s", job_id)
+
+
+async def run_job(job_id: int) -> bool:
+    """Claim a queued job, run it and store its outcome. Returns False if the job was not queued."""
+    if not await claim_job(job_id):
+        return False
+    job = await models.SyncJob.get(id=job_id)
+
+    started = time.perf_counter()
+    heartbeat = asyncio.create_task(_heartbeat(job.id))
+    # Jobs repeat batch and progress queries by design, so only slow queries are reported
+    with metrics.db_queries_as(f"job:{job.job_type}"), \
+            track_queries(f"job {job.id} ({job.job_type})", report_repeated=False) as query_stats:
+        try:
+            result = await JOB_HANDLERS[job.job_type](job, _progress_reporter(job.id))
+            await models.SyncJob.filter(id=job.id).update(status="succeeded", result=result, finished_at=timezone.now())
+            job_status = "succeeded"
+        except Exception as e:
+            logger.exception("Job %s (%s) failed", job.id, job.job_type)
+            await models.SyncJob.filter(id=job.id).update(status="failed", error=str(e), finished_at=timezone.now())
+            job_status = "failed"
+        finally:
+            heartbeat.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await heartbeat
+    metrics.SYNC_JOB_DURATION.labels(job.job_type, job_status).observe(time.perf_counter() - started)
+    logger.info("Job %s (%s) %s: %d queries in %.0f ms", job.id, job.job_type, job_status, query_stats.count,
+                query_stats.seconds * 1000)
+    return True
+
+
+async def run_next_job() -> bool:
+    """Run the oldest queued job this process manages to claim. Returns False if there was none."""
+    for job_id in await models.SyncJob.filter(status="queued").order_by("id").values_list("id", flat=True):
+        if await run_job(job_id):
+            return True
+    return False
+
+
+async def fail_abandoned_jobs(include_own: bool = False) -> int:
+    """
+    Fail running jobs whose process stopped refreshing their heartbeat, and with include_own
+    those recorded under this process's WORKER_ID (left behind by a previous process with the
+    same id). Jobs of other live processes are left alone. Returns the number of failed jobs.
+    """
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=settings.jobs_stale_after_seconds)
+    abandoned = Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    if include_own:
+        abandoned |= Q(worker_id=WORKER_ID)
+    failed = await models.SyncJob.filter(abandoned, status="running").update(
+        status="failed", error="Interrupted: the worker running it stopped", finished_at=now)
+    if failed:
+        logger.warning("Failed %d abandoned job(s)", failed)
+    return failed
+
+
+async def _worker():
+    last_cleanup = time.monotonic()
+    while True:
+        try:
+            if time.monotonic() - last_cleanup >= settings.jobs_heartbeat_seconds:
+                last_cleanup = time.monotonic()
+                await fail_abandoned_jobs()
+            ran = await run_next_job()
+        except Exception:
+            logger.exception("Job worker iteration failed")
+            ran = False
+        if not ran:
+            await asyncio.sleep(settings.jobs_poll_interval_seconds)
+
+
+def _cron_field_matches(field: str, value: int, low: int, high: int) -> bool:
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start_text, end_text = part.split("-", 1)
+            start, end = int(start_text), int(end_text)
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        if start <= value <= end and (value - start) % step == 0:
+            return True
+    return False
+
+
+def cron_matches(expression: str, moment: datetime) -> bool:
+    """
+    Check a standard five-field cron expression (minute hour day-of-month month day-of-week)
+    against a moment. Supports "*", numbers, ranges, lists and steps; Sunday is 0 or 7.
+    """
+    minute, hour, day, month, weekday = expression.split()
+    cron_weekday = (moment.weekday() + 1) % 7
+    weekday_matches = (_cron_field_matches(weekday, cron_weekday, 0, 7)
+                       or (cron_weekday == 0 and _cron_field_matches(weekday, 7, 0, 7)))
+    day_matches = _cron_field_matches(day, moment.day, 1, 31)
+    if day != "*" and weekday != "*":
+        # Like cron: when both are restricted, either one may match
+        date_matches = day_matches or weekday_matches
+    else:
+        date_matches = day_matches and weekday_matches
+
+    return (_cron_field_matches(minute, moment.minute, 0, 59)
+            and _cron_field_matches(hour, moment.hour, 0, 23)
+            and _cron_field_matches(month, moment.month, 1, 12)
+            and date_matches)
+
+
+def _schedules() -> Dict[str, Optional[str]]:
+    return {
+        "groups_sync": settings.sync_groups_cron,
+        "students_sync": settings.sync_students_cron,
+    }
+
+
+async def _scheduler():
+    while True:
+        now = datetime.now()
+        next_minute = now.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        await asyncio.sleep((next_minute - now).total_seconds())
+        for job_type, expression in _schedules().items():
+            if not expression:
+                continue
+            try:
+                if cron_matches(expression, next_minute):
+                    await enqueue_job(job_type, {"mode": "auto"})
+            except Exception:
+                logger.exception("Could not schedule job %s", job_type)
+
+
+async def start_job_runner():
+    """
+    Start the job worker and the scheduler. Call once the database is initialized.
+    The worker claims queued jobs from the DB, so several processes can run it side by side.
+    """
+    global _tasks
+    if not settings.jobs_enabled:
+        return
+
+    # Jobs this worker id was running before a restart will never finish
+    await fail_abandoned_jobs(include_own=True)
+    _tasks = [asyncio.create_task(_worker()), asyncio.create_task(_scheduler())]
+
+
+async def stop_job_runner():
+    global _tasks
+    for task in _tasks:
+        task.cancel()
+    for task in _tasks:
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+    _tasks = []
@@ -1,96 +1,269 @@
+import argparse
 import asyncio
 import json
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type
 from tortoise import Tortoise
+from tortoise.models import Model
+from tortoise.transactions import in_transaction
 from app import TORTOISE_CONFIG
-import models  # Import the models module as 'models'
+from conditional import bump_versions, resume_entities
+from search import ensure_search_index
 from models import TutorProfile, Resume, ParentReview # Explicitly import model classes
-from config import settings
-from datetime import datetime
-from typing import List
-
-async def load_fixtures_from_file(fixture_path: str):
-    with open(fixture_path, 'r') as f:
-        fixtures = json.load(f)
-
-    # Dictionary to map fixture model names (lowercase) to actual model classes
-    model_mapping = {
-        "tutorprofile": TutorProfile,
-        "resume": Resume,
-        "parentreview": ParentReview,
-    }
-
-    for entry in fixtures:
-        # Assume the entry is directly the model's data
-        fields_to_create = entry.copy()
-        pk = fields_to_create.pop("id", None) # Extract 'id' as primary key
-
-        if pk is None:
-            print(f"Entry missing 'id' field, skipping: {entry}")
-            continue
 
-        # Convert datetime strings to datetime objects
-        for dt_field in ["created_at", "updated_at"]:
-            if dt_field in fields_to_create and isinstance(fields_to_create[dt_field], str):
+DEFAULT_BATCH_SIZE = 1000
+READ_CHUNK_SIZE = 1024 * 1024
+PROGRESS_INTERVAL_SECONDS = 5.0
+
+# Characters allowed between entries: the brackets and commas of a JSON array, or the newlines of NDJSON
+ENTRY_SEPARATORS = " \t\r\n,[]"
+
+
+def iter_fixture_entries(fixture_path: str, read_chunk_size: int = READ_CHUNK_SIZE) -> Iterator[Any]:
+    """
+    Stream the entries of a fixture file without loading it whole. Accepts a JSON array of
+    objects or NDJSON (one object per line); the file is read in chunks and each entry is
+    decoded as soon as it is complete.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    with open(fixture_path, "r", encoding="utf-8") as f:
+        eof = False
+        while True:
+            while position < len(buffer) and buffer[position] in ENTRY_SEPARATORS:
+                position += 1
+            if position < len(buffer):
                 try:
-                    # Replace space with T to make it ISO 8601 compliant for fromisoformat
-                    # Also handle potential 'Z' for UTC timezone indicator
-                    fields_to_create[dt_field] = datetime.fromisoformat(fields_to_create[dt_field].replace('Z', '+00:00').replace(' ', 'T'))
-                except ValueError:
-                    print(f"Warning: Could not parse datetime string '{fields_to_create[dt_field]}' for {dt_field} (ID: {pk}), skipping conversion.")
-        
-        # Determine model class based on fields present in the entry
-        model_cls = None
-        if "student_crm_id" in fields_to_create and "is_verified" in fields_to_create and "content" in fields_to_create:
-            model_cls = Resume
-        elif "student_crm_id" in fields_to_create and "content" in fields_to_create:
-            model_cls = ParentReview
-        elif "username" in fields_to_create and "phone_number" in fields_to_create:
-            # This case is for TutorProfile, if it were in this direct format
-            model_cls = TutorProfile
-        elif "phone_number" in fields_to_create and "branch" in fields_to_create:
-            # This is for TutorProfile if username is removed and phone_number is direct
-            model_cls = TutorProfile
+                    entry, position = decoder.raw_decode(buffer, position)
+                    yield entry
+                    continue
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+            elif eof:
+                return
 
-        if model_cls is None:
-            print(f"Could not determine model type for entry, skipping: {entry}")
+            # Need more data: drop what was consumed and read the next chunk
+            buffer = buffer[position:]
+            position = 0
+            chunk = f.read(read_chunk_size)
+            if chunk:
+                buffer += chunk
+            else:
+                eof = True
+
+
+def detect_model(fields: Dict[str, Any]) -> Optional[Type[Model]]:
+    """Determine the model class of a fixture entry from the fields present in it."""
+    if "student_crm_id" in fields and "is_verified" in fields and "content" in fields:
+        return Resume
+    if "student_crm_id" in fields and "content" in fields:
+        return ParentReview
+    if "username" in fields and "phone_number" in fields:
+        # This case is for TutorProfile, if it were in this direct format
+        return TutorProfile
+    if "phone_number" in fields and "branch" in fields:
+        # This is for TutorProfile if username is removed and phone_number is direct
+        return TutorProfile
+    return None
+
+
+def prepare_entry(entry: Dict[str, Any]) -> Tuple[Optional[Type[Model]], Optional[int], Dict[str, Any]]:
+    """
+    Turn a fixture entry into (model class, primary key, model fields). The model class is None
+    when the entry has to be skipped; the reason has already been printed.
+    """
+    fields_to_create = entry.copy()
+    pk = fields_to_create.pop("id", None) # Extract 'id' as primary key
+
+    if pk is None:
+        print(f"Entry missing 'id' field, skipping: {entry}")
+        return None, None, fields_to_create
+
+    # Convert datetime strings to datetime objects
+    for dt_field in ["created_at", "updated_at"]:
+        if dt_field in fields_to_create and isinstance(fields_to_create[dt_field], str):
+            try:
+                # Replace space with T to make it ISO 8601 compliant for fromisoformat
+                # Also handle potential 'Z' for UTC timezone indicator
+                fields_to_create[dt_field] = datetime.fromisoformat(fields_to_create[dt_field].replace('Z', '+00:00').replace(' ', 'T'))
+            except ValueError:
+                print(f"Warning: Could not parse datetime string '{fields_to_create[dt_field]}' for {dt_field} (ID: {pk}), skipping conversion.")
+
+    model_cls = detect_model(fields_to_create)
+    if model_cls is None:
+        print(f"Could not determine model type for entry, skipping: {entry}")
+        return None, pk, fields_to_create
+
+    # Ensure is_verified is a boolean for Resume model
+    if model_cls == Resume and "is_verified" in fields_to_create:
+        fields_to_create["is_verified"] = bool(fields_to_create["is_verified"])
+
+    # Special handling for TutorProfile to map 'username' from fixture to 'phone_number' in model
+    if model_cls == TutorProfile:
+        if "username" in fields_to_create and "phone_number" not in fields_to_create:
+            fields_to_create["phone_number"] = fields_to_create.pop("username") # Use username from fixture as phone_number
+        if "username" in fields_to_create: # If username still exists, remove it
+            fields_to_create.pop("username")
+        if "phone_number" not in fields_to_create or fields_to_create["phone_number"] is None:
+            print(f"Error creating TutorProfile with ID {pk}: phone_number is missing or None, skipping.")
+            return None, pk, fields_to_create
+
+    return model_cls, pk, fields_to_create
+
+
+class ImportCheckpoint:
+    """
+    Number of entries of a fixture file already imported, stored next to the file. It is only
+    trusted while the file keeps the same size and modification time.
+    """
+
+    def __init__(self, fixture_path: str):
+        self.path = f"{fixture_path}.checkpoint"
+        stat = os.stat(fixture_path)
+        self.signature = {"size": stat.st_size, "mtime": stat.st_mtime}
+
+    def load(self) -> int:
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if data.get("file") != self.signature:
+            return 0
+        return data.get("entries", 0)
+
+    def save(self, entries: int):
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump({"file": self.signature, "entries": entries}, f)
+        os.replace(temp_path, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+async def import_batch(batch: List[Tuple[Type[Model], int, Dict[str, Any]]]) -> Dict[str, int]:
+    """
+    Insert a batch of prepared entries: one `id IN (...)` query per model to skip existing rows,
+    then bulk_create in a transaction. If the bulk insert fails, the batch is retried row by row
+    so one bad entry doesn't drop the others.
+    """
+    stats = {"created": 0, "skipped": 0, "failed": 0}
+    by_model: Dict[Type[Model], Dict[int, Dict[str, Any]]] = {}
+    for model_cls, pk, fields in batch:
+        entries = by_model.setdefault(model_cls, {})
+        if pk in entries:
+            # Like an id that already exists: the first entry wins
+            stats["skipped"] += 1
             continue
+        entries[pk] = fields
 
-        # Ensure is_verified is a boolean for Resume model
-        if model_cls == Resume and "is_verified" in fields_to_create:
-            fields_to_create["is_verified"] = bool(fields_to_create["is_verified"])
-
-        # Special handling for TutorProfile to map 'username' from fixture to 'phone_number' in model
-        if model_cls == TutorProfile:
-            if "username" in fields_to_create and "phone_number" not in fields_to_create:
-                fields_to_create["phone_number"] = fields_to_create.pop("username") # Use username from fixture as phone_number
-            if "username" in fields_to_create: # If username still exists, remove it
-                fields_to_create.pop("username")
-            if "phone_number" not in fields_to_create or fields_to_create["phone_number"] is None:
-                print(f"Error creating TutorProfile with ID {pk}: phone_number is missing or None, skipping.")
-                continue
-
-        # Check if entry with this primary key already exists
-        if await model_cls.filter(id=pk).exists():
-            print(f"{model_cls.__name__} with ID {pk} already exists, skipping.")
+    for model_cls, entries in by_model.items():
+        existing_ids = set(await model_cls.filter(id__in=list(entries)).values_list("id", flat=True))
+        stats["skipped"] += len(existing_ids)
+        new_rows = [model_cls(id=pk, **fields) for pk, fields in entries.items() if pk not in existing_ids]
+        if not new_rows:
             continue
-        
+
         try:
-            await model_cls.create(id=pk, **fields_to_create)
-            print(f"Created {model_cls.__name__} with ID {pk}")
-        except Exception as e:
-            print(f"Error creating {model_cls.__name__} with ID {pk}: {e}")
+            async with in_transaction() as connection:
+                await model_cls.bulk_create(new_rows, using_db=connection)
+                if model_cls is Resume:
+                    await bump_versions(resume_entities(row.student_crm_id for row in new_rows), connection)
+            stats["created"] += len(new_rows)
+        except Exception:
+            for row in new_rows:
+                try:
+                    await row.save(force_create=True)
+                    stats["created"] += 1
+                except Exception as e:
+                    print(f"Error creating {model_cls.__name__} with ID {row.pk}: {e}")
+                    stats["failed"] += 1
+            if model_cls is Resume:
+                await bump_versions(resume_entities(row.student_crm_id for row in new_rows))
+    return stats
+
+
+async def reset_id_sequences(models_to_reset: List[Type[Model]]):
+    """Move Postgres id sequences past the imported ids, so later inserts don't collide with them."""
+    for model_cls in models_to_reset:
+        connection = model_cls._meta.db
+        if connection.capabilities.dialect != "postgres":
+            continue
+        table = model_cls._meta.db_table
+        await connection.execute_query(
+            f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), COALESCE(MAX(id), 1)) FROM \"{table}\""
+        )
+
+
+async def load_fixtures_from_file(fixture_path: str, batch_size: int = DEFAULT_BATCH_SIZE, resume: bool = True) -> Dict[str, int]:
+    """
+    Import a fixture file in batches. Progress is checkpointed after every committed batch, so
+    an interrupted import continues where it stopped when run again (resume=False starts over).
+    """
+    checkpoint = ImportCheckpoint(fixture_path)
+    start_at = checkpoint.load() if resume else 0
+    if start_at:
+        print(f"Resuming {fixture_path} after {start_at} entries")
 
-    print(f"Successfully processed fixtures from {fixture_path}")
+    stats = {"entries": start_at, "created": 0, "skipped": 0, "failed": 0}
+    imported_models = set()
+    batch = []
+    started = last_report = time.monotonic()
 
+    async def flush():
+        nonlocal batch, last_report
+        for key, value in (await import_batch(batch)).items():
+            stats[key] += value
+        checkpoint.save(stats["entries"])
+        batch = []
 
-async def load_all_fixtures(fixture_files: List[str]):
+        now = time.monotonic()
+        if now - last_report >= PROGRESS_INTERVAL_SECONDS:
+            last_report = now
+            rate = (stats["entries"] - start_at) / (now - started)
+            print(f"{fixture_path}: {stats['entries']} entries, {stats['created']} created, "
+                  f"{stats['skipped']} skipped ({rate:.0f} entries/s)")
+
+    for index, entry in enumerate(iter_fixture_entries(fixture_path)):
+        if index < start_at:
+            continue
+        stats["entries"] = index + 1
+        model_cls, pk, fields = prepare_entry(entry)
+        if model_cls is None:
+            stats["skipped"] += 1
+            continue
+        imported_models.add(model_cls)
+        batch.append((model_cls, pk, fields))
+        if len(batch) >= batch_size:
+            await flush()
+
+    if batch:
+        await flush()
+    await reset_id_sequences(list(imported_models))
+    checkpoint.clear()
+
+    elapsed = time.monotonic() - started
+    print(f"Successfully processed fixtures from {fixture_path}: {stats['created']} created, {stats['skipped']} skipped, "
+          f"{stats['failed']} failed in {elapsed:.1f}s ({(stats['entries'] - start_at) / max(elapsed, 1e-9):.0f} entries/s)")
+    return stats
+
+
+async def load_all_fixtures(fixture_files: List[str], batch_size: int = DEFAULT_BATCH_SIZE, resume: bool = True):
     await Tortoise.init(config=TORTOISE_CONFIG)
     await Tortoise.generate_schemas()
+    await ensure_search_index()
 
-    for fixture_file in fixture_files:
-        await load_fixtures_from_file(fixture_file)
-
-    await Tortoise.close_connections()
+    try:
+        for fixture_file in fixture_files:
+            await load_fixtures_from_file(fixture_file, batch_size=batch_size, resume=resume)
+    finally:
+        await Tortoise.close_connections()
     print("All specified fixtures loaded.")
 
 
@@ -98,9 +271,10 @@ if __name__ == "__main__":
     # You might want to temporarily change the database URL to a test database if you don't want
     # to load fixtures into your main development database.
     # For this example, we'll use the default database defined in settings.
-    
-    fixture_files_to_load = [
-        "fixtures/client_resumes.json",
-        "fixtures/parent_review.json"
-    ]
-    asyncio.run(load_all_fixtures(fixture_files_to_load))
+    parser = argparse.ArgumentParser(description="Import JSON / NDJSON fixtures into the database")
+    parser.add_argument("files", nargs="*", default=["fixtures/client_resumes.json", "fixtures/parent_review.json"])
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--restart", action="store_true", help="Ignore checkpoints left by an interrupted import")
+    args = parser.parse_args()
+
+    asyncio.run(load_all_fixtures(args.files, batch_size=args.batch_size, resume=not args.restart))
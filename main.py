@@ -1,15 +1,24 @@
-from fastapi import FastAPI
+import secrets
+from typing import Optional
+from fastapi import FastAPI, Header, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 import api
+import metrics
 from database import init_db, close_db
 from config import settings
+from crm_integration import crm_client
+from jobs import start_job_runner, stop_job_runner
+from pagination import NEXT_CURSOR_HEADER
+from query_accounting import QueryAccountingMiddleware
+from serialization import DefaultJSONResponse
 from admin import router as admin_router # Import the new admin router
 
 # Create FastAPI application
 app = FastAPI(
     title="KIBERone Resumes API",
     description="API for managing tutor profiles, resumes, and parent reviews",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=DefaultJSONResponse,
 )
 
 # Add CORS middleware
@@ -28,8 +37,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+app.add_middleware(QueryAccountingMiddleware)
+# Outermost, so the latency includes every other middleware
+app.add_middleware(metrics.MetricsMiddleware)
+metrics.instrument_db()
+
 # Include API router
 app.include_router(api.router, prefix="/api/v1")
 
@@ -39,11 +54,22 @@ app.include_router(admin_router, prefix="/admin")
 @app.on_event("startup")
 async def startup_event():
     await init_db()
+    await start_job_runner()
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    await stop_job_runner()
+    await crm_client.close()
     await close_db()
 
 @app.get("/")
 def read_root():
     return {"message": "KIBERone Resumes API"}
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics(authorization: Optional[str] = Header(None)):
+    if settings.metrics_token and not secrets.compare_digest(authorization or "", f"Bearer {settings.metrics_token}"):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    return metrics.metrics_response()
+
+metrics.bind_routes(app.routes)
@@ -0,0 +1,201 @@
+"""
+Prometheus metrics of the API: request latency per route template, requests in flight, AlfaCRM
+call latency and outcome per endpoint and branch, and DB query durations per route (or sync job).
+
+Label sets are bound once per route / CRM endpoint and branch and kept, so recording a request
+costs a few dict lookups and counter updates and builds no label dicts. With several worker
+processes set PROMETHEUS_MULTIPROC_DIR (see prometheus_client's multiprocess mode) so /metrics
+aggregates all of them.
+"""
+import contextlib
+import os
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+import httpx
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest
+from prometheus_client import multiprocess
+from starlette.responses import Response
+from starlette.routing import BaseRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import db_monitor
+
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+CRM_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+JOB_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+HTTP_METHODS = ("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS")
+UNMATCHED_ROUTE = "unmatched"  # 404s and anything that is not a route, so scanners can't grow the label set
+BACKGROUND = "background"  # DB queries outside of requests and jobs
+CRM_OUTCOMES = ("ok", "unauthorized", "client_error", "server_error", "timeout", "error", "circuit_open")
+
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests by route template and status class",
+                        ["method", "route", "status"])
+HTTP_REQUEST_DURATION = Histogram("http_request_duration_seconds", "HTTP request latency by route template",
+                                  ["method", "route"], buckets=HTTP_BUCKETS)
+HTTP_REQUESTS_IN_PROGRESS = Gauge("http_requests_in_progress", "HTTP requests being served",
+                                  multiprocess_mode="livesum")
+CRM_REQUESTS = Counter("crm_requests_total", "AlfaCRM calls by endpoint, branch and outcome",
+                       ["endpoint", "branch", "outcome"])
+CRM_REQUEST_DURATION = Histogram("crm_request_duration_seconds", "AlfaCRM call latency by endpoint and branch",
+                                 ["endpoint", "branch"], buckets=CRM_BUCKETS)
+DB_QUERY_DURATION = Histogram("db_query_duration_seconds", "DB query durations (and counts) by route or job",
+                              ["route"], buckets=DB_BUCKETS)
+SYNC_JOB_DURATION = Histogram("sync_job_duration_seconds", "Background sync job durations by type and status",
+                              ["job_type", "status"], buckets=JOB_BUCKETS)
+
+
+class RouteMetrics:
+    """Bound HTTP and DB metrics of one route and method."""
+    __slots__ = ("duration", "statuses", "db_duration")
+
+    def __init__(self, method: str, route: str):
+        self.duration = HTTP_REQUEST_DURATION.labels(method, route)
+        self.statuses = [HTTP_REQUESTS.labels(method, route, f"{status_class}xx") for status_class in range(1, 6)]
+        self.db_duration = DB_QUERY_DURATION.labels(route)
+
+    def observe(self, status: int, seconds: float):
+        self.duration.observe(seconds)
+        self.statuses[min(max(status // 100, 1), 5) - 1].inc()
+
+
+class CRMCallMetrics:
+    """Bound metrics of one AlfaCRM endpoint and branch."""
+    __slots__ = ("duration", "outcomes")
+
+    def __init__(self, endpoint: str, branch: str):
+        self.duration = CRM_REQUEST_DURATION.labels(endpoint, branch)
+        self.outcomes = {outcome: CRM_REQUESTS.labels(endpoint, branch, outcome) for outcome in CRM_OUTCOMES}
+
+    def observe(self, outcome: str, seconds: float):
+        self.duration.observe(seconds)
+        self.outcomes[outcome].inc()
+
+    def reject(self):
+        """The call was not made because the circuit breaker is open."""
+        self.outcomes["circuit_open"].inc()
+
+
+# Keyed by id(route): routes compare by value and aren't hashable, and live as long as the app
+_route_metrics: Dict[int, Dict[str, RouteMetrics]] = {}
+_unmatched_metrics = {method: RouteMetrics(method, UNMATCHED_ROUTE) for method in HTTP_METHODS + ("OTHER",)}
+_crm_metrics: Dict[str, Dict[Any, CRMCallMetrics]] = {}
+
+# The ASGI scope of the request being served; the router adds the matched route to it
+_request_scope: ContextVar[Optional[Scope]] = ContextVar("metrics_request_scope", default=None)
+# Where DB queries outside of requests are counted
+_db_label: ContextVar[Any] = ContextVar("metrics_db_label", default=DB_QUERY_DURATION.labels(BACKGROUND))
+
+
+def bind_routes(routes):
+    """Bind the metrics of every route up front, so all of them are exported from the start."""
+    for route in routes:
+        if hasattr(route, "methods") and hasattr(route, "path"):
+            _bind_route(route)
+
+
+def _bind_route(route: BaseRoute) -> Dict[str, RouteMetrics]:
+    by_method = _route_metrics.get(id(route))
+    if by_method is None:
+        by_method = {method: RouteMetrics(method, route.path) for method in route.methods or ()}
+        _route_metrics[id(route)] = by_method
+    return by_method
+
+
+def route_metrics(scope: Scope) -> RouteMetrics:
+    method = scope["method"]
+    if method not in HTTP_METHODS:
+        method = "OTHER"
+    route = scope.get("route")
+    if route is None:
+        return _unmatched_metrics[method]
+    by_method = _route_metrics.get(id(route)) or _bind_route(route)
+    metrics = by_method.get(method)
+    if metrics is None:
+        # E.g. a 405 for a method the route doesn't have
+        metrics = by_method[method] = RouteMetrics(method, route.path)
+    return metrics
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status and in-flight count of every HTTP request."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        token = _request_scope.set(scope)
+        HTTP_REQUESTS_IN_PROGRESS.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_REQUESTS_IN_PROGRESS.dec()
+            route_metrics(scope).observe(status, elapsed)
+            _request_scope.reset(token)
+
+
+def _observe_query(query: str, values, seconds: float):
+    scope = _request_scope.get()
+    if scope is not None:
+        route_metrics(scope).db_duration.observe(seconds)
+    else:
+        _db_label.get().observe(seconds)
+
+
+def instrument_db():
+    """Start recording the duration of every DB query."""
+    db_monitor.add_query_observer(_observe_query)
+
+
+@contextlib.contextmanager
+def db_queries_as(label: str) -> Iterator[None]:
+    """Count the DB queries made outside of a request (e.g. by a sync job) under this route label."""
+    token = _db_label.set(DB_QUERY_DURATION.labels(label))
+    try:
+        yield
+    finally:
+        _db_label.reset(token)
+
+
+def crm_call_metrics(endpoint: str, branch: Optional[Any] = None) -> CRMCallMetrics:
+    by_branch = _crm_metrics.get(endpoint)
+    if by_branch is None:
+        by_branch = _crm_metrics[endpoint] = {}
+    metrics = by_branch.get(branch)
+    if metrics is None:
+        metrics = by_branch[branch] = CRMCallMetrics(endpoint, "" if branch is None else str(branch))
+    return metrics
+
+
+def crm_outcome(response: Optional[httpx.Response] = None, error: Optional[BaseException] = None) -> str:
+    if error is not None:
+        return "timeout" if isinstance(error, httpx.TimeoutException) else "error"
+    if response.status_code == 401:
+        return "unauthorized"
+    if response.status_code < 400:
+        return "ok"
+    return "client_error" if response.status_code < 500 else "server_error"
+
+
+def metrics_response() -> Response:
+    """The metrics in the Prometheus text format."""
+    registry = REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
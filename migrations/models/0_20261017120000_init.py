@@ -0,0 +1,156 @@
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    # Schema as it was created by Tortoise.generate_schemas() before migrations were introduced,
+    # so existing databases can be brought under aerich with "aerich upgrade"
+    if db.capabilities.dialect == "postgres":
+        return """
+        CREATE TABLE IF NOT EXISTS "group" (
+            "id" SERIAL NOT NULL PRIMARY KEY,
+            "crm_group_id" INT NOT NULL UNIQUE,
+            "branch_ids" JSONB NOT NULL,
+            "teacher_ids" JSONB NOT NULL,
+            "name" VARCHAR(500) NOT NULL,
+            "level_id" INT NOT NULL,
+            "status_id" INT NOT NULL,
+            "company_id" INT,
+            "streaming_id" INT,
+            "limit" INT NOT NULL,
+            "note" TEXT,
+            "b_date" VARCHAR(10),
+            "e_date" VARCHAR(10),
+            "created_at" VARCHAR(20),
+            "updated_at" VARCHAR(20),
+            "custom_aerodromnaya" VARCHAR(10)
+        );
+        CREATE TABLE IF NOT EXISTS "parentreview" (
+            "id" SERIAL NOT NULL PRIMARY KEY,
+            "student_crm_id" VARCHAR(255) NOT NULL,
+            "content" TEXT,
+            "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            "updated_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE IF NOT EXISTS "resume" (
+            "id" SERIAL NOT NULL PRIMARY KEY,
+            "student_crm_id" VARCHAR(255) NOT NULL,
+            "content" TEXT,
+            "is_verified" BOOL NOT NULL DEFAULT False,
+            "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            "updated_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE IF NOT EXISTS "student" (
+            "id" SERIAL NOT NULL PRIMARY KEY,
+            "student_crm_id" INT NOT NULL UNIQUE,
+            "student_name" VARCHAR(255) NOT NULL,
+            "group_id" INT REFERENCES "group" ("id") ON DELETE CASCADE
+        );
+        CREATE TABLE IF NOT EXISTS "tutorprofile" (
+            "id" SERIAL NOT NULL PRIMARY KEY,
+            "tutor_crm_id" VARCHAR(255) UNIQUE,
+            "tutor_name" VARCHAR(255),
+            "branch" VARCHAR(255),
+            "is_senior" BOOL NOT NULL DEFAULT False,
+            "phone_number" VARCHAR(20) NOT NULL UNIQUE,
+            "branch_ids" JSONB,
+            "dob" VARCHAR(10),
+            "gender" INT,
+            "streaming_id" INT,
+            "note" TEXT,
+            "e_date" VARCHAR(10),
+            "avatar_url" VARCHAR(500),
+            "phone" JSONB,
+            "email" JSONB,
+            "web" JSONB,
+            "addr" JSONB,
+            "teacher_to_skill" JSONB
+        );
+        CREATE TABLE IF NOT EXISTS "aerich" (
+            "id" SERIAL NOT NULL PRIMARY KEY,
+            "version" VARCHAR(255) NOT NULL,
+            "app" VARCHAR(100) NOT NULL,
+            "content" JSONB NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS "group_tutorprofile" (
+            "group_id" INT NOT NULL REFERENCES "group" ("id") ON DELETE CASCADE,
+            "tutorprofile_id" INT NOT NULL REFERENCES "tutorprofile" ("id") ON DELETE CASCADE
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS "uidx_group_tutor_group_i_2744e0" ON "group_tutorprofile" ("group_id", "tutorprofile_id");"""
+    return """
+        CREATE TABLE IF NOT EXISTS "group" (
+            "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+            "crm_group_id" INT NOT NULL UNIQUE,
+            "branch_ids" JSON NOT NULL,
+            "teacher_ids" JSON NOT NULL,
+            "name" VARCHAR(500) NOT NULL,
+            "level_id" INT NOT NULL,
+            "status_id" INT NOT NULL,
+            "company_id" INT,
+            "streaming_id" INT,
+            "limit" INT NOT NULL,
+            "note" TEXT,
+            "b_date" VARCHAR(10),
+            "e_date" VARCHAR(10),
+            "created_at" VARCHAR(20),
+            "updated_at" VARCHAR(20),
+            "custom_aerodromnaya" VARCHAR(10)
+        );
+        CREATE TABLE IF NOT EXISTS "parentreview" (
+            "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+            "student_crm_id" VARCHAR(255) NOT NULL,
+            "content" TEXT,
+            "created_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            "updated_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE IF NOT EXISTS "resume" (
+            "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+            "student_crm_id" VARCHAR(255) NOT NULL,
+            "content" TEXT,
+            "is_verified" INT NOT NULL DEFAULT 0,
+            "created_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            "updated_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE IF NOT EXISTS "student" (
+            "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+            "student_crm_id" INT NOT NULL UNIQUE,
+            "student_name" VARCHAR(255) NOT NULL,
+            "group_id" INT REFERENCES "group" ("id") ON DELETE CASCADE
+        );
+        CREATE TABLE IF NOT EXISTS "tutorprofile" (
+            "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+            "tutor_crm_id" VARCHAR(255) UNIQUE,
+            "tutor_name" VARCHAR(255),
+            "branch" VARCHAR(255),
+            "is_senior" INT NOT NULL DEFAULT 0,
+            "phone_number" VARCHAR(20) NOT NULL UNIQUE,
+            "branch_ids" JSON,
+            "dob" VARCHAR(10),
+            "gender" INT,
+            "streaming_id" INT,
+            "note" TEXT,
+            "e_date" VARCHAR(10),
+            "avatar_url" VARCHAR(500),
+            "phone" JSON,
+            "email" JSON,
+            "web" JSON,
+            "addr" JSON,
+            "teacher_to_skill" JSON
+        );
+        CREATE TABLE IF NOT EXISTS "aerich" (
+            "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+            "version" VARCHAR(255) NOT NULL,
+            "app" VARCHAR(100) NOT NULL,
+            "content" JSON NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS "group_tutorprofile" (
+            "group_id" INT NOT NULL REFERENCES "group" ("id") ON DELETE CASCADE,
+            "tutorprofile_id" INT NOT NULL REFERENCES "tutorprofile" ("id") ON DELETE CASCADE
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS "uidx_group_tutor_group_i_2744e0" ON "group_tutorprofile" ("group_id", "tutorprofile_id");"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        """
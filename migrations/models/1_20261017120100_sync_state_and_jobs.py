@@ -0,0 +1,74 @@
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+
+async def _has_column(db: BaseDBAsyncClient, table: str, column: str) -> bool:
+    _, rows = await db.execute_query(f'PRAGMA table_info("{table}")')
+    return any(row["name"] == column for row in rows)
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    # Databases created by generate_schemas() after this change already have the tables and the column
+    if db.capabilities.dialect == "postgres":
+        return """
+        CREATE TABLE IF NOT EXISTS "syncstate" (
+            "id" SERIAL NOT NULL PRIMARY KEY,
+            "entity" VARCHAR(50) NOT NULL,
+            "branch" VARCHAR(255) NOT NULL,
+            "watermark" VARCHAR(20),
+            "last_synced_at" TIMESTAMPTZ,
+            "last_full_sync_at" TIMESTAMPTZ,
+            CONSTRAINT "uid_syncstate_entity_369cf4" UNIQUE ("entity", "branch")
+        );
+        CREATE TABLE IF NOT EXISTS "syncjob" (
+            "id" SERIAL NOT NULL PRIMARY KEY,
+            "job_type" VARCHAR(50) NOT NULL,
+            "status" VARCHAR(20) NOT NULL DEFAULT 'queued',
+            "params" JSONB,
+            "progress" INT NOT NULL DEFAULT 0,
+            "total" INT,
+            "result" JSONB,
+            "error" TEXT,
+            "requested_by" INT,
+            "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            "started_at" TIMESTAMPTZ,
+            "finished_at" TIMESTAMPTZ
+        );
+        ALTER TABLE "tutorprofile" ADD COLUMN IF NOT EXISTS "crm_synced_at" TIMESTAMPTZ;"""
+
+    sql = """
+        CREATE TABLE IF NOT EXISTS "syncstate" (
+            "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+            "entity" VARCHAR(50) NOT NULL,
+            "branch" VARCHAR(255) NOT NULL,
+            "watermark" VARCHAR(20),
+            "last_synced_at" TIMESTAMP,
+            "last_full_sync_at" TIMESTAMP,
+            CONSTRAINT "uid_syncstate_entity_369cf4" UNIQUE ("entity", "branch")
+        );
+        CREATE TABLE IF NOT EXISTS "syncjob" (
+            "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+            "job_type" VARCHAR(50) NOT NULL,
+            "status" VARCHAR(20) NOT NULL DEFAULT 'queued',
+            "params" JSON,
+            "progress" INT NOT NULL DEFAULT 0,
+            "total" INT,
+            "result" JSON,
+            "error" TEXT,
+            "requested_by" INT,
+            "created_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            "started_at" TIMESTAMP,
+            "finished_at" TIMESTAMP
+        );"""
+    if not await _has_column(db, "tutorprofile", "crm_synced_at"):
+        sql += """
+        ALTER TABLE "tutorprofile" ADD "crm_synced_at" TIMESTAMP;"""
+    return sql
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "tutorprofile" DROP COLUMN "crm_synced_at";
+        DROP TABLE IF EXISTS "syncjob";
+        DROP TABLE IF EXISTS "syncstate";"""
@@ -0,0 +1,59 @@
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    # Same statements for SQLite and Postgres; idx_resume_unverified is a partial index
+    # covering only the resumes waiting for verification
+    return """
+        CREATE INDEX IF NOT EXISTS "idx_parentrevi_student_created" ON "parentreview" ("student_crm_id", "created_at", "id");
+        CREATE INDEX IF NOT EXISTS "idx_parentrevi_created" ON "parentreview" ("created_at", "id");
+        CREATE INDEX IF NOT EXISTS "idx_resume_student_created" ON "resume" ("student_crm_id", "created_at", "id");
+        CREATE INDEX IF NOT EXISTS "idx_resume_created" ON "resume" ("created_at", "id");
+        CREATE INDEX IF NOT EXISTS "idx_resume_unverified" ON "resume" ("created_at", "id") WHERE is_verified = false;
+        CREATE INDEX IF NOT EXISTS "idx_student_group_i_3b9352" ON "student" ("group_id");
+        CREATE INDEX IF NOT EXISTS "idx_syncjob_type_status" ON "syncjob" ("job_type", "status");"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_syncjob_type_status";
+        DROP INDEX IF EXISTS "idx_student_group_i_3b9352";
+        DROP INDEX IF EXISTS "idx_resume_unverified";
+        DROP INDEX IF EXISTS "idx_resume_created";
+        DROP INDEX IF EXISTS "idx_resume_student_created";
+        DROP INDEX IF EXISTS "idx_parentrevi_created";
+        DROP INDEX IF EXISTS "idx_parentrevi_student_created";"""
+
+
+MODELS_STATE = (
+    "eJztXW1z0zgQ/isZf+JmcgzJUWBu5j6kEKBAW6YNBwPDeBRbTXy1JSPLbTNM//tJ8rssu3bqpHGjL0CkXVt6tNY+2pXEb8PDNnSD"
+    "p+8IDn3j78FvAwEPsn8UK4YDA/h+VswLKJi7QnKRiswDSoBFWeEFcAPIimwYWMTxqYMRK0Wh6/JCbDFBBy2yohA5v0JoUryAdAkJ"
+    "q/jxkxU7yIY3MEh++pfmhQNdu9BQx+bvFuUmXfmi7AjRt0KQv21uWtgNPZQJ+yu6xCiVdhDlpQuIIAEU8sdTEvLm89bF3Ux6FLU0"
+    "E4mamNOx4QUIXZrrbkMMLIw4fqw1gejggr/lz/Ho+cvnr/568fwVExEtSUte3kbdy/oeKQoETmbGragHFEQSAsYMN4t4phg6sxWC"
+    "strdWCbI9R/MDLw5AchaMgiCMnQfzk9P1NgVtSTkviDWpx+2Y9HhwHUC+nMdHJOCDMjsS+wGyRqYeMd5o70g+OXygpN/J2ev30/O"
+    "nhxPvv3BazCbHqJJ4+T1p9NDgQIO6IKIp4gHHEpIUwgsNiO0hVpS01g3wVr8XQL59RIQNciJvIQu68Ju4ml44MZ0IVrQJft58OxZ"
+    "DcAJnExKhjOuGkd1RQhdeAXddjNqXqWb2XQLSHY8nwYU0DBoh1tBZ1+Bs7DnA7Rq6cMLSmtBF/vnHiPHng2Bx97Y1uqKanuKnut4"
+    "Dm0zySXy+/qhIkwVvnUGbyoAS+TX8q3bt68aLGbTb7N6quKt4ppPpyfvEnGZv0gE3GQLm1ZkJdPoCaRFtjJqQlZG1VxlVKIqsDWE"
+    "UEMoeV/mC1h3TaCYCqthLGr1EspxEyjH1VCOS1CGvr0GlEUtDWVklWFAsWcCSLBNsIfACrQyT7V6L8Ht5pPnsceLy1wUjRfMgXV5"
+    "DYhtFmry/DK0IW9UCfrDWPPtxzPoAtHBMr5x/PU8espOQn2bWE5SGrdC4IXHuAqwcpU39pQY0pBiokDwmK1eZpj/KUz4iDUAIEvl"
+    "mWIYZ/xBnwm+cFy4BpabDk9WITmMO2BKUXm5O4TbEZsGEzERoI1ww0RgfglXKaB+pBgvYNJhiUXywV26ZD8Wy6w4ry++GWSyBkEa"
+    "TSmT89eTN1NebpYAFkbhAQQWoozjcDtMO/QZEGblZ/DKgdeGIg1RqB/WZSN8IUkyyU0mJX4bmdUmH7zJI+QRfEVHz8q4OrzxCQwC"
+    "9vLU/LNUxo2Ztd/MHigeI7oZm7UhHsQ6Jn6I2T/Xknu+9+736WTMsNtkTNl2mnrrsmY/o7Hjg4MmPOjgoJoI8To5OoZo7D2brrtz"
+    "Kj1hPNteetctet6wGup4cI2Fjx2rPk3+saNWy/pgnyJ3lZCdGvSPjqfns8nx58IQvJnMprxmXIA/KX3yQrLv9CGDr0ez9wP+c/D9"
+    "9GQq53NSudl37g8MwDy1ifC1CezcfJiUpl656RKsfmBrl2F6YLc7sCkFb7hkuSdbr+V1ZzAIhXGVGF1cU8vlSCbTMxYXtXy7DC5+"
+    "5zbfFaIrSBz2rOrXDb6+n55NB05gJqKDf6Ix1DRS00hNI/eWRuZmBEWIDGMXAlTxwRc1JXznTHVTltrW9zSH+PD09FMB4sMjGcMv"
+    "x4fTsycjgTcTcqKgi2JLgObnj4HGaX7+SAd2l/h5kl5QEPRc5qGaoQc5Ib37+xExxZr9T3cQxT3ZAZ7g0HbPrKynabZRyFq1s8Z7"
+    "n0S4m2fvoB2WnIeEYRnAt5hAZ4E+wqYJ0/Tcz67hV5MqJeA69RAFy1BmKW8fyOOukPUBz5UeN66q97hM6L9YaGtBMfbCyECGybbr"
+    "JkGiuKlC04zVhjqnuC0Xnx+0pt4pr9NPz3TQ7FBHzZkO2S1lltvcxyca28PQYKJhFBDZ0W1pPiDAa3WIK9Po4PzWTkXUNnJ8yyeY"
+    "Vysgrpwu8yrb25n/7KEnzdwOM0yB2wKwVH5Pz33wxI+riD9Vf8SZhv6IG3zEkBBM2mQaUgWdZ1DmGQhkPQt49HO+avGhy2p7+r3r"
+    "ZMKjiDmXkwmMo5L1Brao2cHA7tYctEPjmHS7diAvHOQEy7VGUlLVQ/kAQ7kriaAVss4pECEyZWAqqhzeFZoKUrFOg1M/DIioQ4Un"
+    "jm5RMX7qFNFm40cZ4k3jHpmGjh3l7wlqg2Gm0U8MN5IZumYdJh4gl22QLCj1ZHG06RicCwIq4vJr8YWytqYMD8z+xJBcsG6KcVl3"
+    "TOUH6GHdXyZYOFuqIIPy2dNqPigfFtU7hPpE/8TorbGTXNbrxPNuHMzNc5gIl7bbhYpa/WQxm0Bz68T6UaLoBGYAkaNKONy1Az/T"
+    "0/vvpTQsQwOaKPTmUIFrtYHKet2s/7Y8c3a+YtmRm3Z3is5uJPFoR5vKmlprLN7LubT7i8BYh23V1169cTVV2NPEYqCv37wHevo2"
+    "yU73COirEO89A4IrtpAkZkgUu6mqYSxq9RLKjVwjLrhgG8KTKmiu04DrQA84CjuthjdV0PA2gPcaKqhkNbixuIa2AbTAthU0sxrb"
+    "RF6D2wDc5D8NodgMLh231Qyh0tWgNwCdR4rXzkiWlHXm6lFnrqSDjl1cDdv0pOPWI2s1Jx2Vl8KmHZFvg83dolu8DTZ/RlK+BlZx"
+    "U2w3t8Gm1x9UZiAnkDjW0lDkHuOaYV3WEWQyOt/YoTluOt94BUkQX4XddPWYU9GbpTKK6CsOgNcswSPxfgI4arT4HtUsvkflxXfl"
+    "dV/V7K/6ui/9X82lrO9BN7jc/g8y8Gfu"
+)
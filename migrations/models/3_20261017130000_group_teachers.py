@@ -0,0 +1,71 @@
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    # Backfill the links of the groups already in the database from their teacher_ids JSON
+    if db.capabilities.dialect == "postgres":
+        return """
+        CREATE TABLE IF NOT EXISTS "groupteacher" (
+            "id" SERIAL NOT NULL PRIMARY KEY,
+            "tutor_crm_id" VARCHAR(255) NOT NULL,
+            "group_id" INT NOT NULL REFERENCES "group" ("id") ON DELETE CASCADE,
+            CONSTRAINT "uid_groupteache_tutor_c_7da47f" UNIQUE ("tutor_crm_id", "group_id")
+        );
+        CREATE INDEX IF NOT EXISTS "idx_groupteache_group_i_f4eaa6" ON "groupteacher" ("group_id");
+        INSERT INTO "groupteacher" ("tutor_crm_id", "group_id")
+            SELECT DISTINCT teacher.value, "group"."id"
+            FROM "group", jsonb_array_elements_text("group"."teacher_ids") AS teacher(value)
+            WHERE jsonb_typeof("group"."teacher_ids") = 'array'
+        ON CONFLICT DO NOTHING;"""
+    return """
+        CREATE TABLE IF NOT EXISTS "groupteacher" (
+            "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+            "tutor_crm_id" VARCHAR(255) NOT NULL,
+            "group_id" INT NOT NULL REFERENCES "group" ("id") ON DELETE CASCADE,
+            CONSTRAINT "uid_groupteache_tutor_c_7da47f" UNIQUE ("tutor_crm_id", "group_id")
+        );
+        CREATE INDEX IF NOT EXISTS "idx_groupteache_group_i_f4eaa6" ON "groupteacher" ("group_id");
+        INSERT OR IGNORE INTO "groupteacher" ("tutor_crm_id", "group_id")
+            SELECT DISTINCT CAST(teacher.value AS TEXT), "group"."id"
+            FROM "group", json_each("group"."teacher_ids") AS teacher
+            WHERE json_type("group"."teacher_ids") = 'array';"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS "groupteacher";"""
+
+
+MODELS_STATE = (
+    "eJztXW1z0zgQ/iuZfOJmcgzJUWBu5j6kEKBAW6YNBwPDeBRbTXy1pSDLbTNM//tJ8rssu3bquHajL3dE2rWlR2vto11J/T10sQUd"
+    "7+k7gv318O/B7yECLmT/yFaMBkOwXifFvICChSMkl7HIwqMEmJQVXgDHg6zIgp5J7DW1MWKlyHccXohNJmijZVLkI/uXDw2Kl5Cu"
+    "IGEVP36yYhtZ8AZ60c/1pXFhQ8fKNNS2+LtFuUE3a1F2hOhbIcjftjBM7PguSoTXG7rCKJa2EeWlS4ggARTyx1Pi8+bz1oXdjHoU"
+    "tDQRCZqY0rHgBfAdmupuRQxMjDh+rDWe6OCSv+XPyfj5y+ev/nrx/BUTES2JS17eBt1L+h4oCgRO5sNbUQ8oCCQEjAluJnENMXRG"
+    "LQRltbuxjJDrP5gJeAsCkLliEHh56D6cn56osctqSch9QaxPPyzbpKOBY3v05zY4RgUJkMmX2AySJTDxjvNGu573y+EFJ/9Oz16/"
+    "n549OZ5++4PXYDY9BJPGyetPp4cCBezRJRFPEQ84lJCmEJhsRqgLtaSmsa6Ctfh/DuTXK0DUIEfyErqsC93Ec+iCG8OBaElX7OfB"
+    "s2clAEdwMikZzrBqEtRlIXTgFXTqzahplWZm0xaQbHg+9SigvlcPt4zOvgJnYncN0KamD88obQVd6J97jBx7NgQue2Ndq8uq7Sl6"
+    "ju3atM4kF8nv64eKMFX41jm8KQAskt/Kt7ZvXyVYzGff5uVUxd2ENZ9OT95F4jJ/kQi4wRY2tchKotETSLNsZVyFrIyLuco4R1Vg"
+    "bQihhlDyvswXsO4aQDEVFsOY1eollJMqUE6KoZzkoPTX1hZQZrU0lIFV+h7FrgEgwRbBLgIbUMs81eq9BLeZT57HHi8uU1E0XrAA"
+    "5uU1IJaRqckFLhRRi8NQ8+3HM+gA0cE8vun46zx4VDeJ0m1kP1FpOOwS2fYtyBXuBcZ58JRO2l0hDNxW8AQXWU++yp24aoPyKVaZ"
+    "0zFbys0x/6/4no9YAwAyVW46hHHOH/SZ4AvbgVtguetYbRGSo7ADhpSikLtDuB0xnxCJiWh1gBsmAvNLuIkBXQeK4WouHpZQJB3p"
+    "piv2Y7lKitP6YgJBBmsQpMH8Oj1/PX0z4+VGDmBhFC5AYCnKOA63I/U3X5STSc0Jd6RmaEqy0QzNjwBBg6cEAoiCVNBPnbrZbepG"
+    "hr2qZ5f1+hm3nRwcVGFMBwfFlInXZTnTFpmw5rNgeSQ7aJg5MiSBmEfwLSbQXqKPsKqDipPOnQOwxDcRcB1PcRnbULqF22IKeU/C"
+    "UOpaPgPCCNQZvLLhtcq1ZOpLXctaSJJEcpfJ/9/DpH8Rl0zNY9kFNSvj6vBmTaDnsZfHsCR+58ZI2m8kDxSPEd0MDXIoHsQ6Jn6I"
+    "GSPVknu+9+73ac/ZsOfM205V35nX1N4zlYVCNFyYVY1vp1R6ElloO8RdFlx8w2qo7cItAoxWqPo0+kdHrZb1wTpFzmYYhxMK0T86"
+    "np3Pp8efM0PwZjqf8ZpJBv6o9MkLyb7jhwy+Hs3fD/jPwffTk5m8byKWm3/n/mAIGKc2EL42gJWaD6PSCJjKoc7ygS0Nd+qBbXdg"
+    "4+hOxdDgLnndGfR8YVw5RhfWlHI5ksj0jMUFLW+XwYXvbPNdPrqCxGbPKn7d4Ov72dlsYHtGJDr4JxhDTSM1jdQ0cm9pZGpGUGRf"
+    "MHYgQAUffFZTwnfBVHdlqXV9T3WID09PP2UgPjySMfxyfDg7ezIWeDMhOwjcKLbeaX7+GGic5uePdGC7xM+jzLWCoKeS2sUM3UsJ"
+    "6VNWj4gpluwzvoMo7slJqwiHumdTZD1Nsx8013k3z+6gHXYo1dk6fn3PdJ5vkPkBL5QeN6wq97hM6L9QqLWgGHthYCCj6HhTlSBR"
+    "2FShaYRqI51TbMvFpwetqndK6/TTMx1UOzxZcnZSdkuJ5Vb38ZFGexgOmagfBEQ6uv17DQhwax2WTjQaOCfdqYjaTo5Jrwnm1QqI"
+    "C6fLtEp7J+CePfSkmdqyiClwagAWy+/p+Uqe+HEU8afijzjR0B9xhY8YEoJJnUxDrKDzDMo8A4GsZx6Pfi42NT50WW1Pv3edTHgU"
+    "Med8MoFxVLLdwGY1GxjYbs1BHRrHqNulA3lhI9tbbTWSkqoeygcYyq4kgjbIPKdAhMiUgamgcnRXaMqLxRo+0gURtanwxMFtZfo0"
+    "167jRwniVeMeiYaOHaXv46uDYaLRTwx3khm6Zh0mLiCXdZDMKPVkcbTrGJwDPCri8lvxhby2pgwPzP7EkFywbopx2XZM5QfoYd1f"
+    "Jpi5tkBBBuVrDYr5oHwPgd4h1Cf696CH+du+26MFDhPgUne7UFarnyxmF2i2TqwfJYq2Z3gQ2aqEw1078BM9vf9eSsMyNKCBfHcB"
+    "FbgWG6is18z6r+WZs/EVS0dutO8Und1J4tEKNpVVtdZQvJdzafMXbrIOW6qvvXjjaqywp4lFT19zfQ/09K3Nje4R0FcO33sGBFds"
+    "IUkMnyh2UxXDmNXqJZQ7+XMdggvWITyxguY6FbgOdIGtsNNieGMFDW8FeK+hgkoWgxuKa2grQAssS0Ezi7GN5DW4FcCN/jgXxYZ3"
+    "aTu1ZgiVrga9Aug8Urx1RjKnrDNXjzpzJR10bOLW8a0vde3afeNxR+SLxlMXtGcvGk+fkZRvGFdcQt7MRePx9QeFGcgpJLa5Gipy"
+    "j2HNqCzrCBIZnW9s0Bx3nW+8gsQL/8pC1dVjSkVvlkoo4lpxALxkCR6I9xPAcaXF97hk8T3OL74Lr/sqZn/F133pP+kas74H3eBy"
+    "+z8p99CJ"
+)
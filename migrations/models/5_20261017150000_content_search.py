@@ -0,0 +1,72 @@
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    # Full-text indexes of resume / parent review content, see search.py
+    if db.capabilities.dialect == "postgres":
+        return """
+        CREATE INDEX IF NOT EXISTS "idx_resume_content_fts" ON "resume" USING GIN (to_tsvector('russian', coalesce("content", '')));
+        CREATE INDEX IF NOT EXISTS "idx_parentreview_content_fts" ON "parentreview" USING GIN (to_tsvector('russian', coalesce("content", '')));"""
+    return """
+        CREATE VIRTUAL TABLE IF NOT EXISTS "resume_fts" USING fts5(content, content='resume', content_rowid='id', tokenize='unicode61 remove_diacritics 2');
+        CREATE TRIGGER IF NOT EXISTS "resume_fts_ai" AFTER INSERT ON "resume" BEGIN INSERT INTO "resume_fts" (rowid, content) VALUES (new.id, new.content); END;
+        CREATE TRIGGER IF NOT EXISTS "resume_fts_ad" AFTER DELETE ON "resume" BEGIN INSERT INTO "resume_fts" ("resume_fts", rowid, content) VALUES ('delete', old.id, old.content); END;
+        CREATE TRIGGER IF NOT EXISTS "resume_fts_au" AFTER UPDATE OF content ON "resume" BEGIN INSERT INTO "resume_fts" ("resume_fts", rowid, content) VALUES ('delete', old.id, old.content); INSERT INTO "resume_fts" (rowid, content) VALUES (new.id, new.content); END;
+        CREATE VIRTUAL TABLE IF NOT EXISTS "parentreview_fts" USING fts5(content, content='parentreview', content_rowid='id', tokenize='unicode61 remove_diacritics 2');
+        CREATE TRIGGER IF NOT EXISTS "parentreview_fts_ai" AFTER INSERT ON "parentreview" BEGIN INSERT INTO "parentreview_fts" (rowid, content) VALUES (new.id, new.content); END;
+        CREATE TRIGGER IF NOT EXISTS "parentreview_fts_ad" AFTER DELETE ON "parentreview" BEGIN INSERT INTO "parentreview_fts" ("parentreview_fts", rowid, content) VALUES ('delete', old.id, old.content); END;
+        CREATE TRIGGER IF NOT EXISTS "parentreview_fts_au" AFTER UPDATE OF content ON "parentreview" BEGIN INSERT INTO "parentreview_fts" ("parentreview_fts", rowid, content) VALUES ('delete', old.id, old.content); INSERT INTO "parentreview_fts" (rowid, content) VALUES (new.id, new.content); END;
+        INSERT INTO "resume_fts" ("resume_fts") VALUES ('rebuild');
+        INSERT INTO "parentreview_fts" ("parentreview_fts") VALUES ('rebuild');"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    if db.capabilities.dialect == "postgres":
+        return """
+        DROP INDEX IF EXISTS "idx_resume_content_fts";
+        DROP INDEX IF EXISTS "idx_parentreview_content_fts";"""
+    return """
+        DROP TRIGGER IF EXISTS "resume_fts_ai";
+        DROP TRIGGER IF EXISTS "resume_fts_ad";
+        DROP TRIGGER IF EXISTS "resume_fts_au";
+        DROP TABLE IF EXISTS "resume_fts";
+        DROP TRIGGER IF EXISTS "parentreview_fts_ai";
+        DROP TRIGGER IF EXISTS "parentreview_fts_ad";
+        DROP TRIGGER IF EXISTS "parentreview_fts_au";
+        DROP TABLE IF EXISTS "parentreview_fts";"""
+
+
+MODELS_STATE = (
+    "eJztXW1T2zgQ/iuZfOrNcB0aSOFu5j4klLa0BTqQvkw7HY8Si8SHLedkGch0+O8nye+y5NjBSWyiLy2Rdm3p0Vr7eFeSf3cd14S2"
+    "9/IUEYssvkLsWS7q/t353UXAgfQPucBepwvm86SaFRAwtrkG5KJ3KdGxRzCYEFp5A2wP0iITehNszUlwN+TbNit0J1TQQtOkyEfW"
+    "fz40iDuFZAYxrfj5ixZbyIQP0It+zm+NGwvaZqbhlsnuzcsNspjzsjNE3nJBdrexMXFt30GJ8HxBZi6KpS1EWOkUIogBgezyBPus"
+    "+ax1YXejHgUtTUSCJqZ0THgDfJukulsSg4mLGH60NR7v4JTd5c/eq8Ojw+OD14fHVIS3JC45egy6l/Q9UOQIXIy6j7weEBBIcBgT"
+    "3ILhy2N3MgNYDl6iIQBImy0CGMG1VQQd8GDYEE3JjP58tb9fgNfXwdXJ+8HVCyr1B+uLSw05MPOLsKoX1DFQExBT1p9FcWhNlUaY"
+    "UlpuiWWAjAoSJJPnL4Jy/8mW+Fevd3Bw1Ns/eH3cPzw66h/vxyaZryqyzeHZO2aeGZQje02g9ecmg8AAJI/uG1pDLAfK8c1qChCb"
+    "oerL6I8SgId2WQnvp5luAXqjs/PT69Hg/DNruON5/9kckcHolNX0eOlCKH3xWjDq+CKdb2ej9x32s/Pj8uKUA+Z6ZIr5HRO50Y8u"
+    "axPwiWsg994AZrrbUXFU9Mhm65vb1LzDCsZgcnsPsGnkatyeq5LNVzk9RywBCEz5ODA0WTtDb/YOu/5c5uaCikL3No1FtFtrkVub"
+    "YMfgQ2dUQlBUq2dibgeYCXhjDNBkRiHw8tB9uL68kGOX1RKQ+4Jon36a1oTsdWzLI7/W5eDWNuGyjmfm2ogRvDgffBfJwsmny6E4"
+    "ibILDAWkCQQTOiNUhVpQ01iXwZr/X4HnRvL1sNz145nluf1SPLdfwHP7eZ5rwztoV5tR0yqbo7nNmk89AojvVcMto7OrwE1cZw7Q"
+    "oqIPzyitBN3mmX79JochcOgdq1pdVm1H0bMtx5K8b6onuUh+Vx9U5BKJbx3BBwVgkfxKvrVZ7+Gn30fFVCV+Df90efEuEhf5i0DA"
+    "DRaWqEJWEo2WQCpG5UoF5QpiciJVgZUhhBpCwftSX6AKvalhzGq1EspeGSh7aih7OSiLophqKAsjmLsK5cT3iOsYAGLXxK6DwAJU"
+    "Mk+5eivBreeRrxCkzQUuJFGLYaj59uMVtAGRZzjS8ddRcKlmEqXHyH6i0nDYBbLtm5ApPAmM6+AqjbQ7JQxPDNunDMonrsyczumr"
+    "3Mhl//Ln+Yw2AKCJzE2HMI7YhT5j98ayV0nqrDtWq0JyL+yAIaQoxO5gZkfUJ0RiPFod4OZijvktXMSAzgPF8G0uHpZQJB3pJjP6"
+    "YzpLitP6fAJBBm0QJMH8Org+GbzheSIjB/Dj8mRM9MyrcjKpOWFJaoakJGvN0PwMEDRYSiCAKEgF/dKpm/WmbkTYy3p2Ua+dcdte"
+    "v1+GMfX7asrE6rKcaYVMWP1ZsDySDTTMHBkSQMwj+NbF0Jqij7Csg4qTzo0DsMA3YXAfT3EZ25C6hcft5Pk/A0wJ1BW8s+C9zLVk"
+    "6gtdy5xL4kRyncn/392kfxGXTM1j2RdqWsbU4cMcQ4+tH4phSfzOg5G030guyC/DuxkaZJdfiHaM/+AzRqolT7zv8vtpz1mz58zb"
+    "TlnfmdfU3jOVhUIkfDErG99OqbQksrDpEHdRcLF4XV9hgHGVdX3bsFraB/MS2YtuHE5ow0K/0Cxz6/waumBTD+zqAxtHdxqwfvMK"
+    "ej43rhyjC2sKuRxOZFrG4oKWb5bBhffc5L18dAexRa+lvl3n2/vTq9OO5RmRaOefYAw1jdQ0UtPInaWRqRlBkn1xXRsCpHjgs5oC"
+    "vmOqui5Lrep7ykM8vLz8lIF4eCZi+OV8eHr14hXHmwpZQeBGsvRO8/PnQOM0P3+mA9skfh5lriUEPZXUVjN0LyWkd1k9I6ZYsM54"
+    "CVHckZ1WEQ5V96aIeppmbzXXuZxnN9AOG5Tq3Dh+bc90Xi/Q5IM7lnrcsKrY41Khf0OhjQXF6A0DA9mLtjeVCRKFTeWaRqi2p3OK"
+    "m3Lx6UEr653SOu30TP1ymycL9k6Kbimx3PI+PtLYHIZdKuoHAZGGLv+eAwycSpulE40a9kk3KqK2lm3Sc+yyagnEyukyrdKmo2xq"
+    "o/HEJcCuAFgsv6P7K1nix5bEn9QPcaKhH+ISDzHE2MVVMg2xgs4zSPMMGNKeeSz6OZYclqZ80EW1HX3edTLhWcSc88kEylHxagOb"
+    "1dSns23hdLb0QN5YyPJmK42koKqHcncP2mOxp2sCeIhMGpgKKveWhaa8WKzmLV3J2aXBaWV6N9fzP1+2/bGj0FYrYJhotBPDtWSG"
+    "7mmHsQPwbRUkM0oteTladwzOBh7hcfmV+EJeW1OGLbM/PiQ3tJt8XFYdU/ECelh3lwlmji2QkEHxWAM1HxTPIdArhNpE/7a6mX/T"
+    "Z3tsgMMEuFRdLpTVaieLWQeaGyfWzxJFyzM8iCxZwmHZCvxET6+/F9KwFA1oIN8ZQwmuagMV9dr4jZb631gacqJ9o+jsWhKPZrCo"
+    "rKy1huKtnEvrP3CTdtiUPe3qhauxwo4mFj19zPUT0NOnNte6RkAfOfzkGRDc0RdJbPhYsppKDWNWq5VQruVzHZwLViE8sYLmOiW4"
+    "DnSAJbFTNbyxgoa3BLz3UEIl1eCG4hraEtAC05TQTDW2kbwGtwS40ce5iGt4t5ZdaYaQ6WrQS4DOIsUrZyRzyjpz9awzV8JGxzpO"
+    "HV/5UNemnTced0Q8aDx1QHv2oPH0HknxhHHJIeT1HDQeH3+gzEAOILYms64k9xjW7BVlHUEio/ONNZrjuvONyi9xq98e1d/h3uXF"
+    "UuzRqABiKN5OANfyTXjlcV9q9qc+7kt/0jVmfVtd4PL4P7hJBCA="
+)
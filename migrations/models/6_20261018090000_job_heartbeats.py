@@ -0,0 +1,66 @@
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+
+async def _has_column(db: BaseDBAsyncClient, table: str, column: str) -> bool:
+    _, rows = await db.execute_query(f'PRAGMA table_info("{table}")')
+    return any(row["name"] == column for row in rows)
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    # Which process runs a job and when it last reported being alive, see jobs.fail_abandoned_jobs
+    if db.capabilities.dialect == "postgres":
+        return """
+        ALTER TABLE "syncjob" ADD COLUMN IF NOT EXISTS "worker_id" VARCHAR(255);
+        ALTER TABLE "syncjob" ADD COLUMN IF NOT EXISTS "heartbeat_at" TIMESTAMPTZ;"""
+
+    sql = ""
+    if not await _has_column(db, "syncjob", "worker_id"):
+        sql += """
+        ALTER TABLE "syncjob" ADD "worker_id" VARCHAR(255);"""
+    if not await _has_column(db, "syncjob", "heartbeat_at"):
+        sql += """
+        ALTER TABLE "syncjob" ADD "heartbeat_at" TIMESTAMP;"""
+    return sql
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "syncjob" DROP COLUMN "heartbeat_at";
+        ALTER TABLE "syncjob" DROP COLUMN "worker_id";"""
+
+
+MODELS_STATE = (
+    "eJztXVtT2zgU/iuZPLEzbAcCKezO7ENC05a2QAfSy7TT8SixSLzYUlaWgUyH/76SfJdlxw7OxUQvLZHOsaVPxzqfzpHl320Hm9B2"
+    "Xw0Qtej8KySuhVH779bvNgIOZH+oBfZbbTCbxdW8gIKRLTSgEL1PiI5cSsCYsspbYLuQFZnQHRNrRv27Ic+2eSEeM0ELTeIiD1n/"
+    "edCgeALpFBJW8fMXK7aQCR+hG/6c3Rm3FrTNVMMtk99blBt0PhNl54i+FYL8biNjjG3PQbHwbE6nGEXSFqK8dAIRJIBCfnlKPN58"
+    "3rqgu2GP/JbGIn4TEzomvAWeTRPdLYnBGCOOH2uNKzo44Xf5s3N4fHJ8evT6+JSJiJZEJSdPfvfivvuKAoHLYftJ1AMKfAkBY4yb"
+    "P3xZ7M6mgKjBizUkAFmzZQBDuDaKoAMeDRuiCZ2yn4cHBwV4fe1dn73vXe8xqT94XzAzZN/ML4Oqjl/HQY1BTFh/GsW+Nck1woTS"
+    "YkssA2RYECMZP38hlAfPtsS/Op2jo5POwdHr0+7xyUn39CAyyWxVkW32z99x80yhHNprDK03MzkEBqBZdN+wGmo5UI1vWlOC2AxU"
+    "X4V/lAA8sMtKeD/PdAvQG55fDG6GvYvPvOGO6/5nC0R6wwGv6YjSuVS691oy6ugirW/nw/ct/rP14+pyIADDLp0QccdYbvijzdsE"
+    "PIoNhB8MYCa7HRaHRU98tr69S8w7vGAExncPgJhGpgZ3cJ5stsrpOHIJQGAixoGjydsZeLN3BHszlZvzKwrd2yQS0W6tQW5tTBxD"
+    "DJ1RCUFZrZ6JuRlgxuCNCEDjKYPAzUL34ebqUo1dWktC7gtiffppWmO637Itl/5alYNb2YTLO56aa0NGsHfR+y6ThbNPV315EuUX"
+    "6EtIUwjGbEaoCrWkprEug7X4vwLPDeXrYbmrxzPNc7uleG63gOd2szzXhvfQrjajJlXWR3O3az51KaCeWw23lM6uAjfGzgygeUUf"
+    "nlJaCrr1M/36TY5A4LA7VrW6tNqOomdbjqVYb+ZPcqH8rj6oCFOFbx3CxxzAQvmlfOt2rcMH34fFVCVahn+6unwXisv8RSLgBg9L"
+    "VCErsUZDIJWjcqWCcgUxOZmqwMoQQg2h5H2ZL8gLveXDmNZqJJSdMlB28qHsZKAsimLmQ1kYwdxVKMeeS7FjAEiwSbCDwBxUMk+1"
+    "eiPBreeRrxCkzQQuFFGLfqD59uM1tAFVZziS8dehf6ntJEpPof2EpcGwS2TbMyFXeBYYN/5VttLucmF4Ztg+YVAexSpzumBLuSHm"
+    "/4rn+Zw1AKCxyk0HMA75hT4TfGvZyyR1Vh2rzUNyP+iAIaUo5O4QbkfMJ4RiIlrt44aJwPwOziNAZ75isJqLhiUQSUa66ZT9mEzj"
+    "4qS+mECQwRoEqT+/9m7Oem9EnsjIAPy0OBkTPvN5OZnEnLAgNUMTkrVmaH76CBo8JeBD5KeCfunUzWpTNzLsZT27rNfMuG2n2y3D"
+    "mLrdfMrE69KcaYlMWP1ZsCySW2iYGTIkgZhF8C0m0Jqgj7Csg4qSzlsHYIFvIuAhmuJStqF0C0+byfN/BoQRqGt4b8EHlWtJ1Re6"
+    "lpmQJLHkKpP/v9tx/0IumZjH0gtqVsbV4eOMQJfvH4pgif3OoxG334gvKC4juhkYZFtciHVM/BAzRqIlz7zv4vtpz1mz58zaTlnf"
+    "mdXU3jORhUI0WJiVjW8nVBoSWVh3iLsouFi8r68wwLjMvr5NWC3rg3mF7Hk7Cic0YaNfYJaZfX5bumFTD+zyAxtFd7Zg/+Y1dD1h"
+    "XBlGF9QUcjkSyzSMxfktXy+DC+65znt56B4Si10r/3atb+8H14OW5RqhaOsffww1jdQ0UtPInaWRiRlBkX3B2IYA5TzwaU0J3xFT"
+    "XZWlVvU95SHuX119SkHcP5cx/HLRH1zvHQq8mZDlB24UW+80P38JNE7z8xc6sNvEz8PMtYKgJ5La+QzdTQjpt6xeEFMs2Ge8gCju"
+    "yJtWIQ5V302R9TTN3miuczHP3kI73KJU59rxa3qm82aOxh/wSOlxg6pij8uE/g2E1hYUYzf0DWQ/fL2pTJAoaKrQNAK1fZ1TXJeL"
+    "Tw5aWe+U1GmmZ+qWe3my4N1J2S3Fllvex4ca68OwzUQ9PyCypdu/Z4AAp9LL0rFGDe9Jb1VEbSWvSc8I5tUKiHOny6RKk46yqY3G"
+    "U0yBXQGwSH5H36/kiR9bEX/Kf4hjDf0Ql3iIISGYVMk0RAo6z6DMMxDIeuby6OdIcVha7oMuq+3o8/6AyZ04rqQK/0kpNcQs1xDf"
+    "mEJA6AgCukQEX9bVh6Jt4FA0nWV7ccmY7MCyxRtZbmDTmvoJ3fATemshy50uNZKSqh7K3T2BkgdlbygQsWNlxNav3F8Us3UjsZrf"
+    "dYwP9fWP8dOvOb78g5ebH1QNbLUChrFGMzFcyZLigXWYOIDcVVqeJZWauTyrPThtA5eKhNVSfCGrrSnDhtmfGJJb1k0xLsuOqXwB"
+    "Pay7ywRT53koyKB83kc+H5QP6NBb55pE/zZ6ysW6D71ZA4fxcam6jy6t1UwWswo0106sXySKlmu4EFmqTNyiV1NiPf1iirQ/gaEB"
+    "DeQ5I6jANd9AZb0mfryo/hXLlnzqYavo7Eoy8qa/27KstQbijZxL6z+JlnXYVD3t+Tu6I4Udzbi7+vz3Z6CnjzOvdfOMPov72TMg"
+    "uGcLSWJ4RLHNMB/GtFYjoVzJd2wEF6xCeCIFzXVKcB3oAEthp/nwRgoa3hLwPkAFlcwHNxDX0JaAFpimgmbmYxvKa3BLgBt+tY5i"
+    "w72z7EozhEpXg14CdB4pXjojmVHWmasXnbmS3gCu4zj+pU873raD+KOOyCfwJ75ckD6BP/nysHz0vuJ0/npO4I/OBcnNQPYgscbT"
+    "tiL3GNTsF2UdQSyj8401muOq8425n6jPXz3mf6B+lzdL8UejAoiBeDMBPCy1+D4sWHwfZhffuefg5bO//HPw9LeOI9a30Q0uT/8D"
+    "DBgBkw=="
+)
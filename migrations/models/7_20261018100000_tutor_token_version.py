@@ -0,0 +1,60 @@
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+
+async def _has_column(db: BaseDBAsyncClient, table: str, column: str) -> bool:
+    _, rows = await db.execute_query(f'PRAGMA table_info("{table}")')
+    return any(row["name"] == column for row in rows)
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    # Tokens carry the version they were issued with, see auth.invalidate_tutor_identity
+    if db.capabilities.dialect == "postgres":
+        return """
+        ALTER TABLE "tutorprofile" ADD COLUMN IF NOT EXISTS "token_version" INT NOT NULL DEFAULT 0;"""
+
+    if await _has_column(db, "tutorprofile", "token_version"):
+        return ""
+    return """
+        ALTER TABLE "tutorprofile" ADD "token_version" INT NOT NULL DEFAULT 0;"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "tutorprofile" DROP COLUMN "token_version";"""
+
+
+MODELS_STATE = (
+    "eJztXVtT2zgU/iuZPLEzbAcCKezO7ANQ2tIW6EB6mXY6HiUWiRdbysoykOnw31eS77Jk7OBcTPTSEukcW/p0rPP5HEn+3fWwDV3/"
+    "1SmiDp19hcR3MOr+3fndRcCD7A+1wHanC6bTtJoXUDB0hQYUoncZ0aFPCRhRVnkDXB+yIhv6I+JMaXg3FLguL8QjJuigcVoUIOe/"
+    "AFoUjyGdQMIqfv5ixQ6y4QP045/TW+vGga6da7hj83uLcovOpqLsDNG3QpDfbWiNsBt4KBWezugEo0TaQZSXjiGCBFDIL09JwJvP"
+    "Wxd1N+5R2NJUJGxiRseGNyBwaaa7FTEYYcTxY63xRQfH/C5/9nb3D/YP917vHzIR0ZKk5OAx7F7a91BRIHAx6D6KekBBKCFgTHEL"
+    "h6+I3ckEEDV4qYYEIGu2DGAM10oR9MCD5UI0phP2c3dnpwSvr0dXJ++PrraY1B+8L5gZcmjmF1FVL6zjoKYgZqw/j+KxM9YaYUbp"
+    "aUusAmRckCKZPn8xlDvPtsS/er29vYPezt7rw/7+wUH/cCcxyWJVmW0en73j5plDObbXFNpganMILECL6L5hNdTxoBrfvKYEsR2p"
+    "vor/qAB4ZJe18H6e6ZagNzg7P70eHJ1/5g33fP8/VyByNDjlNT1ROpNKt15LRp1cpPPtbPC+w392flxenArAsE/HRNwxlRv86PI2"
+    "gYBiC+F7C9jZbsfFcdEjn61vbjPzDi8YgtHtPSC2VajBPayTLVZ5PU8uAQiMxThwNHk7I2/2juBgqnJzYUWpexsnIsattcitjYhn"
+    "iaGzaiEoqzUzMbcDzBS8IQFoNGEQ+EXoPlxfXqixy2tJyH1BrE8/bWdEtzuu49Nfi3JwC5twecdzc23MCLbOj77LZOHk0+WxPIny"
+    "CxxLSFMIRmxGqAu1pGawroK1+L8Gz43lm2G5i8czz3P7lXhuv4Tn9os814V30K03o2ZVlkdz12s+9SmggV8Pt5zOpgI3wt4UoFlN"
+    "H55Tmgu65TP95k2OQOCxO9a1urzahqLnOp6jeN/UT3Kx/KY+qAhThW8dwAcNYLH8XL51vd7DT78PyqlK8hr+6fLiXSwu8xeJgFs8"
+    "LFGHrKQaLYFUjspVCsqVxORkqgJrQwgNhJL3Zb5AF3rTw5jXaiWUvSpQ9vRQ9gpQlkUx9VCWRjA3FcpR4FPsWQASbBPsITADtcxT"
+    "rd5KcJt55GsEaQuBC0XU4jjSfPvxCrqAqjMc2fjrILzUehKlx9h+4tJo2CWyHdiQKzwLjOvwKmtpd1oYnhm2zxhUQLHKnM7Zq9wA"
+    "83/F83zGGgDQSOWmIxgH/EKfCb5x3HmSOouO1eqQ3I46YEkpCrk7hNsR8wmxmIhWh7hhIjC/hbME0GmoGL3NJcMSiWQj3XTCfown"
+    "aXFWX0wgyGINgjScX4+uT47eiDyRVQD48elkTPzM63IymTnhidQMzUg2mqH5GSJo8ZRACFGYCvplUjeLTd3IsFf17LJeO+O2vX6/"
+    "CmPq9/WUidflOdMcmbDms2BFJNfQMAtkSAKxiOBbTKAzRh9hVQeVJJ3XDsAS30TAfTLF5WxD6RYeV5Pn/wwII1BX8M6B9yrXkqsv"
+    "dS1TIUlSyUUm/3930/7FXDIzj+VfqFkZV4cPUwJ9vn4ogSX1Ow9W2n4rvaC4jOhmZJBdcSHWMfFDzBiZljzzvk/fz3jOhj1n0Xaq"
+    "+s6ipvGemSwUotGLWdX4dkalJZGFZYe4y4KL5ev6SgOM86zrW4XVsj7Yl8iddZNwQhsW+kVmWVjnt6YLNs3Azj+wSXRnDdZvXkE/"
+    "EMZVYHRRTSmXI6lMy1hc2PLlMrjonsu8V4DuIHHYtfS363x7f3p12nF8Kxbt/BOOoaGRhkYaGrmxNDIzIyiyLxi7ECDNA5/XlPAd"
+    "MtVFWWpd31Md4uPLy085iI/PZAy/nB+fXm3tCryZkBMGbhRL7ww/fwk0zvDzFzqw68TP48y1gqBnktp6hu5nhMwuqxfEFEvWGT9B"
+    "FDdkp1WMQ929KbKeodkrzXU+zbPX0A7XKNW5dPzanum8nqHRBzxUetyoqtzjMqF/I6GlBcXYDUMD2Y63N1UJEkVNFZpWpLZtcorL"
+    "cvHZQavqnbI67fRM/WqbJ0v2TspuKbXc6j4+1lgehl0mGoQBkTVd/j0FBHi1NkunGg3sk16riNpCtklPCebVCoi102VWpU1H2TRG"
+    "4ymmwK0BWCK/ofsreeLHVcSf9A9xqmEe4goPMSQEkzqZhkTB5BmUeQYCWc98Hv0cKg5L0z7ostqGPu/3mNyK40rq8J+cUkvMcgnx"
+    "jQkEhA4hoHNE8GVdcyjaCg5FM1m2F5eMKQ4se3kj8w1sXtM8oSt+Qm8c5PiTuUZSUjVDubknUPKg7DUFInasjNiGldtPxWz9RKzh"
+    "vY7pob7hMX5mm+PLP3i5/UHVyFZrYJhqtBPDhbxS3LMOEw+Q21qvZ1mldr6eNR6cdoFPRcJqLr5Q1DaUYcXsTwzJDeumGJd5x1S+"
+    "gBnWzWWCufM8FGRQPu9DzwflAzrM0rk20b+VnnKx7ENvlsBhQlzqrqPLa7WTxSwCzaUT6xeJouNbPkSOKhP31NaUVM9sTJHWJzA0"
+    "oIUCbwgVuOoNVNZr48eLmn9jWZNPPawVnV1IRt4OV1tWtdZIvJVzafMn0bIO26qnXb+iO1HY0Iy7b85/fwZ65jjzRhfPmLO4nz0D"
+    "gjv2IkmsgCiWGephzGu1EsqFfMdGcME6hCdRMFynAteBHnAUdqqHN1Ew8FaA9x4qqKQe3EjcQFsBWmDbCpqpxzaWN+BWADf+ah3F"
+    "ln/ruLVmCJWuAb0C6DxSPHdGsqBsMlcrTkhSfAuRpf3edMmOE0lvY/bpLC/vJ+2fbuJjBnOfFb1unzFIOiJ/vyDz3Yf89wuyW6/l"
+    "Dxcovm3QzPcLklNVtPnbI0ic0aSryNxGNdtlOVuQyphsbYPmuOhsrXbC1b976+faTV5qxh+NGiBG4u0EcLdS6GK3JHSxWwxdaE8R"
+    "1HNn/SmC5kvRCWde6fKgx/8BMiNmXg=="
+)
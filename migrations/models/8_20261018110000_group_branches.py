@@ -0,0 +1,73 @@
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    # Backfill the links of the groups already in the database from their branch_ids JSON
+    if db.capabilities.dialect == "postgres":
+        return """
+        CREATE TABLE IF NOT EXISTS "groupbranch" (
+            "id" SERIAL NOT NULL PRIMARY KEY,
+            "branch" VARCHAR(255) NOT NULL,
+            "group_id" INT NOT NULL REFERENCES "group" ("id") ON DELETE CASCADE,
+            CONSTRAINT "uid_groupbranch_branch_16019a" UNIQUE ("branch", "group_id")
+        );
+        CREATE INDEX IF NOT EXISTS "idx_groupbranch_group_i_3e4402" ON "groupbranch" ("group_id");
+        INSERT INTO "groupbranch" ("branch", "group_id")
+            SELECT DISTINCT branch.value, "group"."id"
+            FROM "group", jsonb_array_elements_text("group"."branch_ids") AS branch(value)
+            WHERE jsonb_typeof("group"."branch_ids") = 'array'
+        ON CONFLICT DO NOTHING;"""
+    return """
+        CREATE TABLE IF NOT EXISTS "groupbranch" (
+            "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+            "branch" VARCHAR(255) NOT NULL,
+            "group_id" INT NOT NULL REFERENCES "group" ("id") ON DELETE CASCADE,
+            CONSTRAINT "uid_groupbranch_branch_16019a" UNIQUE ("branch", "group_id")
+        );
+        CREATE INDEX IF NOT EXISTS "idx_groupbranch_group_i_3e4402" ON "groupbranch" ("group_id");
+        INSERT OR IGNORE INTO "groupbranch" ("branch", "group_id")
+            SELECT DISTINCT CAST(branch.value AS TEXT), "group"."id"
+            FROM "group", json_each("group"."branch_ids") AS branch
+            WHERE json_type("group"."branch_ids") = 'array';"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS "groupbranch";"""
+
+
+MODELS_STATE = (
+    "eJztXVtT2zgU/iuZPLEzbAcCKezO7ENC05a2QAfSy7TT8SixSLzYVlaWgUyH/76SfJclxw7OxUQvLZHOsaVPxzqfz5Gl320HmdD2"
+    "Xg1cYpH5V4g9C7ntv1u/2y5wIP1DLrDfaoPZLKlmBQSMbK4Bueh9SnTkEQzGhFbeAtuDtMiE3hhbMxLczfVtmxWiMRW03ElS5LvW"
+    "fz40CJpAMoWYVvz8RYst14SP0It+zu6MWwvaZqbhlsnuzcsNMp/xsnOXvOWC7G4jY4xs33ET4dmcTJEbS1suYaUT6EIMCGSXJ9hn"
+    "zWetC7sb9ShoaSISNDGlY8Jb4Nsk1d2SGIyRy/CjrfF4ByfsLn92Do9Pjk+PXh+fUhHekrjk5CnoXtL3QJEjcDlsP/F6QEAgwWFM"
+    "cAuGL4/d2RRgOXiJhgAgbbYIYATXRhF0wKNhQ3dCpvTn4cFBAV5fe9dn73vXe1TqD9YXRA05MPPLsKoT1DFQExBT1p9FsW9NlEaY"
+    "UlpsiWWAjAoSJJPnL4Ly4NmW+Fenc3R00jk4en3aPT456Z4exCaZryqyzf75O2aeGZQje02g9Wcmg8AAJI/uG1pDLAfK8c1qChCb"
+    "oeqr6I8SgId2WQnv55luAXrD84vBzbB38Zk13PG8/2yOSG84YDUdXjoXSvdeC0YdX6T17Xz4vsV+tn5cXQ44YMgjE8zvmMgNf7RZ"
+    "m4BPkOGiBwOY6W5HxVHRE5utb+9S8w4rGIHx3QPAppGrQR2kks1XOR1HLAEumPBxYGiydobe7B1G/kzm5oKKQvc2iUW0W2uQWxtj"
+    "x+BDZ1RCUFSrZ2JuBpgJeCMM3PGUQuDloftwc3Upxy6rJSD3xaV9+mlaY7Lfsi2P/FqVg1vZhMs6nplrI0awd9H7LpKFs09XfXES"
+    "ZRfoC0gTCMZ0RqgKtaCmsS6DNf+/As+N5OthuavHM8tzu6V4breA53bzPNeG99CuNqOmVdZHc7drPvUIIL5XDbeMzq4CN0bODLjz"
+    "ij48o7QUdOtn+vWbHIbAoXesanVZtR1Fz7YcS/K+qZ7kIvldfVBdRCS+dQgfFYBF8kv51u16Dx98HxZTlfg1/NPV5btIXOQvAgE3"
+    "WFiiCllJNBoCqRiVKxWUK4jJiVQFVoYQaggF70t9gSr0poYxq9VIKDtloOyooezkoCyKYqqhLIxg7iqUY98jyDEAxMjEyHHBHFQy"
+    "T7l6I8Gt55GvEKQVQ0RQErXoh5pvP15DGxB5hiMdf+3zS20nT3qKzCcqDUddFsSpA4thcKkGg+ER34RM4Vlg3ARX2cpnUAnDM1MY"
+    "KYPyCZKZ0wV9rR0i9i+f285pA+ijI6MsIYxDdqHPGN1a9jIJrlXHrVVI7ocdMIR0jdgdzOyI+sdIjEfuA9wQ5pjfwXkM6CxQDN9s"
+    "42EJRdJRfzKlPybTpDitzydT16ANgiTwNb2bs94bnjMzcgA/LU5MhfOfKj2VTI8LklSjRLDWVNXPdnLlIBv2S2evVpu9SgAv/f4X"
+    "azQzXN3pdssQxW5XzRRZXZYqLpEArD/5l0dyC40xxwEFEPMIvkUYWhP3Iyzri+Jc+9YBWOCGMHiIp7WMbUg9wNMGlzdEzFHlRlLM"
+    "coEfISnJmh0J96MGS7IHKGp3shZ3IsJe1qmIetq1aNeiXcsuuZbPANPX8Gt4b8EHmWvJ1Be6lhmXxInkKpfT/W4n/YsiEql5LBui"
+    "pmVMHT7OMPTYitwYlsTvPBpJ+43kgvwyvJuhQbb5hWjH+A8+Y6Ra8sz7Lr6f9pw1e8687ZT1nXlN7T1T6zpcEob3ymaMUyoNidWv"
+    "O2lclK4rXilfmLJbZqX8JqyW9sG8cu15Ow5KN2HpfGiWuZXzW/oJhB7Y5Qc2zhFswRcR19DzuXHlGF1YU8jlcCLTMBYXtHy9DC68"
+    "5zrv5bv3EFv0Wurbtb69H1wPWpZnRKKtf4Ix1DRS00hNI3eWRqZmBEkOHyEbAlfxwGc1BXxHVHVVllrV95SHuH919SkDcf9cxPDL"
+    "RX9wvXfI8aZCVhC4kSxm1/z8JdA4zc9f6MBuEz+P1j9JCHpqaZSaoXspIf3d8gtiigVf7iwgijvy7XKEQ9WvPUU9TbM3mutczLO3"
+    "0A63KNW5dvyanum8mbvjD2gk9bhhVbHHpUL/hkJrC4rRGwYGsh99MFwmSBQ2lWsaodq+zimuy8WnB62sd0rrNNMzdcttR1CwG4Ho"
+    "lhLLLe/jI431Ydimon4QENnSD6pmAAOn0vYjiUYNO49sVURtJRuPzDBi1RKIldNlWqVJm8PVRuMJIsCuAFgsv6M7FrDEjy2JP6kf"
+    "4kRDP8QlHmKIMcJVMg2xgs4zSPMMGNKeeSz6OZJsP6p80EW1HX3eHxC+4xuAVeE/GaWGmOUa4htTCDAZQUCWiOCLunqb0Q1sM6qz"
+    "bC8uGZMfWPryhpcb2KymfkI3/ITeWq7lTZcaSUFVD+Xu7unMgrI3BPDYsTRiG1TuL4rZerFYzd86Jtvkh99m688cX/xRBs0Pquqd"
+    "B2p5pXigHcYOwHeVXs/SSs18Pas9OG0Dj/CE1VJ8Ia+tKcOG2R8fklvaTT4uy46peAE9rLvLBDO7QknIoLhrlJoPits86aVzTaJ/"
+    "G93lYt1bp62BwwS4VF1Hl9VqJotZBZprJ9YvEkXLMzzoWrJM3KJPUxI9/WGKsD6BogEN13dGUIKr2kBFvSYeB1j/G8uWHJ60VXR2"
+    "JRl5M1htWdZaQ/FGzqX17+1OO2zKnnb1iu5YYUcz7p4+UeUZ6OkDQmpdPKNPt3j2DAju6YskNnwsWWaohjGr1UgoV3IyHOeCVQhP"
+    "rKC5TgmuAx1gSexUDW+soOEtAe8DlFBJNbihuIa2BLTANCU0U41tJK/BLQFudA4sQYZ3Z9mVZgiZrga9BOgsUrx0RjKnrDNXG05I"
+    "EnQHXbZxjReeSFP6ixNBb2e+01lf3k/4frqOI3GW3it62w7DiTsinoKTOj0oewpO+tNr8fgbyQk59ZyCE++qoszf9iC25OffhDX7"
+    "RTlbkMjobG2N5rjqbK1ywlW/e6vn2l1easYejQoghuLNBPCwVOjisCB0cZgPXSh3EVRzZ/UugstQ5g3Aug7OvNHlQU//AwBIxWE="
+)
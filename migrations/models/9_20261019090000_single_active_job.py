@@ -0,0 +1,56 @@
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    # Same statements for SQLite and Postgres. Before the index can exist, all but the oldest
+    # active job of a type (left by processes racing each other) are failed
+    return """
+        UPDATE "syncjob" SET "status" = 'failed', "error" = 'Duplicate of an older active job of the same type'
+            WHERE "status" IN ('queued', 'running') AND EXISTS (
+                SELECT 1 FROM "syncjob" AS "older"
+                WHERE "older"."job_type" = "syncjob"."job_type" AND "older"."status" IN ('queued', 'running')
+                    AND "older"."id" < "syncjob"."id");
+        CREATE UNIQUE INDEX IF NOT EXISTS "uidx_syncjob_active_type" ON "syncjob" ("job_type") WHERE "status" IN ('queued', 'running');"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "uidx_syncjob_active_type";"""
+
+
+MODELS_STATE = (
+    "eJztXVtv2zYU/iuGX5oC2ZC4ddMN2EPcpm22JikStxt6gUBbjK1FIj2KSmIU+e8jqTtFypIjXxTzpY3JcyTy0yHPp3Mo8mfXwzZ0"
+    "/V9PEHXo/AskvoNR9/fOzy4CHmR/qAX2O10wm6XVvICCkSs0oBC9zYiOfErAmLLKa+D6kBXZ0B8TZ0bDu6HAdXkhHjNBB03SogA5"
+    "/wXQongC6RQSVvHtByt2kA3voR//nN1Y1w507VzDHZvfW5RbdD4TZaeIvhOC/G4ja4zdwEOp8GxOpxgl0g6ivHQCESSAQn55SgLe"
+    "fN66qLtxj8KWpiJhEzM6NrwGgUsz3a2IwRgjjh9rjS86OOF3+aV3+PLo5esXr16+ZiKiJUnJ0UPYvbTvoaJA4HzYfRD1gIJQQsCY"
+    "4hY+viJ2b6aAqMFLNSQAWbNlAGO4NoqgB+4tF6IJnbKfhwcHJXh9Ob588+H4co9JPed9wcyQQzM/j6p6YR0HNQUxY/15FAfORGuE"
+    "GaXFllgFyLggRTIdfzGUB4+2xN96vRcvjnoHL1697r88Ouq/PkhMslhVZpuD0/fcPHMox/aaQhvMbA6BBWgR3beshjoeVOOb15Qg"
+    "tiPVX+M/KgAe2WUtvB9nuiXoDU/PTq6Gx2efeMM93//PFYgcD094TU+UzqXSvVeSUScX6fx9OvzQ4T87Xy/OTwRg2KcTIu6Yyg2/"
+    "dnmbQECxhfCdBexst+PiuOiBz9bXN5l5hxeMwPjmDhDbKtTgHtbJFqu8nieXAAQm4jlwNHk7I2/2nuBgpnJzYUWpe5skIsattcit"
+    "jYlniUdn1UJQVmtmYm4HmCl4IwLQeMog8IvQ/Xl1ca7GLq8lIfcZsT59s50x3e+4jk9/rMrBrWzC5R3PzbUxI9g7O/5HJgtvPl4M"
+    "5EmUX2AgIU0hGLMZoS7UkprBugrW4v8aPDeWb4blrh7PPM/tV+K5/RKe2y/yXBfeQrfejJpVWR/N3a751KeABn493HI6uwrcGHsz"
+    "gOY1fXhOaSno1s/0mzc5AoHH7ljX6vJqO4qe63iO4n1TP8nF8rs6UBGmCt86hPcawGL5pXzrdr2Hn/wzLKcqyWv4x4vz97G4zF8k"
+    "Am7xsEQdspJqtARSOSpXKShXEpOTqQqsDSE0EErel/kCXehND2Neq5VQ9qpA2dND2StAWRbF1ENZGsHcVSjHgU+xZwFIsE2wh8Ac"
+    "1DJPtXorwW1myNcI0sohIqiIWgwizXd/XUIXUHWGIxt/HYhLbSdPeojNJy6NnroqiNMEFsPwUi0Gw6eBDbnCo8C4Cq+ylWNQC8Mj"
+    "UxgZgwooVpnTGXutHWL+r5jbTlkD2NBRUZYIxiG/0CeCrx13mQTXquPWOiT3ow5YUrpG7g7hdsT8YywmIvchbpgIzG/gPAF0FipG"
+    "b7bJY4lEslF/OmU/JtO0OKsvJlNksQZBGvqa46s3x29FzswqAPywODEVzX+69FQ6PS5IUo1SwUZTVd+66ZXDbNgPk71abfYqBbzy"
+    "+1+i0c5wda/fr0IU+309U+R1eaq4RAKw+eRfEcktNMYCB5RALCL4DhPoTNBfsKovSnLtWwdgiRsi4C6Z1nK2ofQADxtc3hAzR50b"
+    "yTDLBX6EZiQbdiTCj1o8yR6iaNzJWtyJDHtVpyLrGddiXItxLbvkWj4Bwl7DL+GtA+9UriVXX+paZkKSpJKrXE73s5v2L45IZOax"
+    "fIialXF1eD8j0OcrchNYUr9zb6Xtt9ILisuIbkYG2RUXYh0TP8SMkWnJI++7+H7GczbsOYu2U9V3FjWN98ys60A0Cu9VzRhnVFoS"
+    "q1930rgsXVe+Ur40ZbfMSvlNWC3rg32B3Hk3CUq3Yel8ZJaFlfNb+gmEebDLP9gkR7AFX0RcQj8QxlVgdFFNKZcjqUzLWFzY8vUy"
+    "uOie67xXgG4hcdi19Lfr/P3h5PKk4/hWLNr5I3yGhkYaGmlo5M7SyMyMoMjhY+xCgDQDPq8p4Ttiqquy1Lq+pzrEg4uLjzmIB6cy"
+    "hp/PBieXe4cCbybkhIEbxWJ2w8+fAo0z/PyJPtht4ufx+icFQc8sjdIzdD8jZL5bfkJMseTLnQVEcUe+XY5xqPu1p6xnaPZGc52L"
+    "efYW2uEWpTrXjl/bM51XczT+E4+UHjeqKve4TOjfSGhtQTF2w9BA9uMPhqsEiaKmCk0rUtuvGpVKbrngRkH2TgwM5xYmTS0LSH2P"
+    "OvK92zk97+w9Y3AE0H6233lGAoQYWM+emwBV47Qja0hVPWZWp53esl9ti4SSHRJkV5mOpuq8I9ZYH4bdcFB1G2MdjX/kNQMEeLW2"
+    "REk1GtgNZauifCvZDGVGMK9WQKydLrMqbdqwrrFXC4opcGsAlsjv6C4KPBnlKmJi+kGcaphBXGEQQ0IwqZP9SBRM7kOZ+yCQ9czn"
+    "EdmRYktU7UCX1XZ0vN9hciM2JavDf3JKLTHLNcRcphAQOoKALpFVkHXN1qcb2PrUZP6eXIKo+GDZyxtZ7sHmNc0I3fAIvXaQ40+X"
+    "epKSqnmUu7vPNA8UX1Eg4tnKKHJYub8ojuwnYg1/f5lu3R99L24+vXzyxyu0P6hqdkNo5JXijnWYeIDc1Ho9yyq18/Ws8eC0C3wq"
+    "UltL8YWitqEMG2Z/4pFcs26K57LsM5UvYB7r7jLB3E5VCjIo72Sl54Py1lNmOV+b6N9Gd95Y93Zua+AwIS511/bltdrJYlaB5tqJ"
+    "9ZNE0fEtHyJHlYlb9LlMqmc+lpHWJzA0oIUCbwQVuOoNVNZr4xGFzb+xbMmBTltFZ1eSkbfDFaBVrTUSb+Vc2vx+86zDtmq061eZ"
+    "Jwo7mnH3zSkvj0DPHFrS6OIZc+LGo2dAcMteJIkVEMUyQz2Mea1WQrmS0+oEF6xDeBIFw3UqcB3oAUdhp3p4EwUDbwV476CCSurB"
+    "jcQNtBWgBbatoJl6bGN5A24FcOOzaSm2/BvHrTVDqHQN6BVA55HipTOSBWWTudpwQpLiG4j4Zjp+dEpO5S9OJL2d+U5nfXk/6Zvu"
+    "Jo7pWXr/6m07oCfpiHwyT+ZEo/zJPNnPweUjeRSn9jRzMk+y04s2f3sMiaM+kyeq2S/L2YJUxmRrGzTHVWdrtROu/t1bP9fu8lIz"
+    "PjRqgBiJtxPAw0qhi8OS0MVhMXSh3dlQz531OxsuQ5k3AOs6OPNGlwc9/A9u8PSK"
+)
@@ -1,5 +1,30 @@
 from tortoise.models import Model
 from tortoise import fields
+from tortoise.indexes import Index, PartialIndex
+
+# SyncJob statuses of a job that is not finished yet; at most one job per type may have one
+ACTIVE_JOB_STATUSES = ("queued", "running")
+
+
+class UniqueWhereIndex(Index):
+    """
+    Partial unique index: `fields` are unique among the rows matching `condition` (raw SQL).
+    PartialIndex only supports equality conditions and plain indexes.
+    """
+
+    def __init__(self, *, fields: tuple, name: str, condition: str):
+        super().__init__(fields=fields, name=name)
+        self.extra = f" WHERE {condition}"
+
+    def get_sql(self, schema_generator, model, safe: bool) -> str:
+        return schema_generator.UNIQUE_INDEX_CREATE_TEMPLATE.format(
+            exists="IF NOT EXISTS " if safe else "",
+            index_name=self.name,
+            index_type="",
+            table_name=model._meta.db_table,
+            fields=", ".join(schema_generator.quote(field) for field in self.fields),
+            extra=self.extra,
+        )
 
 
 class TutorProfile(Model):
@@ -23,6 +48,8 @@ class TutorProfile(Model):
     web = fields.JSONField(null=True)  # Corresponds to "web" array in the JSON
     addr = fields.JSONField(null=True)  # Corresponds to "addr" array in the JSON
     teacher_to_skill = fields.JSONField(null=True)  # Corresponds to "teacher-to-skill" in the JSON
+    crm_synced_at = fields.DatetimeField(null=True)  # When the CRM fields above were last refreshed
+    token_version = fields.IntField(default=0)  # Bumped by auth.invalidate_tutor_identity; older tokens aren't trusted
 
 
 class Resume(Model):
@@ -33,6 +60,14 @@ class Resume(Model):
     created_at = fields.DatetimeField(auto_now_add=True)
     updated_at = fields.DatetimeField(auto_now=True)
 
+    class Meta:
+        # Listings are ordered by (created_at, id); see migrations/ and check_query_plans.py
+        indexes = (
+            Index(fields=("student_crm_id", "created_at", "id"), name="idx_resume_student_created"),
+            Index(fields=("created_at", "id"), name="idx_resume_created"),
+            PartialIndex(fields=("created_at", "id"), name="idx_resume_unverified", condition={"is_verified": False}),
+        )
+
 
 class ParentReview(Model):
     id = fields.IntField(pk=True)
@@ -41,6 +76,12 @@ class ParentReview(Model):
     created_at = fields.DatetimeField(auto_now_add=True)
     updated_at = fields.DatetimeField(auto_now=True)
 
+    class Meta:
+        indexes = (
+            Index(fields=("student_crm_id", "created_at", "id"), name="idx_parentrevi_student_created"),
+            Index(fields=("created_at", "id"), name="idx_parentrevi_created"),
+        )
+
 
 class Group(Model):
     id = fields.IntField(pk=True)
@@ -64,8 +105,74 @@ class Group(Model):
     tutors = fields.ManyToManyField('models.TutorProfile', related_name='groups', null=True)
 
 
+# One row per CRM teacher id in Group.teacher_ids, maintained by sync.sync_groups
+class GroupTeacher(Model):
+    id = fields.IntField(pk=True)
+    group = fields.ForeignKeyField('models.Group', related_name='teachers', on_delete=fields.CASCADE, db_index=True)
+    tutor_crm_id = fields.CharField(max_length=255)  # Same format as TutorProfile.tutor_crm_id
+
+    class Meta:
+        unique_together = (("tutor_crm_id", "group"),)
+
+
+# One row per CRM branch id in Group.branch_ids, maintained by sync.sync_groups
+class GroupBranch(Model):
+    id = fields.IntField(pk=True)
+    group = fields.ForeignKeyField('models.Group', related_name='branches', on_delete=fields.CASCADE, db_index=True)
+    branch = fields.CharField(max_length=255)  # Same format as TutorProfile.branch
+
+    class Meta:
+        unique_together = (("branch", "group"),)
+
+
 class Student(Model):
     id = fields.IntField(pk=True)
     student_crm_id = fields.IntField(unique=True)  # Corresponds to "customer_id" in the JSON
     student_name = fields.CharField(max_length=255)  # Corresponds to "client_name" in the JSON
-    group = fields.ForeignKeyField('models.Group', related_name='students', null=True, on_delete=fields.CASCADE)
+    group = fields.ForeignKeyField('models.Group', related_name='students', null=True, on_delete=fields.CASCADE,
+                                   db_index=True)
+
+
+class SyncState(Model):
+    id = fields.IntField(pk=True)
+    entity = fields.CharField(max_length=50)  # Synced entity: "groups" or "students"
+    branch = fields.CharField(max_length=255)  # CRM branch id
+    watermark = fields.CharField(max_length=20, null=True)  # Latest CRM "updated_at" seen by a successful sync
+    last_synced_at = fields.DatetimeField(null=True)
+    last_full_sync_at = fields.DatetimeField(null=True)
+
+    class Meta:
+        unique_together = (("entity", "branch"),)
+
+
+# Version counters behind the ETag / Last-Modified of cached reads; see conditional.py
+class EntityVersion(Model):
+    id = fields.IntField(pk=True)
+    entity = fields.CharField(max_length=100, unique=True)  # "groups", "students", "resumes" or "resumes:<student_crm_id>"
+    version = fields.BigIntField(default=0)
+    updated_at = fields.DatetimeField(null=True)  # Time of the last bump
+
+
+class SyncJob(Model):
+    id = fields.IntField(pk=True)
+    job_type = fields.CharField(max_length=50)  # See jobs.JOB_HANDLERS
+    status = fields.CharField(max_length=20, default="queued")  # queued, running, succeeded, failed
+    params = fields.JSONField(null=True)
+    progress = fields.IntField(default=0)
+    total = fields.IntField(null=True)
+    result = fields.JSONField(null=True)
+    error = fields.TextField(null=True)
+    requested_by = fields.IntField(null=True)  # TutorProfile id, empty for scheduled runs
+    worker_id = fields.CharField(max_length=255, null=True)  # jobs.WORKER_ID of the process that claimed the job
+    heartbeat_at = fields.DatetimeField(null=True)  # Refreshed by that process while the job runs
+    created_at = fields.DatetimeField(auto_now_add=True)
+    started_at = fields.DatetimeField(null=True)
+    finished_at = fields.DatetimeField(null=True)
+
+    class Meta:
+        indexes = (
+            Index(fields=("job_type", "status"), name="idx_syncjob_type_status"),
+            # Single flight across processes: a second active job of a type fails to insert
+            UniqueWhereIndex(fields=("job_type",), name="uidx_syncjob_active_type",
+                             condition=f"\"status\" IN {ACTIVE_JOB_STATUSES!r}"),
+        )
@@ -0,0 +1,104 @@
+import base64
+import json
+from datetime import date, datetime, time
+from typing import Any, List, Optional, Sequence, Tuple
+from fastapi import HTTPException, status
+from pypika_tortoise import functions
+from pypika_tortoise.enums import SqlTypes
+from tortoise.expressions import Function, Q, Subquery
+from tortoise.queryset import QuerySet
+import models
+
+# Response header carrying the cursor of the next page (absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([value.isoformat() if isinstance(value, datetime) else value for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _cursor_value(key: str, value: Any) -> Any:
+    # Keys are "*_at" timestamps or integer ids; bool is an int subclass, but never a valid id
+    if key.endswith("_at"):
+        return datetime.fromisoformat(value)
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise ValueError(f"Cursor value of {key} is not an integer")
+    return value
+
+
+def decode_cursor(cursor: str, keys: Sequence[str]) -> List[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError("Cursor does not match the listing")
+        return [_cursor_value(key, value) for key, value in zip(keys, values)]
+    except (ValueError, TypeError, KeyError):
+        # Well-formed JSON can still hold values of the wrong type, e.g. a number for a timestamp
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def keyset_queryset(queryset: QuerySet, cursor: Optional[str], keys: Sequence[str] = ("created_at", "id")) -> QuerySet:
+    """Order a queryset by `keys` descending and keep only the rows after the cursor."""
+    queryset = queryset.order_by(*(f"-{key}" for key in keys))
+    if cursor:
+        values = decode_cursor(cursor, keys)
+        if len(keys) == 1:
+            queryset = queryset.filter(**{f"{keys[0]}__lt": values[0]})
+        else:
+            queryset = queryset.filter(Q(**{f"{keys[0]}__lt": values[0]}) | Q(**{keys[0]: values[0], f"{keys[1]}__lt": values[1]}))
+    return queryset
+
+
+async def paginate(queryset: QuerySet, cursor: Optional[str], limit: int,
+                   keys: Sequence[str] = ("created_at", "id"),
+                   fields: Optional[Sequence[str]] = None) -> Tuple[List[Any], Optional[str]]:
+    """
+    Keyset pagination, newest first. Rows are ordered by `keys` descending and the cursor holds
+    the key values of the last returned row, so pages stay stable while rows are being added.
+    With `fields` the rows are dicts from .values(*fields) (which must include the keys) instead
+    of model instances. Returns the page and the cursor of the next page (None on the last page).
+    """
+    page_queryset = keyset_queryset(queryset, cursor, keys).limit(limit + 1)
+    rows = await (page_queryset.values(*fields) if fields else page_queryset)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_row = rows[-1]
+        next_cursor = encode_cursor([last_row[key] if fields else getattr(last_row, key) for key in keys])
+    return rows, next_cursor
+
+
+class _AsText(Function):
+    """CAST(field AS VARCHAR), to compare Student.student_crm_id with Resume.student_crm_id."""
+    database_func = functions.Cast
+
+    def __init__(self, field: str):
+        super().__init__(field, SqlTypes.VARCHAR)
+
+
+def student_crm_ids_in_branch(branch: str) -> Subquery:
+    """
+    Subquery of the CRM ids (as strings, like Resume.student_crm_id) of the students whose group
+    belongs to a branch, looked up through GroupBranch, so the ids never leave the database.
+    """
+    group_ids = Subquery(models.GroupBranch.filter(branch=str(branch)).values("group_id"))
+    return Subquery(models.Student.filter(group_id__in=group_ids)
+                    .annotate(crm_id=_AsText("student_crm_id")).values("crm_id"))
+
+
+def filter_student_records(queryset: QuerySet, branch: Optional[str] = None, verified: Optional[bool] = None,
+                           created_from: Optional[date] = None, created_to: Optional[date] = None,
+                           updated_since: Optional[datetime] = None) -> QuerySet:
+    """Apply the common listing filters to a Resume / ParentReview queryset."""
+    if branch:
+        queryset = queryset.filter(student_crm_id__in=student_crm_ids_in_branch(branch))
+    if verified is not None:
+        queryset = queryset.filter(is_verified=verified)
+    if created_from:
+        queryset = queryset.filter(created_at__gte=datetime.combine(created_from, time.min))
+    if created_to:
+        queryset = queryset.filter(created_at__lte=datetime.combine(created_to, time.max))
+    if updated_since:
+        queryset = queryset.filter(updated_at__gte=updated_since)
+    return queryset
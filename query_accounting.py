@@ -0,0 +1,166 @@
+"""
+Per-request DB query accounting: every request (and sync job) counts and times its queries,
+queries slower than settings.slow_query_ms are logged with their parameters, and a query shape
+(the SQL with literals and IN lists collapsed) repeated settings.repeated_query_threshold times
+within one request is logged as a likely N+1. assert_max_queries() turns the counts into a test.
+"""
+import contextlib
+import functools
+import logging
+import re
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, List, Optional, Sequence
+from starlette.types import ASGIApp, Receive, Scope, Send
+import db_monitor
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\$\d+|\b\d+(?:\.\d+)?\b")
+_VALUE_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+MAX_LOGGED_VALUES = 10
+MAX_LOGGED_VALUE_LENGTH = 80
+
+
+@functools.lru_cache(maxsize=2048)
+def query_shape(query: str) -> str:
+    """The query with literals and placeholders replaced by "?" and value lists by "(...)"."""
+    shape = _VALUE_LISTS.sub("(...)", _LITERALS.sub("?", query))
+    return " ".join(shape.split())
+
+
+def _format_values(values: Optional[Sequence[Any]]) -> str:
+    if not values:
+        return "[]"
+    if values and isinstance(values[0], (list, tuple)):
+        # execute_many: only the first row
+        return f"{_format_values(values[0])} (+{len(values) - 1} rows)"
+    shown = [repr(value)[:MAX_LOGGED_VALUE_LENGTH] for value in list(values)[:MAX_LOGGED_VALUES]]
+    more = f", ... +{len(values) - MAX_LOGGED_VALUES}" if len(values) > MAX_LOGGED_VALUES else ""
+    return f"[{', '.join(shown)}{more}]"
+
+
+class QueryStats:
+    """Queries of one request or job: how many, how long, and how often each shape ran."""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes: Counter = Counter()
+        self.report_repeated = True  # See expect_repeated_queries()
+
+    def add(self, query: str, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        self.shapes[query_shape(query)] += 1
+
+    def repeated(self, threshold: int) -> List[tuple]:
+        """(shape, count) of the shapes that ran at least threshold times, most frequent first."""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+    def describe(self) -> str:
+        lines = [f"{self.count} queries in {self.seconds * 1000:.1f} ms for {self.label}"]
+        lines += [f"  {count} x {shape}" for shape, count in self.shapes.most_common()]
+        return "\n".join(lines)
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+# Called with the stats of every request once it has been served (see assert_max_queries)
+_request_listeners: List[Callable[[QueryStats], None]] = []
+
+
+def _account(query: str, values: Optional[Sequence[Any]], seconds: float):
+    stats = _current.get()
+    if stats is not None:
+        stats.add(query, seconds)
+    if settings.slow_query_ms and seconds * 1000 >= settings.slow_query_ms:
+        logger.warning("Slow query (%.1f ms) in %s: %s; values: %s", seconds * 1000,
+                       stats.label if stats else "background", " ".join(query.split()), _format_values(values))
+
+
+def install():
+    """Start accounting queries (idempotent)."""
+    db_monitor.add_query_observer(_account)
+
+
+def expect_repeated_queries():
+    """
+    Keep the current request or job from being reported as a likely N+1. For code that repeats
+    a query shape by design, like the chunked reads of a streamed export.
+    """
+    stats = _current.get()
+    if stats is not None:
+        stats.report_repeated = False
+
+
+def _report(stats: QueryStats):
+    threshold = settings.repeated_query_threshold
+    if not threshold or not stats.report_repeated:
+        return
+    for shape, count in stats.repeated(threshold):
+        logger.warning("Likely N+1 in %s: %d queries shaped like %s", stats.label, count, shape)
+
+
+@contextlib.contextmanager
+def track_queries(label: str, report_repeated: bool = True) -> Iterator[QueryStats]:
+    """
+    Account the queries made inside the block (in this task and the tasks it starts) to one
+    QueryStats. Pass report_repeated=False for long-running work that repeats queries by design.
+    """
+    install()
+    stats = QueryStats(label)
+    stats.report_repeated = report_repeated
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+        _report(stats)
+
+
+class QueryAccountingMiddleware:
+    """ASGI middleware giving every HTTP request its own QueryStats."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        install()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(f"{scope['method']} {scope['path']}")
+        token = _current.set(stats)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            if route is not None:
+                stats.label = f"{scope['method']} {route.path}"
+            _report(stats)
+            for listener in list(_request_listeners):
+                listener(stats)
+
+
+@contextlib.contextmanager
+def assert_max_queries(limit: int) -> Iterator[List[QueryStats]]:
+    """
+    Test helper: fail if any request served inside the block (by an app with
+    QueryAccountingMiddleware) made more than limit queries.
+
+        with assert_max_queries(3):
+            client.get("/api/v1/groups/clients/?group_id=1", headers=headers)
+    """
+    served: List[QueryStats] = []
+    _request_listeners.append(served.append)
+    try:
+        yield served
+    finally:
+        _request_listeners.remove(served.append)
+    assert served, "No request was served through QueryAccountingMiddleware"
+    for stats in served:
+        assert stats.count <= limit, f"Expected at most {limit} queries, got {stats.describe()}"
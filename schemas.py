@@ -1,5 +1,6 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, TypeAdapter
+from typing import Any, Dict, List, Literal, Optional
+from typing_extensions import TypedDict
 from datetime import datetime
 
 
@@ -55,6 +56,7 @@ class TutorProfileUpdate(BaseModel):
 
 class TutorProfileResponse(TutorProfileBase):
     id: int
+    crm_synced_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -108,6 +110,122 @@ class ParentReviewResponse(ParentReviewBase):
         from_attributes = True
 
 
+# Row shapes of the list endpoints. Rows are read with .values() and dumped straight to JSON bytes
+# through these prebuilt adapters, without building and validating a model per row.
+class ResumeRow(TypedDict):
+    id: int
+    student_crm_id: str
+    content: Optional[str]
+    is_verified: bool
+    created_at: datetime
+    updated_at: Optional[datetime]
+
+
+class ParentReviewRow(TypedDict):
+    id: int
+    student_crm_id: str
+    content: Optional[str]
+    created_at: datetime
+    updated_at: Optional[datetime]
+
+
+class GroupRow(TypedDict):
+    id: int  # CRM group id
+    branch_ids: Any
+    teacher_ids: Any
+    name: str
+    level_id: int
+    status_id: int
+    company_id: Optional[int]
+    streaming_id: Optional[int]
+    limit: int
+    note: Optional[str]
+    b_date: Optional[str]
+    e_date: Optional[str]
+    created_at: Optional[str]
+    updated_at: Optional[str]
+    custom_aerodromnaya: Optional[str]
+
+
+class GroupClientRow(TypedDict):
+    customer_id: int
+    client_name: str
+
+
+# Field names for the matching .values() projections
+RESUME_ROW_FIELDS = list(ResumeRow.__annotations__)
+PARENT_REVIEW_ROW_FIELDS = list(ParentReviewRow.__annotations__)
+
+RESUME_ROWS = TypeAdapter(List[ResumeRow])
+PARENT_REVIEW_ROWS = TypeAdapter(List[ParentReviewRow])
+GROUP_ROWS = TypeAdapter(List[GroupRow])
+GROUP_CLIENT_ROWS = TypeAdapter(List[GroupClientRow])
+
+
+# Student dossier Schemas
+DossierField = Literal["id", "student_crm_id", "content", "is_verified", "created_at", "updated_at"]
+
+
+class StudentDossierRequest(BaseModel):
+    student_crm_ids: Optional[List[str]] = None
+    group_id: Optional[int] = None  # Use the students of this group instead of student_crm_ids
+    fields: Optional[List[DossierField]] = None  # Record fields to return, all by default; leave out "content" for list views
+
+
+class StudentDossier(BaseModel):
+    student_crm_id: str
+    resumes: List[Dict[str, Any]]  # Newest first
+    latest_verified_resume: Optional[Dict[str, Any]] = None
+    parent_reviews: List[Dict[str, Any]]  # Newest first
+
+
+# Group roster Schemas
+class RosterStudent(BaseModel):
+    customer_id: int
+    client_name: str
+    resume_count: int
+    is_verified: bool  # Has at least one verified resume
+    last_updated_at: Optional[datetime] = None  # Latest resume change
+
+
+class GroupRoster(BaseModel):
+    group_id: int
+    group_name: str
+    total: int
+    with_resume: int
+    done: int  # Students with a verified resume
+    students: List[RosterStudent]
+
+
+# Search Schemas
+class SearchResult(BaseModel):
+    kind: Literal["resumes", "reviews"]
+    id: int
+    student_crm_id: str
+    is_verified: Optional[bool] = None  # Resumes only
+    created_at: datetime
+    score: float  # Relative to the best match of the same kind (1.0); only comparable within one search
+    snippet: str  # HTML-escaped, matched words wrapped in <mark>
+
+
+# SyncJob Schemas
+class SyncJobResponse(BaseModel):
+    id: int
+    job_type: str
+    status: str
+    params: Optional[Dict[str, Any]] = None
+    progress: int = 0
+    total: Optional[int] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
 # Authentication Schemas
 class Token(BaseModel):
     access_token: str
@@ -118,5 +236,14 @@ class TokenData(BaseModel):
     phone_number: Optional[str] = None
 
 
+class TutorIdentity(BaseModel):
+    """Who is calling, as carried by the access token claims."""
+    id: int
+    phone_number: str
+    tutor_crm_id: Optional[str] = None
+    branch: Optional[str] = None
+    is_senior: bool = False
+
+
 class TutorLogin(BaseModel):
     phone_number: str
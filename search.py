@@ -0,0 +1,137 @@
+import html
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+from tortoise.backends.base.client import BaseDBAsyncClient
+import models
+
+# Searchable kinds and their tables
+SEARCH_TABLES = {
+    "resumes": "resume",
+    "reviews": "parentreview",
+}
+
+# Highlight markers (private use characters) used inside the database; they are swapped for <mark> after HTML-escaping the snippet
+_MARK_START = "\ue000"
+_MARK_END = "\ue001"
+SNIPPET_WORDS = 16
+
+# Postgres: the same expression is indexed and queried, so the GIN index is used
+PG_DOCUMENT = "to_tsvector('russian', coalesce(\"content\", ''))"
+
+
+def search_schema_sql(dialect: str) -> List[str]:
+    """
+    DDL of the full-text indexes. SQLite gets an external-content FTS5 table per searchable table,
+    kept up to date by triggers; Postgres gets a GIN index on the Russian tsvector of the content.
+    Either way the index follows every write, whatever code path it comes from.
+    """
+    statements = []
+    for table in SEARCH_TABLES.values():
+        if dialect == "postgres":
+            statements.append(
+                f'CREATE INDEX IF NOT EXISTS "idx_{table}_content_fts" ON "{table}" USING GIN ({PG_DOCUMENT})')
+            continue
+        fts = f"{table}_fts"
+        statements += [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS \"{fts}\" USING fts5(content, content='{table}', content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2')",
+            f'CREATE TRIGGER IF NOT EXISTS "{fts}_ai" AFTER INSERT ON "{table}" BEGIN '
+            f'INSERT INTO "{fts}" (rowid, content) VALUES (new.id, new.content); END',
+            f'CREATE TRIGGER IF NOT EXISTS "{fts}_ad" AFTER DELETE ON "{table}" BEGIN '
+            f'INSERT INTO "{fts}" ("{fts}", rowid, content) VALUES (\'delete\', old.id, old.content); END',
+            f'CREATE TRIGGER IF NOT EXISTS "{fts}_au" AFTER UPDATE OF content ON "{table}" BEGIN '
+            f'INSERT INTO "{fts}" ("{fts}", rowid, content) VALUES (\'delete\', old.id, old.content); '
+            f'INSERT INTO "{fts}" (rowid, content) VALUES (new.id, new.content); END',
+        ]
+    return statements
+
+
+async def ensure_search_index(connection: Optional[BaseDBAsyncClient] = None):
+    """Create the full-text indexes when missing (databases built by generate_schemas), indexing existing rows."""
+    connection = connection or models.Resume._meta.db
+    dialect = connection.capabilities.dialect
+    if dialect == "sqlite":
+        _, rows = await connection.execute_query("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE '%\\_fts' ESCAPE '\\'")
+        existing = {row["name"] for row in rows}
+    for statement in search_schema_sql(dialect):
+        await connection.execute_script(statement)
+    if dialect == "sqlite":
+        for table in SEARCH_TABLES.values():
+            if f"{table}_fts" not in existing:
+                await connection.execute_script(f"INSERT INTO \"{table}_fts\" (\"{table}_fts\") VALUES ('rebuild')")
+
+
+def fts5_query(text: str) -> Optional[str]:
+    """
+    FTS5 MATCH expression for free text: every word must match, as a prefix. SQLite has no
+    Russian stemmer, so prefixes stand in for it ("робот" finds "робототехника").
+    """
+    words = re.findall(r"\w+", text)
+    return " ".join(f'"{word}"*' for word in words) or None
+
+
+def _search_sql(table: str, dialect: str) -> str:
+    verified = f'"{table}"."is_verified"' if table == "resume" else "NULL"
+    columns = f'"{table}"."id", "{table}"."student_crm_id", {verified} AS "is_verified", "{table}"."created_at"'
+    if dialect == "postgres":
+        return (
+            f"SELECT {columns}, "
+            f"ts_headline('russian', coalesce(\"{table}\".\"content\", ''), query, "
+            f"'StartSel={_MARK_START}, StopSel={_MARK_END}, MaxWords={SNIPPET_WORDS}, MinWords={SNIPPET_WORDS // 2}') AS snippet, "
+            f"ts_rank_cd({PG_DOCUMENT}, query) AS score "
+            f"FROM \"{table}\", plainto_tsquery('russian', $1) AS query "
+            f"WHERE {PG_DOCUMENT} @@ query ORDER BY score DESC, \"{table}\".\"id\" DESC LIMIT $2"
+        )
+    fts = f"{table}_fts"
+    return (
+        f"SELECT {columns}, "
+        f"snippet(\"{fts}\", 0, '{_MARK_START}', '{_MARK_END}', '…', {SNIPPET_WORDS}) AS snippet, "
+        f"-bm25(\"{fts}\") AS score "
+        f"FROM \"{fts}\" JOIN \"{table}\" ON \"{table}\".\"id\" = \"{fts}\".rowid "
+        f"WHERE \"{fts}\" MATCH ? ORDER BY score DESC, \"{table}\".\"id\" DESC LIMIT ?"
+    )
+
+
+def _highlight(snippet: Optional[str]) -> str:
+    return html.escape(snippet or "").replace(_MARK_START, "<mark>").replace(_MARK_END, "</mark>")
+
+
+async def search_records(text: str, kinds: Sequence[str], limit: int) -> List[Dict[str, Any]]:
+    """
+    Full-text search over the content of the given kinds, best matches first. Each result has
+    the kind, the record id, student_crm_id, is_verified (resumes only), created_at, a relevance
+    score and an HTML-escaped snippet with <mark> around the matched words.
+
+    Every kind is ranked by its own index, whose raw scores depend on that table's statistics
+    (bm25 on SQLite, ts_rank_cd on Postgres). So before the kinds are merged, each score is divided
+    by the best score of its kind: the best match of every kind scores 1.0, and ties go to the
+    better-ranked result within its kind.
+    """
+    connection = models.Resume._meta.db
+    dialect = connection.capabilities.dialect
+    query = text.strip() if dialect == "postgres" else fts5_query(text)
+    if not query:
+        return []
+
+    ranked = []
+    for kind in kinds:
+        _, rows = await connection.execute_query(_search_sql(SEARCH_TABLES[kind], dialect), [query, limit])
+        best_score = max((float(row["score"]) for row in rows), default=0.0)
+        for rank, row in enumerate(rows):
+            row = dict(row)
+            created_at = row["created_at"]
+            if isinstance(created_at, str):
+                # SQLite returns raw column values
+                created_at = datetime.fromisoformat(created_at)
+            ranked.append((rank, {
+                "kind": kind,
+                "id": row["id"],
+                "student_crm_id": row["student_crm_id"],
+                "is_verified": None if row["is_verified"] is None else bool(row["is_verified"]),
+                "created_at": created_at,
+                "score": float(row["score"]) / best_score if best_score > 0 else 1.0,
+                "snippet": _highlight(row["snippet"]),
+            }))
+    ranked.sort(key=lambda item: (-item[1]["score"], item[0]))
+    return [result for _, result in ranked[:limit]]
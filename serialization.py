@@ -0,0 +1,25 @@
+from typing import Any, Dict, List, Optional
+from fastapi.responses import JSONResponse, Response
+from pydantic import TypeAdapter
+from pagination import NEXT_CURSOR_HEADER
+
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse
+except ImportError:
+    orjson = None
+
+# Response class of the whole app: orjson when it is installed, the standard library otherwise
+DefaultJSONResponse = ORJSONResponse if orjson is not None else JSONResponse
+
+
+def json_rows_response(adapter: TypeAdapter, rows: List[Dict[str, Any]], next_cursor: Optional[str] = None,
+                       headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Serialize .values() rows straight to JSON bytes with a prebuilt TypeAdapter. The rows are
+    not validated again, so they must already have the adapter's shape.
+    """
+    headers = dict(headers or {})
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    return Response(content=adapter.dump_json(rows), media_type="application/json", headers=headers)
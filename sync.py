@@ -0,0 +1,394 @@
+import asyncio
+from datetime import date, datetime, timedelta
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from tortoise import timezone
+from tortoise.transactions import in_transaction
+import models
+from conditional import GROUPS, STUDENTS, bump_versions
+from config import settings
+from crm_integration import CRMError, iter_all_groups, get_group_clients_from_crm
+
+
+# Group fields copied from the CRM "group/index" items (the CRM "id" is stored as crm_group_id)
+GROUP_FIELDS = [
+    "branch_ids",
+    "teacher_ids",
+    "name",
+    "level_id",
+    "status_id",
+    "company_id",
+    "streaming_id",
+    "limit",
+    "note",
+    "b_date",
+    "e_date",
+    "created_at",
+    "updated_at",
+    "custom_aerodromnaya",
+]
+
+
+# Called with (done, total) while a sync runs; total is None when it is not known up front
+ProgressCallback = Callable[[int, Optional[int]], Awaitable[None]]
+
+
+def group_fields_from_crm(group_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Extract the Group model fields from a CRM group item."""
+    return {field: group_data.get(field) for field in GROUP_FIELDS}
+
+
+def _chunks(items: List[Any], size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+async def _replace_group_links(model, value_field: str, values_by_group: Dict[int, Optional[List[Any]]],
+                               connection) -> int:
+    """
+    Rewrite the link rows (`model`, one per value) of groups keyed by CRM group id from a CRM id
+    list. Returns the number of links written.
+    """
+    batch_size = settings.sync_batch_size
+    group_ids = {}
+    for chunk in _chunks(list(values_by_group), batch_size):
+        group_ids.update(await models.Group.filter(crm_group_id__in=chunk).using_db(connection)
+                         .values_list("crm_group_id", "id"))
+
+    for chunk in _chunks(list(group_ids.values()), batch_size):
+        await model.filter(group_id__in=chunk).using_db(connection).delete()
+
+    links = [
+        model(group_id=group_ids[crm_group_id], **{value_field: value})
+        for crm_group_id, values in values_by_group.items() if crm_group_id in group_ids
+        for value in {str(value) for value in values or []}
+    ]
+    if links:
+        await model.bulk_create(links, batch_size=batch_size, using_db=connection)
+    return len(links)
+
+
+async def replace_group_teachers(teacher_ids_by_group: Dict[int, Optional[List[Any]]], connection) -> int:
+    """
+    Rewrite the GroupTeacher rows of groups (keyed by CRM group id) from their CRM teacher_ids.
+    Returns the number of links written.
+    """
+    return await _replace_group_links(models.GroupTeacher, "tutor_crm_id", teacher_ids_by_group, connection)
+
+
+async def replace_group_branches(branch_ids_by_group: Dict[int, Optional[List[Any]]], connection) -> int:
+    """
+    Rewrite the GroupBranch rows of groups (keyed by CRM group id) from their CRM branch_ids.
+    Returns the number of links written.
+    """
+    return await _replace_group_links(models.GroupBranch, "branch", branch_ids_by_group, connection)
+
+
+async def _write_groups_page(to_create: List[models.Group], to_update: List[models.Group],
+                             teacher_ids_by_group: Dict[int, Optional[List[Any]]],
+                             branch_ids_by_group: Dict[int, Optional[List[Any]]]):
+    """Write the diff of one page of CRM groups in one short transaction."""
+    batch_size = settings.sync_batch_size
+    async with in_transaction() as connection:
+        if to_create:
+            await models.Group.bulk_create(to_create, batch_size=batch_size, using_db=connection)
+        if to_update:
+            await models.Group.bulk_update(to_update, GROUP_FIELDS, batch_size=batch_size, using_db=connection)
+        if teacher_ids_by_group:
+            await replace_group_teachers(teacher_ids_by_group, connection)
+        if branch_ids_by_group:
+            await replace_group_branches(branch_ids_by_group, connection)
+        await bump_versions([GROUPS], connection)
+
+
+async def sync_groups(groups_pages: AsyncIterator[List[Dict[str, Any]]], delete_missing: bool = True,
+                      progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+    """
+    Upsert CRM groups into the database in bulk.
+
+    Existing groups are loaded once and each page is diffed in memory; new and changed rows
+    of a page are written with bulk_create / bulk_update in a transaction of their own, so no
+    transaction is held open while the CRM is crawled. Groups whose CRM updated_at did not change
+    are skipped. The GroupTeacher and GroupBranch links of new groups and of groups whose
+    teacher_ids or branch_ids changed are rewritten. When the crawl completed and delete_missing is set, groups that are no longer in
+    the CRM are deleted (their links go with them) in a final transaction.
+    """
+    stats = {"inserted": 0, "updated": 0, "unchanged": 0, "deleted": 0, "complete": True}
+    batch_size = settings.sync_batch_size
+
+    existing_groups = {group.crm_group_id: group for group in await models.Group.all()}
+    seen_group_ids = set()
+
+    try:
+        async for groups_page in groups_pages:
+            to_create = []
+            to_update = []
+            teacher_ids_by_group = {}
+            branch_ids_by_group = {}
+            for group_data in groups_page:
+                crm_group_id = group_data.get("id")
+                if crm_group_id is None or crm_group_id in seen_group_ids:
+                    continue
+                seen_group_ids.add(crm_group_id)
+
+                fields = group_fields_from_crm(group_data)
+                group = existing_groups.get(crm_group_id)
+                if group is None:
+                    to_create.append(models.Group(crm_group_id=crm_group_id, **fields))
+                    teacher_ids_by_group[crm_group_id] = fields["teacher_ids"]
+                    branch_ids_by_group[crm_group_id] = fields["branch_ids"]
+                elif group.updated_at is not None and group.updated_at == fields["updated_at"]:
+                    stats["unchanged"] += 1
+                elif all(getattr(group, field) == value for field, value in fields.items()):
+                    stats["unchanged"] += 1
+                else:
+                    if group.teacher_ids != fields["teacher_ids"]:
+                        teacher_ids_by_group[crm_group_id] = fields["teacher_ids"]
+                    if group.branch_ids != fields["branch_ids"]:
+                        branch_ids_by_group[crm_group_id] = fields["branch_ids"]
+                    for field, value in fields.items():
+                        setattr(group, field, value)
+                    to_update.append(group)
+
+            if to_create or to_update:
+                await _write_groups_page(to_create, to_update, teacher_ids_by_group, branch_ids_by_group)
+                stats["inserted"] += len(to_create)
+                stats["updated"] += len(to_update)
+            if progress:
+                await progress(len(seen_group_ids), None)
+    except CRMError:
+        # Keep what the reachable branches gave us, but don't delete anything based on a partial crawl
+        stats["complete"] = False
+
+    if delete_missing and stats["complete"] and seen_group_ids:
+        missing_ids = [group.id for crm_group_id, group in existing_groups.items() if crm_group_id not in seen_group_ids]
+        if missing_ids:
+            async with in_transaction() as connection:
+                for chunk in _chunks(missing_ids, batch_size):
+                    # The driver's row count would include the cascaded link rows
+                    await models.Group.filter(id__in=chunk).using_db(connection).delete()
+                    stats["deleted"] += len(chunk)
+                # Deleted groups take their students with them
+                await bump_versions([GROUPS, STUDENTS], connection)
+
+    return stats
+
+
+# "auto" runs a delta sync, or a full one when the last full sync is older than settings.sync_full_reconcile_hours
+SYNC_MODES = ("auto", "delta", "full")
+
+
+async def load_sync_states(entity: str) -> Dict[str, models.SyncState]:
+    """Load the per-branch sync watermarks of an entity, keyed by branch id."""
+    return {state.branch: state for state in await models.SyncState.filter(entity=entity)}
+
+
+def resolve_sync_mode(mode: str, states: Dict[str, models.SyncState]) -> str:
+    """Turn the "auto" mode into "delta" or "full" depending on when the last full sync ran."""
+    if mode != "auto":
+        return mode
+    if not states or any(state.last_full_sync_at is None for state in states.values()):
+        return "full"
+
+    oldest_full_sync = min(state.last_full_sync_at for state in states.values())
+    if timezone.now() - oldest_full_sync > timedelta(hours=settings.sync_full_reconcile_hours):
+        return "full"
+    return "delta"
+
+
+def advance_watermarks(watermarks: Dict[str, str], branch_ids: Optional[Iterable[Any]], updated_at: Optional[str]):
+    """Raise the watermark of every branch of a record to the record's CRM updated_at."""
+    if not updated_at:
+        return
+    for branch in branch_ids or []:
+        if updated_at > watermarks.get(str(branch), ""):
+            watermarks[str(branch)] = updated_at
+
+
+async def save_sync_states(entity: str, states: Dict[str, models.SyncState], watermarks: Dict[str, str], full: bool):
+    """Store the new watermarks after a successful sync. Watermarks never move backwards."""
+    now = timezone.now()
+    async with in_transaction() as connection:
+        for branch in set(states) | set(watermarks):
+            state = states.get(branch) or models.SyncState(entity=entity, branch=branch)
+            watermark = watermarks.get(branch)
+            if watermark and (not state.watermark or watermark > state.watermark):
+                state.watermark = watermark
+            state.last_synced_at = now
+            if full:
+                state.last_full_sync_at = now
+            await state.save(using_db=connection)
+
+
+async def _track_watermarks(groups_pages: AsyncIterator[List[Dict[str, Any]]], watermarks: Dict[str, str]):
+    async for groups_page in groups_pages:
+        for group_data in groups_page:
+            advance_watermarks(watermarks, group_data.get("branch_ids"), group_data.get("updated_at"))
+        yield groups_page
+
+
+async def run_groups_sync(mode: str = "auto", progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+    """
+    Synchronize groups with the CRM.
+
+    A delta sync only asks the CRM for groups changed since each branch's watermark and
+    never deletes; a full sync re-reads everything and deletes groups missing from the CRM.
+    """
+    states = await load_sync_states("groups")
+    mode = resolve_sync_mode(mode, states)
+    full = mode == "full"
+    updated_since = None if full else {branch: state.watermark for branch, state in states.items() if state.watermark}
+
+    watermarks = {}
+    stats = await sync_groups(_track_watermarks(iter_all_groups(updated_since), watermarks), delete_missing=full,
+                              progress=progress)
+    if stats["complete"]:
+        await save_sync_states("groups", states, watermarks, full)
+
+    stats["mode"] = mode
+    return stats
+
+
+def _group_changed_since(group: models.Group, states: Dict[str, models.SyncState]) -> bool:
+    if not group.branch_ids:
+        return True
+    for branch in group.branch_ids:
+        state = states.get(str(branch))
+        if state is None or not state.watermark or (group.updated_at or "") >= state.watermark:
+            return True
+    return False
+
+
+# CRM group dates are "DD.MM.YYYY"; ISO dates are accepted too
+GROUP_DATE_FORMATS = ("%d.%m.%Y", "%Y-%m-%d")
+
+
+def group_is_running(group: models.Group, today: date) -> bool:
+    """Whether a group has not ended yet. Groups without a readable end date count as running."""
+    for date_format in GROUP_DATE_FORMATS:
+        try:
+            return datetime.strptime(group.e_date or "", date_format).date() >= today
+        except ValueError:
+            continue
+    return True
+
+
+async def select_groups_for_student_sync(mode: str = "auto") -> Tuple[str, Dict[str, models.SyncState], List[models.Group]]:
+    """
+    Pick the groups whose students should be re-read from the CRM.
+
+    A full sync takes all groups. Enrolling or removing a customer in the CRM doesn't change the
+    group's updated_at, so a delta sync can't tell which memberships changed: it re-reads every
+    group that is still running, and of the groups that have ended only those changed since the
+    students watermark of their branch. Memberships of other ended groups are refreshed by the
+    next full sync.
+    """
+    states = await load_sync_states("students")
+    mode = resolve_sync_mode(mode, states)
+    # In id order, which decides the group of a student listed in several (see run_students_sync)
+    groups = await models.Group.all().order_by("id")
+    if mode == "delta":
+        today = timezone.localtime().date()
+        groups = [group for group in groups if group_is_running(group, today) or _group_changed_since(group, states)]
+    return mode, states, groups
+
+
+def group_watermarks(groups: Iterable[models.Group]) -> Dict[str, str]:
+    """Per-branch watermarks covering the given groups."""
+    watermarks = {}
+    for group in groups:
+        advance_watermarks(watermarks, group.branch_ids, group.updated_at)
+    return watermarks
+
+
+async def _fetch_group_clients(group: models.Group, fallback_branch: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+    """Read a group's clients from the CRM, trying each of the group's own branches in turn."""
+    branches = [str(branch) for branch in group.branch_ids or []] or ([fallback_branch] if fallback_branch else [])
+    for branch in branches:
+        group_clients = await get_group_clients_from_crm(str(group.crm_group_id), branch)
+        if group_clients is not None:
+            return group_clients
+    return None
+
+
+async def run_students_sync(mode: str = "auto", branch: Optional[str] = None,
+                            progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+    """
+    Re-read the students of the selected groups from the CRM and link them to their groups.
+
+    Group memberships are fetched concurrently using each group's own branch_ids (branch is only
+    used for groups without branches). Existing students are loaded with one query and inserts,
+    moves and renames are applied with bulk operations in one transaction. Students that left
+    a refreshed group are detached from it. Clients the CRM listed but whose details could not be
+    read keep their stored name (and new ones are skipped); like failed groups they keep the
+    watermarks where they were, so the next sync retries them.
+    """
+    mode, states, groups = await select_groups_for_student_sync(mode)
+    stats = {"synced_count": 0, "inserted": 0, "updated": 0, "detached": 0,
+             "groups": len(groups), "failed_groups": 0, "unresolved_clients": 0, "mode": mode}
+
+    async def fetch(group: models.Group):
+        return group, await _fetch_group_clients(group, branch)
+
+    fetched = {}
+    for done, next_result in enumerate(asyncio.as_completed([fetch(group) for group in groups]), start=1):
+        group, group_clients = await next_result
+        if group_clients is None:
+            stats["failed_groups"] += 1
+        else:
+            fetched[group.id] = group_clients
+        if progress:
+            await progress(done, len(groups))
+
+    # Student CRM id -> (group id, name or None when unresolved); a student listed in several groups
+    # goes to the one with the lowest id, so repeated syncs don't move them back and forth
+    memberships = {}
+    for group in groups:
+        for client in fetched.get(group.id, []):
+            customer_id = client.get("customer_id")
+            if not customer_id:
+                continue
+            client_name = client.get("client_name")
+            if client_name:
+                stats["synced_count"] += 1
+            else:
+                stats["unresolved_clients"] += 1
+            group_id, known_name = memberships.get(int(customer_id), (group.id, None))
+            memberships[int(customer_id)] = (group_id, known_name or client_name)
+
+    batch_size = settings.sync_batch_size
+    async with in_transaction() as connection:
+        students = {student.student_crm_id: student for student in await models.Student.all().using_db(connection)}
+
+        to_create = []
+        to_update = []
+        for student_crm_id, (group_id, student_name) in memberships.items():
+            student = students.get(student_crm_id)
+            if student is None:
+                if student_name:
+                    to_create.append(models.Student(student_crm_id=student_crm_id, student_name=student_name, group_id=group_id))
+            elif student.group_id != group_id or (student_name and student.student_name != student_name):
+                student.group_id = group_id
+                student.student_name = student_name or student.student_name
+                to_update.append(student)
+
+        # Students of refreshed groups that the CRM no longer lists anywhere
+        for student in students.values():
+            if student.group_id in fetched and student.student_crm_id not in memberships:
+                student.group_id = None
+                to_update.append(student)
+                stats["detached"] += 1
+
+        if to_create:
+            await models.Student.bulk_create(to_create, batch_size=batch_size, using_db=connection)
+        if to_update:
+            await models.Student.bulk_update(to_update, ["group_id", "student_name"], batch_size=batch_size, using_db=connection)
+        if to_create or to_update:
+            await bump_versions([STUDENTS], connection)
+        stats["inserted"] = len(to_create)
+        stats["updated"] = len(to_update) - stats["detached"]
+
+    # Move the watermarks only when every group and client was read, so failures are retried by the next delta sync
+    if groups and not stats["failed_groups"] and not stats["unresolved_clients"]:
+        await save_sync_states("students", states, group_watermarks(groups), mode == "full")
+
+    return stats
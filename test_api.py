@@ -52,5 +52,35 @@ def test_get_group_clients():
     assert response.status_code in [200, 401, 403, 422]
 
 
+def test_token_claims_are_trusted_until_the_tutor_is_invalidated():
+    import auth
+    import models
+
+    tutor = asyncio.run(models.TutorProfile.create(phone_number="+375290000000", tutor_crm_id="1", branch="1", is_senior=True))
+    token = auth.create_access_token(data=auth.tutor_token_claims(tutor))
+    headers = {"Authorization": f"Bearer {token}"}
+
+    # Senior-only endpoint: 404 for a senior tutor, 403 for anyone else
+    assert client.get("/api/v1/jobs/999999/", headers=headers).status_code == 404
+
+    # Another process demotes the tutor; this one notices once its cached entry expires
+    async def demote():
+        await models.TutorProfile.filter(id=tutor.id).update(is_senior=False)
+        await auth.invalidate_tutor_identity(tutor.id)
+
+    asyncio.run(demote())
+    auth._identity_cache[tutor.id] = (auth._identity_from_tutor(tutor), tutor.token_version, float("inf"))
+    assert client.get("/api/v1/jobs/999999/", headers=headers).status_code == 404
+    auth._identity_cache.clear()
+    assert client.get("/api/v1/jobs/999999/", headers=headers).status_code == 403
+
+    async def delete():
+        await models.TutorProfile.filter(id=tutor.id).delete()
+        await auth.invalidate_tutor_identity(tutor.id)
+
+    asyncio.run(delete())
+    assert client.get("/api/v1/jobs/999999/", headers=headers).status_code == 401
+
+
 if __name__ == "__main__":
     pytest.main(["-v", __file__])
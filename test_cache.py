@@ -0,0 +1,57 @@
+import asyncio
+import time
+from cache import MemoryBackend, ReadThroughCache
+
+
+def test_concurrent_misses_share_one_load():
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"name": "Anna"}
+
+    async def run():
+        cache = ReadThroughCache(MemoryBackend(1024), ttl_seconds=60, stale_seconds=60)
+        results = await asyncio.gather(*(cache.get_or_load("1:10", loader) for _ in range(5)))
+        cached = await cache.get_or_load("1:10", loader)
+        return results, cached
+
+    results, cached = asyncio.run(run())
+    assert results == [{"name": "Anna"}] * 5
+    assert cached == {"name": "Anna"}
+    assert len(calls) == 1
+
+
+def test_stale_value_is_served_while_refreshing():
+    versions = iter(["old", "new"])
+
+    async def loader():
+        return {"name": next(versions)}
+
+    async def run():
+        cache = ReadThroughCache(MemoryBackend(1024), ttl_seconds=60, stale_seconds=60)
+        await cache.get_or_load("key", loader)
+        # Age the entry past its TTL but keep it within the stale window
+        value, _, expires_at, size = cache.backend._entries["key"]
+        cache.backend._entries["key"] = (value, time.time() - 1, expires_at, size)
+        stale = await cache.get_or_load("key", loader)
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        fresh = await cache.get_or_load("key", loader)
+        return stale, fresh
+
+    assert asyncio.run(run()) == ({"name": "old"}, {"name": "new"})
+
+
+def test_memory_backend_evicts_least_recently_used():
+    async def run():
+        backend = MemoryBackend(max_bytes=30)
+        expires_at = time.time() + 60
+        await backend.set("a", "x" * 10, expires_at, expires_at)
+        await backend.set("b", "y" * 10, expires_at, expires_at)
+        await backend.get("a")
+        await backend.set("c", "z" * 10, expires_at, expires_at)
+        return [key for key in "abc" if await backend.get(key) is not None]
+
+    assert asyncio.run(run()) == ["a", "c"]
@@ -0,0 +1,53 @@
+from fastapi import Request
+import models
+from conditional import GROUPS, STUDENTS, bump_versions, conditional_get, get_versions, resume_entities, student_resumes
+from sync import sync_groups
+
+
+def make_request(**headers) -> Request:
+    return Request({"type": "http", "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]})
+
+
+async def pages(*groups_pages):
+    for page in groups_pages:
+        yield page
+
+
+def test_etag_changes_only_with_writes(run_with_db):
+    async def scenario():
+        first, validators = await conditional_get(make_request(), [student_resumes("1")])
+        etag = validators["ETag"]
+        cached, _ = await conditional_get(make_request(if_none_match=f'W/"x", {etag}'), [student_resumes("1")])
+        other_scope, _ = await conditional_get(make_request(if_none_match=etag), [student_resumes("1")], scope=("tutor",))
+
+        await bump_versions(resume_entities(["1", "2"]))
+        stale, fresh_validators = await conditional_get(make_request(if_none_match=etag), [student_resumes("1")])
+        since, _ = await conditional_get(make_request(if_modified_since=fresh_validators["Last-Modified"]), [student_resumes("1")])
+        versions, _ = await get_versions(["resumes", student_resumes("2"), student_resumes("3")])
+        return first, cached, other_scope, stale, fresh_validators, since, versions
+
+    first, cached, other_scope, stale, fresh_validators, since, versions = run_with_db(scenario)
+    assert first is None and other_scope is None and stale is None
+    assert cached.status_code == 304 and cached.headers["ETag"]
+    assert since.status_code == 304
+    assert fresh_validators["Last-Modified"].endswith(" GMT")
+    assert versions == {"resumes": 1, "resumes:2": 1, "resumes:3": 0}
+
+
+def test_group_sync_bumps_versions_only_on_changes(run_with_db):
+    group = {"id": 1, "branch_ids": [1], "teacher_ids": [5], "name": "G", "level_id": 1, "status_id": 1, "limit": 10,
+             "updated_at": "2026-01-01 00:00:00"}
+
+    async def scenario():
+        await sync_groups(pages([group]))
+        created, _ = await get_versions([GROUPS, STUDENTS])
+        await sync_groups(pages([group]))
+        unchanged, _ = await get_versions([GROUPS, STUDENTS])
+        await sync_groups(pages([dict(group, id=2)]))
+        replaced, _ = await get_versions([GROUPS, STUDENTS])
+        return created, unchanged, replaced
+
+    created, unchanged, replaced = run_with_db(scenario)
+    assert created == unchanged == {GROUPS: 1, STUDENTS: 0}
+    # The written page and the deletion of group 1 are committed (and bumped) separately
+    assert replaced == {GROUPS: 3, STUDENTS: 1}
@@ -0,0 +1,263 @@
+import asyncio
+import httpx
+import pytest
+from config import settings
+from crm_integration import CRMClient
+
+
+@pytest.fixture
+def crm_settings(monkeypatch):
+    monkeypatch.setattr(settings, "crm_api_url", "https://crm.example.com")
+    monkeypatch.setattr(settings, "crm_email", "bot@example.com")
+    monkeypatch.setattr(settings, "crm_api_key", "secret")
+
+
+def make_client(handler):
+    calls = {"login": 0, "requests": 0}
+
+    async def transport_handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/v2api/auth/login":
+            calls["login"] += 1
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, json={"token": f"token-{calls['login']}"})
+        calls["requests"] += 1
+        return handler(request)
+
+    return CRMClient(transport=httpx.MockTransport(transport_handler)), calls
+
+
+def test_concurrent_requests_share_one_login(crm_settings):
+    client, calls = make_client(lambda request: httpx.Response(200, json={"items": []}))
+
+    async def run():
+        await asyncio.gather(*(client.post("customer/index", 1, json={}) for _ in range(10)))
+        await client.close()
+
+    asyncio.run(run())
+    assert calls["login"] == 1
+    assert calls["requests"] == 10
+
+
+def test_unauthorized_response_refreshes_token_once(crm_settings):
+    def handler(request):
+        if request.headers["X-ALFACRM-TOKEN"] == "token-1":
+            return httpx.Response(401)
+        return httpx.Response(200, json={"items": [{"id": 1}]})
+
+    client, calls = make_client(handler)
+
+    async def run():
+        results = await asyncio.gather(*(client.post("customer/index", 1, json={}) for _ in range(5)))
+        await client.close()
+        return results
+
+    results = asyncio.run(run())
+    assert all(result["items"] == [{"id": 1}] for result in results)
+    assert calls["login"] == 2
+
+
+def test_group_clients_keep_order_and_mark_unresolved_clients(crm_settings, monkeypatch):
+    import crm_integration
+
+    def handler(request):
+        body = request.read()
+        if request.url.path.endswith("/cgi/index"):
+            return httpx.Response(200, json={"items": [{"customer_id": 3}, {"customer_id": 1}, {"customer_id": 2}]})
+        assert b"[" in body  # a single batched lookup by id list
+        return httpx.Response(200, json={"items": [{"id": 1, "name": "Anna"}, {"id": 3, "name": "Boris"}]})
+
+    client, calls = make_client(handler)
+    monkeypatch.setattr(crm_integration, "crm_client", client)
+
+    async def run():
+        result = await crm_integration.get_group_clients_from_crm("10", "1")
+        await client.close()
+        return result
+
+    assert asyncio.run(run()) == [
+        {"customer_id": 3, "client_name": "Boris"},
+        {"customer_id": 1, "client_name": "Anna"},
+        {"customer_id": 2, "client_name": None},  # Not resolved, so callers don't store a placeholder name
+    ]
+    assert calls["requests"] == 2
+
+
+def test_batched_client_lookup_asks_for_a_page_as_large_as_each_chunk(crm_settings, monkeypatch):
+    import json
+    import crm_integration
+
+    monkeypatch.setattr(settings, "crm_page_size", 2)
+    bodies = []
+
+    def handler(request):
+        body = json.loads(request.read())
+        bodies.append(body)
+        # Like AlfaCRM, return at most "limit" items (a default page without it)
+        return httpx.Response(200, json={"items": [{"id": int(i), "name": f"Client {i}"} for i in body["id"]][:body.get("limit", 1)]})
+
+    client, calls = make_client(handler)
+    monkeypatch.setattr(crm_integration, "crm_client", client)
+
+    async def run():
+        result = await crm_integration.get_clients_data_from_crm(["1", "2", "3"], "1")
+        await client.close()
+        return result
+
+    clients = asyncio.run(run())
+    assert sorted(bodies, key=lambda body: body["id"]) == [
+        {"id": ["1", "2"], "is_study": 2, "page": 0, "limit": 2},
+        {"id": ["3"], "is_study": 2, "page": 0, "limit": 1},
+    ]
+    assert sorted(clients) == ["1", "2", "3"]
+
+
+def test_iter_all_groups_crawls_all_pages_of_all_branches(crm_settings, monkeypatch):
+    import json
+    import crm_integration
+
+    monkeypatch.setattr(settings, "crm_branch_ids", [1, 2])
+    monkeypatch.setattr(settings, "crm_page_size", 50)
+    total = 120
+
+    def handler(request):
+        branch = int(request.url.path.split("/")[2])
+        page = json.loads(request.read())["page"]
+        ids = range(page * 50, min((page + 1) * 50, total))
+        # Group 0 belongs to both branches and must be yielded only once
+        items = [{"id": 0 if i == 0 else branch * 1000 + i} for i in ids]
+        return httpx.Response(200, json={"items": items, "total": total})
+
+    client, calls = make_client(handler)
+    monkeypatch.setattr(crm_integration, "crm_client", client)
+
+    async def run():
+        group_ids = [group["id"] async for page in crm_integration.iter_all_groups() for group in page]
+        await client.close()
+        return group_ids
+
+    group_ids = asyncio.run(run())
+    assert calls["requests"] == 6
+    assert len(group_ids) == len(set(group_ids)) == 2 * total - 1
+
+
+def test_refresh_tutor_profile_writes_only_changed_fields(monkeypatch, run_with_db):
+    import crm_integration
+    import models
+
+    async def fake_get_tutor_data_from_crm(phone, branch=None):
+        return {"id": 5, "name": "New Name", "branch_ids": [1], "teacher-to-skill": None}
+
+    monkeypatch.setattr(crm_integration, "get_tutor_data_from_crm", fake_get_tutor_data_from_crm)
+    saved_fields = []
+    original_save = models.TutorProfile.save
+
+    async def recording_save(self, *args, update_fields=None, **kwargs):
+        saved_fields.append(sorted(update_fields or []))
+        return await original_save(self, *args, update_fields=update_fields, **kwargs)
+
+    monkeypatch.setattr(models.TutorProfile, "save", recording_save)
+
+    async def scenario():
+        tutor = await models.TutorProfile.create(phone_number="+375291111111", branch="1", tutor_crm_id="5",
+                                                 tutor_name="Old Name", branch_ids=[1])
+        assert crm_integration.tutor_profile_is_stale(tutor)
+        saved_fields.clear()
+        await crm_integration.refresh_tutor_profile_from_crm(tutor.id)
+        return await models.TutorProfile.get(id=tutor.id)
+
+    refreshed = run_with_db(scenario)
+    assert saved_fields == [["crm_synced_at", "tutor_name"]]
+    assert refreshed.tutor_name == "New Name"
+    assert not crm_integration.tutor_profile_is_stale(refreshed)
+
+
+def test_client_against_fake_crm(crm_settings, monkeypatch):
+    import crm_integration
+    from fake_crm import FakeCRM, FakeCRMOptions, create_app, teacher_phone
+
+    fake = FakeCRM(FakeCRMOptions(branches=2, teachers_per_branch=2, groups_per_branch=60, students_per_group=3, latency_ms=0, jitter_ms=0))
+    client = CRMClient(transport=httpx.ASGITransport(app=create_app(fake)))
+    monkeypatch.setattr(crm_integration, "crm_client", client)
+    monkeypatch.setattr(settings, "crm_branch_ids", [])
+
+    async def run():
+        tutor = await crm_integration.get_tutor_data_from_crm(teacher_phone(2, 1), "2")
+        group_ids = [group["id"] async for page in crm_integration.iter_all_groups() for group in page]
+        clients = await crm_integration.get_group_clients_from_crm("10001", "1")
+        await client.close()
+        return tutor, group_ids, clients
+
+    tutor, group_ids, clients = asyncio.run(run())
+    assert tutor["id"] == 2001
+    assert len(set(group_ids)) == 120
+    assert clients == [{"customer_id": 1000100 + i, "client_name": f"Ученик {1000100 + i}"} for i in range(3)]
+    assert fake.calls["auth/login"] == 1 and fake.calls["branch/index"] == 1 and fake.calls["group/index"] == 4
+
+
+def test_idempotent_calls_are_retried_with_per_call_type_timeouts(crm_settings, monkeypatch):
+    monkeypatch.setattr(settings, "crm_retry_base_delay_seconds", 0)
+    failures = {"customer/index": [httpx.ConnectError("refused"), httpx.Response(503)],
+                "customer/update": [httpx.Response(500)]}
+    read_timeouts = {}
+
+    def handler(request):
+        path = request.url.path.split("/", 3)[3]
+        read_timeouts[path] = request.extensions["timeout"]["read"]
+        if failures.get(path):
+            failure = failures[path].pop(0)
+            if isinstance(failure, Exception):
+                raise failure
+            return failure
+        return httpx.Response(200, json={"items": [{"id": 1}]})
+
+    client, calls = make_client(handler)
+
+    async def run():
+        result = await client.post("customer/index", 1, json={})
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.post("customer/update", 1, json={})
+        await client.post("group/index", 1, json={})
+        await client.close()
+        return result
+
+    assert asyncio.run(run())["items"] == [{"id": 1}]
+    assert calls["requests"] == 3 + 1 + 1  # The write is not retried
+    assert read_timeouts == {"customer/index": settings.crm_lookup_timeout_seconds,
+                             "customer/update": settings.crm_write_timeout_seconds,
+                             "group/index": settings.crm_listing_timeout_seconds}
+
+
+def test_circuit_breaker_fails_fast_per_branch_and_recovers(crm_settings, monkeypatch):
+    import api
+    from crm_integration import CRMUnavailable
+
+    monkeypatch.setattr(settings, "crm_retry_attempts", 1)
+    monkeypatch.setattr(settings, "crm_breaker_failure_threshold", 2)
+    monkeypatch.setattr(settings, "crm_breaker_reset_seconds", 0.05)
+    down = {"1"}
+    client, calls = make_client(lambda request: httpx.Response(
+        500 if request.url.path.split("/")[2] in down else 200, json={"items": []}))
+    monkeypatch.setattr(api, "crm_client", client)
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(httpx.HTTPStatusError):
+                await client.post("customer/index", 1, json={})
+        with pytest.raises(CRMUnavailable):
+            await client.post("customer/index", 1, json={})
+        await client.post("customer/index", 2, json={})
+        health = await api.health_check()
+
+        await asyncio.sleep(0.06)
+        down.clear()
+        await client.post("customer/index", 1, json={})  # The trial call closes the circuit
+        recovered = client.breaker_states()
+        await client.close()
+        return health, recovered
+
+    health, recovered = asyncio.run(run())
+    assert calls["requests"] == 2 + 1 + 1
+    assert health["status"] == "ok" and health["crm"]["status"] == "degraded"
+    assert health["crm"]["circuits"]["1"]["state"] == "open"
+    assert health["crm"]["circuits"]["2"]["state"] == "closed"
+    assert recovered["1"] == {"state": "closed", "consecutive_failures": 0, "retry_in_seconds": 0.0}
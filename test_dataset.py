@@ -0,0 +1,35 @@
+import models
+from bench_queries import QUERIES, pick_samples, time_query
+from generate_dataset import DatasetOptions, generate_dataset
+from search import ensure_search_index
+
+
+def test_generate_dataset_adds_skewed_rows_next_to_existing_ones(run_with_db):
+    options = DatasetOptions(branches=3, tutors=6, groups=10, students=120, batch_size=50)
+
+    async def scenario():
+        first = await generate_dataset(options)
+        second = await generate_dataset(DatasetOptions(**{**vars(options), "seed": 2}))
+        group_sizes = await models.Student.all().values_list("group_id", flat=True)
+        resumes = await models.Resume.all().values("created_at", "updated_at")
+        return first, second, group_sizes, resumes, await models.Student.all().count()
+
+    first, second, group_ids, resumes, students = run_with_db(scenario)
+    assert first["students"] == second["students"] == 120
+    assert students == 240  # CRM ids of the second run continue after the first
+    sizes = sorted((group_ids.count(group_id) for group_id in set(group_ids)), reverse=True)
+    assert sizes[0] > 3 * sizes[-1]
+    assert len(resumes) == first["resumes"] + second["resumes"]
+    assert all(resume["updated_at"] == resume["created_at"] for resume in resumes)
+
+
+def test_every_benchmarked_query_runs_on_a_generated_dataset(run_with_db):
+    async def scenario():
+        await ensure_search_index()  # The search query is benchmarked too
+        await generate_dataset(DatasetOptions(branches=2, tutors=4, groups=6, students=40, batch_size=50))
+        samples = await pick_samples()
+        return {name: await time_query(lambda: query(samples), repeat=1, warmup=0) for name, _, query in QUERIES}
+
+    timings = run_with_db(scenario)
+    assert timings["group_clients"]["rows"] == timings["group_roster"]["rows"] > 0
+    assert timings["groups_senior"]["rows"] == 6
@@ -0,0 +1,37 @@
+import models
+from dossiers import load_group_roster, load_student_dossiers
+
+
+def test_dossiers_group_records_per_student(run_with_db):
+    async def scenario():
+        await models.Resume.create(student_crm_id="1", content="old", is_verified=True)
+        await models.Resume.create(student_crm_id="1", content="new")
+        await models.Resume.create(student_crm_id="2", content="other")
+        await models.ParentReview.create(student_crm_id="2", content="thanks")
+        return await load_student_dossiers(["2", "1", "3"], fields=["id", "is_verified"])
+
+    two, one, three = run_with_db(scenario)
+    assert one["student_crm_id"] == "1"
+    assert one["resumes"] == [{"id": 2, "is_verified": False}, {"id": 1, "is_verified": True}]
+    assert one["latest_verified_resume"] == {"id": 1, "is_verified": True}
+    assert two["parent_reviews"] == [{"id": 1}]
+    assert two["latest_verified_resume"] is None
+    assert three == {"student_crm_id": "3", "resumes": [], "latest_verified_resume": None, "parent_reviews": []}
+
+
+def test_group_roster_counts_resume_status(run_with_db):
+    async def scenario():
+        group = await models.Group.create(crm_group_id=1, branch_ids=[1], teacher_ids=[], name="G", level_id=1, status_id=1, limit=10)
+        await models.Student.create(student_crm_id=10, student_name="Bob", group=group)
+        await models.Student.create(student_crm_id=11, student_name="Ann", group=group)
+        await models.Student.create(student_crm_id=12, student_name="Eve", group=group)
+        await models.Resume.create(student_crm_id="10", is_verified=True)
+        await models.Resume.create(student_crm_id="10")
+        await models.Resume.create(student_crm_id="12")
+        return await load_group_roster(group.id), await load_group_roster(group.id + 1)
+
+    roster, missing = run_with_db(scenario)
+    assert missing is None
+    assert (roster["total"], roster["with_resume"], roster["done"]) == (3, 2, 1)
+    assert [(s["client_name"], s["resume_count"], s["is_verified"]) for s in roster["students"]] == [
+        ("Ann", 0, False), ("Bob", 2, True), ("Eve", 1, False)]
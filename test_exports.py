@@ -0,0 +1,54 @@
+import csv
+import gzip
+import io
+import json
+from datetime import timedelta
+from tortoise import timezone
+import models
+from exports import EXPORT_FIELDS, gzip_stream, iter_export, iter_record_chunks
+from pagination import filter_student_records
+
+
+async def collect(chunks):
+    return b"".join([chunk async for chunk in chunks])
+
+
+def test_record_chunks_cover_all_rows_in_id_order(run_with_db):
+    async def scenario():
+        for i in range(5):
+            await models.Resume.create(student_crm_id=str(i))
+        return [[row["id"] for row in rows] async for rows in iter_record_chunks(models.Resume.all(), ["id"], chunk_size=2)]
+
+    assert run_with_db(scenario) == [[1, 2], [3, 4], [5]]
+
+
+def test_export_formats(run_with_db):
+    async def scenario():
+        await models.Resume.create(student_crm_id="1", content='Line, "quoted"\nnext', is_verified=True)
+        await models.Resume.create(student_crm_id="2", content="Привет")
+        fields = EXPORT_FIELDS["resumes"]
+        ndjson = await collect(iter_export(models.Resume.all(), fields, "ndjson"))
+        csv_body = await collect(gzip_stream(iter_export(models.Resume.all(), fields, "csv")))
+        empty_csv = await collect(iter_export(models.ParentReview.all(), EXPORT_FIELDS["reviews"], "csv"))
+        return ndjson, csv_body, empty_csv
+
+    ndjson, csv_body, empty_csv = run_with_db(scenario)
+    records = [json.loads(line) for line in ndjson.decode().splitlines()]
+    assert [record["content"] for record in records] == ['Line, "quoted"\nnext', "Привет"]
+    rows = list(csv.reader(io.StringIO(gzip.decompress(csv_body).decode())))
+    assert rows[0] == list(EXPORT_FIELDS["resumes"])
+    assert rows[1][2] == 'Line, "quoted"\nnext'
+    assert len(rows) == 3
+    assert empty_csv.decode().strip() == ",".join(EXPORT_FIELDS["reviews"])
+
+
+def test_export_updated_since_filter(run_with_db):
+    async def scenario():
+        old = await models.ParentReview.create(student_crm_id="1")
+        await models.ParentReview.filter(id=old.id).update(updated_at=timezone.now() - timedelta(days=2))
+        await models.ParentReview.create(student_crm_id="2")
+        queryset = filter_student_records(models.ParentReview.all(), updated_since=timezone.now() - timedelta(days=1))
+        return await collect(iter_export(queryset, EXPORT_FIELDS["reviews"], "ndjson"))
+
+    lines = run_with_db(scenario).decode().splitlines()
+    assert [json.loads(line)["student_crm_id"] for line in lines] == ["2"]
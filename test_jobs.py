@@ -0,0 +1,131 @@
+import asyncio
+from datetime import datetime, timedelta
+from tortoise import timezone
+import jobs
+import models
+
+
+def test_enqueue_job_is_single_flight_per_job_type(run_with_db):
+    async def scenario():
+        results = await asyncio.gather(*(jobs.enqueue_job("groups_sync", {"mode": "delta"}) for _ in range(3)))
+        other, other_created = await jobs.enqueue_job("students_sync")
+        return results, other_created, await models.SyncJob.all().count()
+
+    results, other_created, count = run_with_db(scenario)
+    assert [created for _, created in results] == [True, False, False]
+    assert len({job.id for job, _ in results}) == 1
+    assert other_created
+    assert count == 2
+
+
+def test_single_flight_is_enforced_by_the_database(run_with_db):
+    async def scenario():
+        # Several processes each pass their own "no active job" check before inserting
+        real_filter = models.SyncJob.filter
+        checked = asyncio.Event()
+        waiting = []
+
+        async def no_active_job():
+            waiting.append(None)
+            if len(waiting) == 5:
+                checked.set()
+            await checked.wait()
+            return None
+
+        class RacingFilter:
+            def __init__(self, *args, **kwargs):
+                self.queryset = real_filter(*args, **kwargs)
+
+            def first(self):
+                return no_active_job() if not checked.is_set() else self.queryset.first()
+
+        models.SyncJob.filter = RacingFilter
+        try:
+            results = await asyncio.gather(*(jobs.enqueue_job("groups_sync") for _ in range(5)))
+        finally:
+            models.SyncJob.filter = real_filter
+        job = results[0][0]
+        await models.SyncJob.filter(id=job.id).update(status="succeeded")
+        _, created_after_finish = await jobs.enqueue_job("groups_sync")
+        return results, created_after_finish, await models.SyncJob.filter(status__in=jobs.ACTIVE_STATUSES).count()
+
+    results, created_after_finish, active = run_with_db(scenario)
+    assert sorted(created for _, created in results) == [False, False, False, False, True]
+    assert len({job.id for job, _ in results}) == 1
+    assert created_after_finish
+    assert active == 1
+
+
+def test_run_job_stores_result_and_failure(monkeypatch, run_with_db):
+    async def succeed(job, progress):
+        await progress(1, 1)
+        return {"synced_count": 1}
+
+    async def fail(job, progress):
+        raise RuntimeError("CRM is down")
+
+    monkeypatch.setitem(jobs.JOB_HANDLERS, "groups_sync", succeed)
+    monkeypatch.setitem(jobs.JOB_HANDLERS, "students_sync", fail)
+
+    async def scenario():
+        ok, _ = await jobs.enqueue_job("groups_sync")
+        failing, _ = await jobs.enqueue_job("students_sync")
+        await jobs.run_job(ok.id)
+        await jobs.run_job(failing.id)
+        return await models.SyncJob.get(id=ok.id), await models.SyncJob.get(id=failing.id)
+
+    ok, failing = run_with_db(scenario)
+    assert (ok.status, ok.result, ok.progress, ok.total) == ("succeeded", {"synced_count": 1}, 1, 1)
+    assert (failing.status, failing.error) == ("failed", "CRM is down")
+
+
+def test_queued_jobs_are_claimed_from_the_db_once(monkeypatch, run_with_db):
+    ran = []
+
+    async def handler(job, progress):
+        ran.append(job.id)
+        return {}
+
+    monkeypatch.setitem(jobs.JOB_HANDLERS, "groups_sync", handler)
+
+    async def scenario():
+        # Enqueued by a process that doesn't run jobs itself
+        job, _ = await jobs.enqueue_job("groups_sync")
+        first, second = await jobs.run_next_job(), await jobs.run_next_job()
+        again = await jobs.run_job(job.id)
+        return job.id, first, second, again, await models.SyncJob.get(id=job.id)
+
+    job_id, first, second, again, job = run_with_db(scenario)
+    assert (first, second, again) == (True, False, False)
+    assert ran == [job_id]
+    assert (job.status, job.worker_id) == ("succeeded", jobs.WORKER_ID)
+
+
+def test_only_abandoned_running_jobs_are_failed(monkeypatch, run_with_db):
+    monkeypatch.setattr(jobs, "WORKER_ID", "host:1")
+
+    async def scenario():
+        now = timezone.now()
+        stale = now - timedelta(hours=1)
+        # One active job per type, so each job gets a type of its own
+        live = await models.SyncJob.create(job_type="groups_sync", status="running", worker_id="host:2", heartbeat_at=now)
+        dead = await models.SyncJob.create(job_type="students_sync", status="running", worker_id="host:3", heartbeat_at=stale)
+        own = await models.SyncJob.create(job_type="other_sync", status="running", worker_id="host:1", heartbeat_at=now)
+        periodic = await jobs.fail_abandoned_jobs()
+        on_start = await jobs.fail_abandoned_jobs(include_own=True)
+        statuses = dict(await models.SyncJob.all().values_list("id", "status"))
+        return periodic, on_start, [statuses[job.id] for job in (live, dead, own)]
+
+    periodic, on_start, statuses = run_with_db(scenario)
+    assert (periodic, on_start) == (1, 1)
+    assert statuses == ["running", "failed", "failed"]
+
+
+def test_cron_matches():
+    monday_3am = datetime(2024, 1, 1, 3, 0)
+    assert jobs.cron_matches("0 3 * * *", monday_3am)
+    assert not jobs.cron_matches("30 3 * * *", monday_3am)
+    assert jobs.cron_matches("*/15 1-5 * * 1-5", monday_3am)
+    assert not jobs.cron_matches("0 3 * * 0,6", monday_3am)
+    assert jobs.cron_matches("0 3 15 * 1", monday_3am)  # day-of-month or day-of-week
+    assert jobs.cron_matches("0 3 * * 7", datetime(2024, 1, 7, 3, 0))  # Sunday
@@ -0,0 +1,39 @@
+import json
+import models
+from load_fixtures import ImportCheckpoint, iter_fixture_entries, load_fixtures_from_file
+
+
+def resume_entry(pk, **fields):
+    entry = {"id": pk, "student_crm_id": str(pk), "content": f"Резюме {pk}", "is_verified": 0,
+             "created_at": "2024-01-01 10:00:00Z"}
+    entry.update(fields)
+    return entry
+
+
+def test_entries_are_streamed_from_json_arrays_and_ndjson(tmp_path):
+    entries = [resume_entry(i, content="a, [b] {c}\n" * i) for i in range(1, 6)]
+    array_file = tmp_path / "resumes.json"
+    array_file.write_text(json.dumps(entries, ensure_ascii=False, indent=2), encoding="utf-8")
+    ndjson_file = tmp_path / "resumes.ndjson"
+    ndjson_file.write_text("\n".join(json.dumps(entry) for entry in entries) + "\n", encoding="utf-8")
+
+    assert list(iter_fixture_entries(str(array_file), read_chunk_size=7)) == entries
+    assert list(iter_fixture_entries(str(ndjson_file), read_chunk_size=7)) == entries
+
+
+def test_import_skips_existing_ids_and_resumes_from_checkpoint(tmp_path, run_with_db):
+    fixture = tmp_path / "resumes.json"
+    fixture.write_text(json.dumps([resume_entry(i) for i in range(1, 8)] + [{"unknown": True}]), encoding="utf-8")
+    # An earlier run stopped after the first 4 entries; entry 2 was also created by someone else
+    ImportCheckpoint(str(fixture)).save(4)
+
+    async def scenario():
+        await models.Resume.create(id=2, student_crm_id="2", content="kept")
+        await models.Resume.create(id=6, student_crm_id="6", content="kept")
+        stats = await load_fixtures_from_file(str(fixture), batch_size=2)
+        return stats, await models.Resume.all().order_by("id").values_list("id", "content")
+
+    stats, rows = run_with_db(scenario)
+    assert stats == {"entries": 8, "created": 2, "skipped": 2, "failed": 0}
+    assert rows == [(2, "kept"), (5, "Резюме 5"), (6, "kept"), (7, "Резюме 7")]
+    assert not (tmp_path / "resumes.json.checkpoint").exists()
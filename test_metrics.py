@@ -0,0 +1,83 @@
+import asyncio
+import httpx
+import pytest
+from fastapi import FastAPI
+from prometheus_client import REGISTRY
+import metrics
+import models
+from config import settings
+from crm_integration import CRMClient
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_requests_and_queries_are_recorded_per_route_template(run_with_db):
+    app = FastAPI()
+    app.add_middleware(metrics.MetricsMiddleware)
+    metrics.instrument_db()
+
+    @app.get("/test-metrics/groups/{group_id}/")
+    async def group(group_id: int):
+        return {"exists": await models.Group.exists(id=group_id)}
+
+    metrics.bind_routes(app.routes)
+    route = "/test-metrics/groups/{group_id}/"
+    before = {
+        "ok": sample("http_requests_total", method="GET", route=route, status="2xx"),
+        "invalid": sample("http_requests_total", method="GET", route=route, status="4xx"),
+        "unmatched": sample("http_requests_total", method="GET", route=metrics.UNMATCHED_ROUTE, status="4xx"),
+        "queries": sample("db_query_duration_seconds_count", route=route),
+        "job_queries": sample("db_query_duration_seconds_count", route="job:test"),
+    }
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            for group_id in ("1", "2", "x"):
+                await client.get(f"/test-metrics/groups/{group_id}/")
+            await client.get("/no-such-page/")
+        with metrics.db_queries_as("job:test"):
+            await models.Group.all().count()
+
+    run_with_db(scenario)
+    assert sample("http_requests_total", method="GET", route=route, status="2xx") - before["ok"] == 2
+    assert sample("http_requests_total", method="GET", route=route, status="4xx") - before["invalid"] == 1
+    assert sample("http_requests_total", method="GET", route=metrics.UNMATCHED_ROUTE, status="4xx") - before["unmatched"] == 1
+    assert sample("db_query_duration_seconds_count", route=route) - before["queries"] == 2
+    assert sample("db_query_duration_seconds_count", route="job:test") - before["job_queries"] == 1
+    assert sample("http_requests_in_progress") == 0
+    assert b'http_request_duration_seconds_bucket{le="0.005",method="GET",route="/test-metrics/groups/{group_id}/"}' \
+        in metrics.metrics_response().body
+
+
+def test_crm_calls_are_recorded_per_endpoint_branch_and_outcome(monkeypatch):
+    monkeypatch.setattr(settings, "crm_api_url", "https://crm.example.com")
+    monkeypatch.setattr(settings, "crm_email", "bot@example.com")
+    monkeypatch.setattr(settings, "crm_api_key", "secret")
+    monkeypatch.setattr(settings, "crm_retry_attempts", 1)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/v2api/auth/login":
+            return httpx.Response(200, json={"token": "token"})
+        if request.url.path == "/v2api/7/teacher/index":
+            raise httpx.ConnectTimeout("timed out")
+        return httpx.Response(500 if request.url.path.startswith("/v2api/8/") else 200, json={"items": []})
+
+    client = CRMClient(transport=httpx.MockTransport(handler))
+    labels = [("auth/login", "", "ok"), ("customer/index", "7", "ok"), ("customer/index", "8", "server_error"),
+              ("teacher/index", "7", "timeout")]
+    before = [sample("crm_requests_total", endpoint=e, branch=b, outcome=o) for e, b, o in labels]
+
+    async def run():
+        await client.post("customer/index", 7, json={})
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.post("customer/index", 8, json={})
+        with pytest.raises(httpx.TimeoutException):
+            await client.post("teacher/index", 7, json={})
+        await client.close()
+
+    asyncio.run(run())
+    after = [sample("crm_requests_total", endpoint=e, branch=b, outcome=o) for e, b, o in labels]
+    assert [new - old for new, old in zip(after, before)] == [1, 1, 1, 1]
+    assert sample("crm_request_duration_seconds_count", endpoint="customer/index", branch="8") >= 1
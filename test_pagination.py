@@ -0,0 +1,77 @@
+import json
+import pytest
+from fastapi import HTTPException
+import models
+from check_query_plans import check_plans
+from pagination import NEXT_CURSOR_HEADER, encode_cursor, filter_student_records, paginate
+from query_accounting import track_queries
+from schemas import RESUME_ROW_FIELDS, RESUME_ROWS, ResumeResponse
+from serialization import json_rows_response
+
+
+def test_keyset_pages_cover_all_rows_once_newest_first(run_with_db):
+    async def scenario():
+        for i in range(5):
+            await models.Resume.create(student_crm_id="7", content=str(i))
+        pages, cursor = [], None
+        while True:
+            rows, cursor = await paginate(models.Resume.filter(student_crm_id="7"), cursor, 2)
+            pages.append([row.id for row in rows])
+            if not cursor:
+                return pages
+
+    assert run_with_db(scenario) == [[5, 4], [3, 2], [1]]
+
+
+def test_branch_filter_uses_group_membership(run_with_db):
+    async def scenario():
+        group = await models.Group.create(crm_group_id=1, branch_ids=[2], teacher_ids=[], name="G", level_id=1, status_id=1, limit=10)
+        await models.GroupBranch.create(group=group, branch="2")
+        await models.Student.create(student_crm_id=10, student_name="Anna", group=group)
+        await models.Resume.create(student_crm_id="10")
+        await models.Resume.create(student_crm_id="11")
+        # The branch's student ids stay in the database as a subquery
+        with track_queries("branch listing") as stats:
+            in_branch = await filter_student_records(models.Resume.all(), branch="2").values_list("student_crm_id", flat=True)
+        other_branch = await filter_student_records(models.Resume.all(), branch="3").count()
+        return in_branch, other_branch, stats.count
+
+    assert run_with_db(scenario) == (["10"], 0, 1)
+
+
+def test_value_rows_serialize_like_response_model(run_with_db):
+    async def scenario():
+        for i in range(3):
+            await models.Resume.create(student_crm_id="7", content=f"резюме {i}", is_verified=i == 1)
+        rows, cursor = await paginate(models.Resume.filter(student_crm_id="7"), None, 2, fields=RESUME_ROW_FIELDS)
+        instances, instance_cursor = await paginate(models.Resume.filter(student_crm_id="7"), None, 2)
+        return rows, cursor, instances, instance_cursor
+
+    rows, cursor, instances, instance_cursor = run_with_db(scenario)
+    assert cursor == instance_cursor
+    response = json_rows_response(RESUME_ROWS, rows, cursor)
+    assert response.headers[NEXT_CURSOR_HEADER] == cursor
+    expected = [ResumeResponse.model_validate(resume).model_dump(mode="json") for resume in instances]
+    assert json.loads(response.body) == expected
+
+
+def test_invalid_cursor_is_rejected(run_with_db):
+    async def scenario():
+        statuses = []
+        # Not base64 / JSON, well-formed JSON with a number and an object where a timestamp belongs,
+        # and a string, a list and a bool where an id belongs
+        for cursor, keys in (("not-a-cursor", ("created_at", "id")), (encode_cursor([123, 1]), ("created_at", "id")),
+                             (encode_cursor([{"at": 1}, 1]), ("created_at", "id")),
+                             (encode_cursor(["2024-01-01T00:00:00", "abc"]), ("created_at", "id")),
+                             (encode_cursor(["2024-01-01T00:00:00", [1]]), ("created_at", "id")),
+                             (encode_cursor([True]), ("id",))):
+            with pytest.raises(HTTPException) as error:
+                await paginate(models.Resume.all(), cursor, 10, keys=keys)
+            statuses.append(error.value.status_code)
+        return statuses
+
+    assert run_with_db(scenario) == [400] * 6
+
+
+def test_listing_queries_use_indexes(run_with_db):
+    assert run_with_db(check_plans) == []
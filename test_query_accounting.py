@@ -0,0 +1,78 @@
+import logging
+import httpx
+import pytest
+import auth
+import models
+from config import settings
+from main import app
+from query_accounting import assert_max_queries, query_shape, track_queries
+
+
+def test_query_shape_collapses_literals_and_value_lists():
+    assert query_shape('SELECT "id" FROM "student" WHERE "group_id"=? AND "student_crm_id" IN (?,?, ?)\n LIMIT 20') == \
+        'SELECT "id" FROM "student" WHERE "group_id"=? AND "student_crm_id" IN (...) LIMIT ?'
+    assert query_shape("SELECT * FROM \"t\" WHERE \"name\"='O''Brien' AND \"n\"=$1") == 'SELECT * FROM "t" WHERE "name"=? AND "n"=?'
+
+
+def test_repeated_and_slow_queries_are_logged(monkeypatch, caplog, run_with_db):
+    monkeypatch.setattr(settings, "repeated_query_threshold", 5)
+    monkeypatch.setattr(settings, "slow_query_ms", 1e-6)
+
+    async def scenario():
+        with track_queries("loop") as stats:
+            for group_id in range(6):
+                await models.Group.get_or_none(id=group_id)
+            await models.Student.all().count()
+        return stats
+
+    with caplog.at_level(logging.WARNING, logger="query_accounting"):
+        stats = run_with_db(scenario)
+    assert stats.count == 7
+    assert [count for _, count in stats.repeated(5)] == [6]
+    messages = [record.getMessage() for record in caplog.records]
+    assert sum(message.startswith("Likely N+1 in loop: 6 queries shaped like SELECT") for message in messages) == 1
+    assert any(message.startswith("Slow query") and "values: [5, 2]" in message for message in messages)
+
+
+def test_assert_max_queries_bounds_an_endpoint(run_with_db):
+    async def scenario():
+        auth._identity_cache.clear()  # Tutor ids repeat across the in-memory test databases
+        tutor = await models.TutorProfile.create(phone_number="+375290000000", tutor_crm_id="1", branch="1", is_senior=True)
+        headers = {"Authorization": f"Bearer {auth.create_access_token(data=auth.tutor_token_claims(tutor))}"}
+        group = await models.Group.create(crm_group_id=1, branch_ids=[1], teacher_ids=[], name="G", level_id=1, status_id=1, limit=10)
+        await models.Student.bulk_create([models.Student(student_crm_id=n, student_name=f"S{n}", group=group)
+                                          for n in range(30)])
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            # The tutor row is read once per identity_cache_ttl_seconds, not per request
+            await client.get(f"/api/v1/groups/clients/?group_id={group.id}", headers=headers)
+            with assert_max_queries(3) as served:
+                response = await client.get(f"/api/v1/groups/clients/?group_id={group.id}", headers=headers)
+            with pytest.raises(AssertionError, match="Expected at most 1 queries, got 3 queries"):
+                with assert_max_queries(1):
+                    await client.get(f"/api/v1/groups/clients/?group_id={group.id}", headers=headers)
+        return response, served
+
+    response, served = run_with_db(scenario)
+    assert len(response.json()) == 30
+    assert served[0].label == "GET /api/v1/groups/clients/"
+
+
+def test_chunked_exports_are_not_reported_as_n_plus_one(monkeypatch, caplog, run_with_db):
+    monkeypatch.setattr(settings, "export_chunk_size", 10)
+    monkeypatch.setattr(settings, "repeated_query_threshold", 5)
+
+    async def scenario():
+        auth._identity_cache.clear()  # Tutor ids repeat across the in-memory test databases
+        tutor = await models.TutorProfile.create(phone_number="+375290000000", tutor_crm_id="1", branch="1", is_senior=True)
+        headers = {"Authorization": f"Bearer {auth.create_access_token(data=auth.tutor_token_claims(tutor))}"}
+        await models.Resume.bulk_create([models.Resume(student_crm_id=str(n), content="x") for n in range(150)])
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            with assert_max_queries(100) as served:
+                response = await client.get("/api/v1/exports/resumes/", headers=headers)
+        return response, served
+
+    with caplog.at_level(logging.WARNING, logger="query_accounting"):
+        response, served = run_with_db(scenario)
+    assert len(response.text.splitlines()) == 150
+    assert served[0].shapes.most_common(1)[0][1] >= 15  # One query per chunk
+    assert not any(record.getMessage().startswith("Likely N+1") for record in caplog.records)
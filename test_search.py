@@ -0,0 +1,48 @@
+import models
+from search import ensure_search_index, fts5_query, search_records
+
+
+def test_fts5_query_quotes_words_as_prefixes():
+    assert fts5_query('Scratch "OR" робот*') == '"Scratch"* "OR"* "робот"*'
+    assert fts5_query(' "-* ') is None
+
+
+def test_search_follows_writes_and_highlights_matches(run_with_db):
+    async def scenario():
+        await models.Resume.create(student_crm_id="1", content="Собирает <b>роботов</b> в Scratch")
+        # Rows written before the index exists are indexed when it is created
+        await ensure_search_index()
+        await ensure_search_index()
+        resume = await models.Resume.create(student_crm_id="2", content="Робототехника и Python")
+        await models.ParentReview.create(student_crm_id="2", content="Ребёнок полюбил робототехнику")
+        found = await search_records("РОБОТ", ["resumes", "reviews"], 10)
+
+        resume.content = "Только Python"
+        await resume.save()
+        await models.Resume.filter(student_crm_id="1").delete()
+        after_writes = await search_records("робот", ["resumes"], 10)
+        return found, after_writes
+
+    found, after_writes = run_with_db(scenario)
+    assert sorted((result["kind"], result["student_crm_id"]) for result in found) == [
+        ("resumes", "1"), ("resumes", "2"), ("reviews", "2")]
+    first = next(result for result in found if result["student_crm_id"] == "1")
+    assert first["snippet"] == "Собирает &lt;b&gt;<mark>роботов</mark>&lt;/b&gt; в Scratch"
+    assert first["is_verified"] is False
+    assert after_writes == []
+
+
+def test_search_merges_kinds_on_a_common_scale(run_with_db):
+    async def scenario():
+        await ensure_search_index()
+        # A rare word in a large table gets much higher raw bm25 scores than a common one in a small table
+        await models.Resume.bulk_create([models.Resume(student_crm_id="1", content=f"Занятие {n}") for n in range(50)])
+        await models.Resume.create(student_crm_id="2", content="Собирает роботов")
+        await models.Resume.create(student_crm_id="3", content="Собирает роботов и программирует роботов")
+        await models.ParentReview.create(student_crm_id="4", content="Про роботов")
+        await models.ParentReview.create(student_crm_id="5", content="Про роботов и Scratch")
+        return await search_records("роботов", ["resumes", "reviews"], 2)
+
+    found = run_with_db(scenario)
+    assert sorted(result["kind"] for result in found) == ["resumes", "reviews"]
+    assert [result["score"] for result in found] == [1.0, 1.0]
@@ -0,0 +1,231 @@
+import asyncio
+import models
+from crm_integration import CRMError
+from sync import sync_groups
+
+
+def crm_group(crm_group_id, updated_at="2024-01-01 10:00:00", **fields):
+    group = {
+        "id": crm_group_id,
+        "branch_ids": [1],
+        "teacher_ids": [7],
+        "name": f"Group {crm_group_id}",
+        "level_id": 1,
+        "status_id": 1,
+        "limit": 12,
+        "updated_at": updated_at,
+    }
+    group.update(fields)
+    return group
+
+
+async def pages(*pages, error=None):
+    for page in pages:
+        yield page
+    if error:
+        raise error
+
+
+def test_sync_groups_diffs_against_existing_rows(run_with_db):
+    async def scenario():
+        first = await sync_groups(pages([crm_group(1), crm_group(2)], [crm_group(3)]))
+        second = await sync_groups(pages([
+            crm_group(1),
+            crm_group(2, updated_at="2024-02-01 10:00:00", name="Renamed"),
+            crm_group(4),
+        ]))
+        names = dict(await models.Group.all().values_list("crm_group_id", "name"))
+        return first, second, names
+
+    first, second, names = run_with_db(scenario)
+    assert first == {"inserted": 3, "updated": 0, "unchanged": 0, "deleted": 0, "complete": True}
+    assert second == {"inserted": 1, "updated": 1, "unchanged": 1, "deleted": 1, "complete": True}
+    assert names == {1: "Group 1", 2: "Renamed", 4: "Group 4"}
+
+
+def test_sync_groups_maintains_teacher_and_branch_links(run_with_db):
+    async def scenario():
+        await sync_groups(pages([crm_group(1, teacher_ids=[7, 12]), crm_group(2, teacher_ids=[12]), crm_group(3)]))
+        await sync_groups(pages([
+            crm_group(1, teacher_ids=[7, 12]),
+            crm_group(2, updated_at="2024-02-01 10:00:00", teacher_ids=[1, 7], branch_ids=[1, 2]),
+        ]))
+        links = await models.GroupTeacher.all().order_by("group__crm_group_id", "tutor_crm_id").values_list(
+            "group__crm_group_id", "tutor_crm_id")
+        # "1" must not match teacher 12 the way a JSON text search would
+        tutor_groups = await models.Group.filter(teachers__tutor_crm_id="1").values_list("crm_group_id", flat=True)
+        branch_links = await models.GroupBranch.all().order_by("group__crm_group_id", "branch").values_list(
+            "group__crm_group_id", "branch")
+        return links, tutor_groups, branch_links
+
+    links, tutor_groups, branch_links = run_with_db(scenario)
+    assert links == [(1, "12"), (1, "7"), (2, "1"), (2, "7")]
+    assert tutor_groups == [2]
+    assert branch_links == [(1, "1"), (2, "1"), (2, "2")]
+
+
+def test_sync_groups_does_not_delete_after_partial_crawl(run_with_db):
+    async def scenario():
+        await sync_groups(pages([crm_group(1), crm_group(2)]))
+        stats = await sync_groups(pages([crm_group(1)], error=CRMError("branch down")))
+        return stats, await models.Group.all().count()
+
+    stats, count = run_with_db(scenario)
+    assert stats["complete"] is False
+    assert stats["deleted"] == 0
+    assert count == 2
+
+
+def test_sync_groups_holds_no_transaction_while_crawling(run_with_db):
+    async def scenario():
+        first_page_sent = asyncio.Event()
+        reader_done = asyncio.Event()
+
+        async def crawl():
+            yield [crm_group(1)]
+            first_page_sent.set()
+            await reader_done.wait()
+            yield [crm_group(2)]
+
+        async def reader():
+            # Like an API request served while the sync waits for the CRM
+            await first_page_sent.wait()
+            try:
+                return await asyncio.wait_for(models.Group.filter(crm_group_id=1).exists(), timeout=2)
+            finally:
+                reader_done.set()
+
+        return await asyncio.gather(asyncio.create_task(reader()), sync_groups(crawl()))
+
+    seen_mid_crawl, stats = run_with_db(scenario)
+    assert seen_mid_crawl is True
+    assert stats["inserted"] == 2
+
+
+def test_groups_delta_sync_requests_only_changed_groups(monkeypatch, run_with_db):
+    import sync
+
+    requested_since = []
+
+    def fake_iter_all_groups(updated_since=None):
+        requested_since.append(updated_since)
+        if updated_since:
+            return pages([crm_group(2, branch_ids=[1], updated_at="2024-03-01 00:00:00")])
+        return pages([crm_group(1, branch_ids=[1]), crm_group(2, branch_ids=[1])])
+
+    monkeypatch.setattr(sync, "iter_all_groups", fake_iter_all_groups)
+
+    async def scenario():
+        full = await sync.run_groups_sync("auto")
+        delta = await sync.run_groups_sync("auto")
+        state = await models.SyncState.get(entity="groups", branch="1")
+        return full, delta, state.watermark
+
+    full, delta, watermark = run_with_db(scenario)
+    assert full["mode"] == "full" and full["inserted"] == 2
+    assert delta["mode"] == "delta" and delta["updated"] == 1 and delta["deleted"] == 0
+    assert requested_since == [None, {"1": "2024-01-01 10:00:00"}]
+    assert watermark == "2024-03-01 00:00:00"
+
+
+def test_students_sync_uses_group_branches_and_bulk_applies_changes(monkeypatch, run_with_db):
+    import sync
+
+    memberships = {
+        ("100", "2"): [{"customer_id": 1, "client_name": "Anna"}, {"customer_id": 2, "client_name": "Boris"}],
+        ("200", "3"): [{"customer_id": 3, "client_name": "Vera"}],
+    }
+    requested = []
+
+    async def fake_get_group_clients_from_crm(group_id, branch=None):
+        requested.append((group_id, branch))
+        return memberships.get((group_id, branch))
+
+    monkeypatch.setattr(sync, "get_group_clients_from_crm", fake_get_group_clients_from_crm)
+
+    async def scenario():
+        await sync_groups(pages([crm_group(100, branch_ids=[2]), crm_group(200, branch_ids=[3])]))
+        group_100 = await models.Group.get(crm_group_id=100)
+        group_200 = await models.Group.get(crm_group_id=200)
+        # Boris is already known but sits in the other group, Gleb left group 200
+        await models.Student.create(student_crm_id=2, student_name="Boris", group=group_200)
+        await models.Student.create(student_crm_id=4, student_name="Gleb", group=group_200)
+
+        stats = await sync.run_students_sync("full", branch="1")
+        students = {student.student_crm_id: student.group_id for student in await models.Student.all()}
+        return stats, students, group_100.id, group_200.id
+
+    stats, students, group_100_id, group_200_id = run_with_db(scenario)
+    assert sorted(requested) == [("100", "2"), ("200", "3")]
+    assert (stats["inserted"], stats["updated"], stats["detached"], stats["failed_groups"]) == (2, 1, 1, 0)
+    assert students == {1: group_100_id, 2: group_100_id, 3: group_200_id, 4: None}
+
+
+def test_students_delta_sync_rereads_running_groups_even_when_unchanged(monkeypatch, run_with_db):
+    import sync
+
+    requested = []
+
+    async def fake_get_group_clients_from_crm(group_id, branch=None):
+        requested.append(group_id)
+        return []
+
+    monkeypatch.setattr(sync, "get_group_clients_from_crm", fake_get_group_clients_from_crm)
+
+    async def scenario():
+        # Enrolments don't touch a group's updated_at, so running groups are re-read regardless
+        await sync_groups(pages([crm_group(1, e_date="31.12.2999"), crm_group(2, e_date=None),
+                                 crm_group(3, e_date="31.05.2000", updated_at="2023-06-01 10:00:00")]))
+        await sync.run_students_sync("full")
+        requested.clear()
+        delta = await sync.run_students_sync("delta")
+        return delta
+
+    delta = run_with_db(scenario)
+    assert delta["mode"] == "delta"
+    assert sorted(requested) == ["1", "2"]
+
+
+def test_students_sync_keeps_names_of_clients_the_crm_could_not_resolve(monkeypatch, run_with_db):
+    import sync
+
+    async def fake_get_group_clients_from_crm(group_id, branch=None):
+        # Customer lookups failed for Anna (known) and client 5 (new)
+        return [{"customer_id": 1, "client_name": None}, {"customer_id": 2, "client_name": "Boris"},
+                {"customer_id": 5, "client_name": None}]
+
+    monkeypatch.setattr(sync, "get_group_clients_from_crm", fake_get_group_clients_from_crm)
+
+    async def scenario():
+        await sync_groups(pages([crm_group(100)]))
+        group = await models.Group.get(crm_group_id=100)
+        await models.Student.create(student_crm_id=1, student_name="Anna", group=group)
+        stats = await sync.run_students_sync("full")
+        students = dict(await models.Student.all().values_list("student_crm_id", "student_name"))
+        return stats, students, await models.SyncState.filter(entity="students").count()
+
+    stats, students, saved_states = run_with_db(scenario)
+    assert (stats["synced_count"], stats["unresolved_clients"], stats["inserted"]) == (1, 2, 1)
+    assert students == {1: "Anna", 2: "Boris"}
+    assert saved_states == 0
+
+
+def test_students_listed_in_several_groups_go_to_the_lowest_group_id(monkeypatch, run_with_db):
+    import sync
+
+    async def fake_get_group_clients_from_crm(group_id, branch=None):
+        return [{"customer_id": 1, "client_name": "Anna"}]
+
+    monkeypatch.setattr(sync, "get_group_clients_from_crm", fake_get_group_clients_from_crm)
+
+    async def scenario():
+        await sync_groups(pages([crm_group(300), crm_group(100), crm_group(200)]))
+        first_group_id = await models.Group.all().order_by("id").first().values_list("id", flat=True)
+        placements = []
+        for _ in range(2):
+            await sync.run_students_sync("full")
+            placements.append(await models.Student.get(student_crm_id=1).values_list("group_id", flat=True))
+        return first_group_id, placements
+
+    first_group_id, placements = run_with_db(scenario)
+    assert placements == [first_group_id, first_group_id]